@@ -93,3 +93,37 @@ class Buffer(Service):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, updates):
+        """
+        Processes a list of ``(model, columns, filters, extra, signal_only)``
+        updates. Counter updates for models in ``BULK_UPDATE_MODELS`` that
+        touch the same columns are applied with a single statement per model;
+        everything else goes through ``process``.
+        """
+        from sentry.buffer.bulk import bulk_update_counters, group_bulk_updates
+        from sentry.models import Group
+
+        batches, remaining = group_bulk_updates(updates)
+
+        for (model, _, _, _), batch in batches.items():
+            matched = bulk_update_counters(
+                model, [(columns, filters, extra) for _, columns, filters, extra, _ in batch]
+            )
+            for index, (model, columns, filters, extra, signal_only) in enumerate(batch):
+                if index not in matched and model is not Group:
+                    # The row doesn't exist yet, ``process`` will create it.
+                    remaining.append((model, columns, filters, extra, signal_only))
+                    continue
+
+                buffer_incr_complete.send_robust(
+                    model=model,
+                    columns=columns,
+                    filters=filters,
+                    extra=extra,
+                    created=False,
+                    sender=model,
+                )
+
+        for model, columns, filters, extra, signal_only in remaining:
+            Buffer.process(self, model, columns, filters, extra, signal_only)
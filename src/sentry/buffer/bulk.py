@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.db import connections, models, router
+from django.db.models.signals import post_save
+from django.utils import timezone
+from psycopg2.extras import execute_values
+
+from sentry.utils import metrics
+
+# Models whose buffered counters can be flushed with a single multi-row
+# ``UPDATE ... FROM (VALUES ...)`` statement.
+BULK_UPDATE_MODELS = frozenset(["sentry.Group", "sentry.Release", "sentry.ReleaseProject"])
+
+
+def _get_field(model, name):
+    if name == "pk":
+        return model._meta.pk
+    return model._meta.get_field(name)
+
+
+def can_bulk_update(model, columns, filters, extra, signal_only):
+    """
+    Returns whether a buffered update can be applied through
+    ``bulk_update_counters`` rather than ``Buffer.process``.
+    """
+    if signal_only or not columns or not filters:
+        return False
+    if model._meta.label not in BULK_UPDATE_MODELS:
+        return False
+    try:
+        for name in (*columns, *filters, *(extra or ())):
+            _get_field(model, name)
+    except Exception:
+        return False
+    return True
+
+
+def get_update_shape(model, columns, filters, extra):
+    """
+    Updates can only be applied in the same statement if they touch the same
+    set of columns.
+    """
+    return (model, tuple(sorted(columns)), tuple(sorted(filters)), tuple(sorted(extra or ())))
+
+
+def bulk_update_counters(model, updates):
+    """
+    Applies a list of ``(columns, filters, extra)`` updates that share the
+    same shape (see ``get_update_shape``) to ``model`` with a single
+    ``UPDATE ... FROM (VALUES ...)`` statement. Counters in ``columns`` are
+    incremented, values in ``extra`` are set.
+
+    Returns the indexes of the updates that matched an existing row.
+    """
+    from sentry.models import Group
+
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+
+    columns, filters, extra = updates[0]
+    column_names = sorted(columns)
+    filter_names = sorted(filters)
+    extra_names = sorted(extra or ())
+    column_fields = [_get_field(model, name) for name in column_names]
+    filter_fields = [_get_field(model, name) for name in filter_names]
+    extra_fields = [_get_field(model, name) for name in extra_names]
+
+    # Mirrors ``update``, which always bumps ``auto_now`` fields.
+    now = timezone.now()
+    auto_now_fields = [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) and field not in extra_fields
+    ]
+
+    assignments = [
+        f"{quote(f.column)} = t.{quote(f.column)} + v.{quote(f.column)}" for f in column_fields
+    ]
+    assignments.extend(f"{quote(f.column)} = v.{quote(f.column)}" for f in extra_fields)
+    assignments.extend(f"{quote(f.column)} = v.{quote(f.column)}" for f in auto_now_fields)
+
+    # HACK(dcramer): this is gross, but we don't have a good hook to compute this property today
+    # XXX: This mirrors ``ScoreClause``, which is what ``Buffer.process`` uses.
+    if model is Group and "times_seen" in column_names and "last_seen" in extra_names:
+        assignments.append(
+            '"score" = log(t."times_seen" + v."times_seen") * 600 '
+            '+ floor(extract(epoch from v."last_seen"))::int'
+        )
+
+    value_fields = filter_fields + column_fields + extra_fields + auto_now_fields
+    template = ", ".join(["%s::integer"] + [f"%s::{f.db_type(connection)}" for f in value_fields])
+
+    rows = []
+    for index, (columns, filters, extra) in enumerate(updates):
+        row = [index]
+        for name, field in zip(filter_names, filter_fields):
+            value = filters[name]
+            if isinstance(value, models.Model):
+                value = value.pk
+            row.append(field.get_db_prep_value(value, connection))
+        for name in column_names:
+            row.append(columns[name])
+        for name, field in zip(extra_names, extra_fields):
+            row.append(field.get_db_prep_save(extra[name], connection))
+        for field in auto_now_fields:
+            row.append(field.get_db_prep_save(now, connection))
+        rows.append(row)
+
+    sql = """
+        UPDATE {table} AS t
+        SET {assignments}
+        FROM (VALUES %s) AS v ({names})
+        WHERE {where}
+        RETURNING v."_index", {returning}
+    """.format(
+        table=quote(model._meta.db_table),
+        assignments=", ".join(assignments),
+        names=", ".join(['"_index"'] + [quote(f.column) for f in value_fields]),
+        where=" AND ".join(f"t.{quote(f.column)} = v.{quote(f.column)}" for f in filter_fields),
+        returning=", ".join(f"t.{quote(f.column)}" for f in model._meta.concrete_fields),
+    )
+
+    with metrics.timer("buffer.bulk-update", tags={"model": model.__name__}):
+        with connection.cursor() as cursor:
+            results = execute_values(
+                cursor,
+                sql,
+                rows,
+                template=f"({template})",
+                page_size=len(rows),
+                fetch=True,
+            )
+
+    metrics.timing("buffer.bulk-update.rows", len(rows), tags={"model": model.__name__})
+
+    field_names = [field.attname for field in model._meta.concrete_fields]
+    matched = set()
+    for result in results:
+        matched.add(result[0])
+        if model is Group:
+            # ``Group.update`` fires ``post_save`` so that the cached group is
+            # refreshed. Do the same here.
+            instance = model.from_db(using, field_names, result[1:])
+            post_save.send(sender=model, instance=instance, created=False)
+    return matched
+
+
+def group_bulk_updates(updates):
+    """
+    Splits ``(model, columns, filters, extra, signal_only)`` updates into
+    batches for ``bulk_update_counters``, keyed by update shape, and the
+    remaining updates that have to be processed one by one.
+    """
+    batches = defaultdict(list)
+    remaining = []
+    for update in updates:
+        model, columns, filters, extra, signal_only = update
+        if can_bulk_update(model, columns, filters, extra, signal_only):
+            batches[get_update_shape(model, columns, filters, extra)].append(update)
+        else:
+            remaining.append(update)
+    return batches, remaining
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import atexit
 import logging
 import pickle
 import threading
+from collections import defaultdict
 from datetime import date, datetime, timezone
 from time import time
 
@@ -15,13 +17,19 @@ from sentry.utils import json, metrics
 from sentry.utils.compat import crc32
 from sentry.utils.hashlib import md5_text
 from sentry.utils.imports import import_string
-from sentry.utils.redis import get_dynamic_cluster_from_options, validate_dynamic_cluster
+from sentry.utils.redis import (
+    get_dynamic_cluster_from_options,
+    load_script,
+    validate_dynamic_cluster,
+)
 
 _local_buffers = None
 _local_buffers_lock = threading.Lock()
 
 logger = logging.getLogger(__name__)
 
+incr_script = load_script("buffer/incr.lua")
+
 # Debounce our JSON validation a bit in order to not cause too much additional
 # load everywhere
 _last_validation_log: float | None = None
@@ -69,18 +77,85 @@ class PendingBuffer:
         return rv
 
 
+class CoalescedIncr:
+    """
+    The accumulated state of all ``incr`` calls for a single buffer key that
+    have not been written to Redis yet.
+    """
+
+    def __init__(self, model, filters):
+        self.model = model
+        self.filters = filters
+        self.columns = {}
+        self.extra = {}
+        self.signal_only = False
+        self.count = 0
+
+    def merge(self, columns, extra=None, signal_only=None):
+        for column, amount in columns.items():
+            self.columns[column] = self.columns.get(column, 0) + amount
+        if extra:
+            # Last write wins, same as the ``hset`` this replaces.
+            self.extra.update(extra)
+        if signal_only is True:
+            self.signal_only = True
+        self.count += 1
+        return self
+
+
 class RedisBuffer(Buffer):
+    """
+    When ``incr_coalesce_window`` is set (in seconds), increments are merged
+    in-process for identical (model, filters) keys and written out at most
+    ``incr_coalesce_window`` seconds later, or as soon as more than
+    ``incr_coalesce_max_keys`` distinct keys are waiting to be written.
+    Either way, every key is written with a single server-side script call,
+    except on Redis Cluster, where the commands of all keys are sent in one
+    pipeline.
+
+    When ``pending_page_size`` is set, ``process_pending`` reads and removes
+    pending keys in pages of at most that many keys instead of fetching the
+    whole pending set at once, which keeps memory usage and Redis latency
+    flat regardless of the size of the backlog.
+
+    When ``bulk_process`` is set, ``process`` handles a batch of keys with a
+    single Redis pipeline and applies the counters with one database
+    statement per model (see ``Buffer.process_batch``).
+    """
+
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        incr_coalesce_window=0,
+        incr_coalesce_max_keys=1000,
+        pending_page_size=None,
+        bulk_process=False,
+        **options,
+    ):
         self.is_redis_cluster, self.cluster, options = get_dynamic_cluster_from_options(
             "SENTRY_BUFFER_OPTIONS", options
         )
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        self.incr_coalesce_window = incr_coalesce_window
+        self.incr_coalesce_max_keys = incr_coalesce_max_keys
+        self.pending_page_size = pending_page_size
+        self.bulk_process = bulk_process
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
+        assert self.incr_coalesce_window >= 0
+        assert self.incr_coalesce_max_keys > 0
+        assert self.pending_page_size is None or self.pending_page_size > 0
+
+        self._coalesced: dict[str, CoalescedIncr] = {}
+        self._coalesce_lock = threading.Lock()
+        self._coalesce_timer: threading.Timer | None = None
+        if self.incr_coalesce_window:
+            atexit.register(self.flush)
 
     def get_routing_client(self):
         if self.is_redis_cluster:
@@ -192,8 +267,13 @@ class RedisBuffer(Buffer):
             pipe.hget(key, f"i+{col}")
         results = pipe.execute()
 
+        with self._coalesce_lock:
+            pending = self._coalesced.get(key)
+            pending_columns = dict(pending.columns) if pending is not None else {}
+
         return {
-            col: (int(results[i]) if results[i] is not None else 0) for i, col in enumerate(columns)
+            col: (int(results[i]) if results[i] is not None else 0) + pending_columns.get(col, 0)
+            for i, col in enumerate(columns)
         }
 
     def incr(self, model, columns, filters, extra=None, signal_only=None, return_incr_results=True):
@@ -205,52 +285,156 @@ class RedisBuffer(Buffer):
             - Perform a set (last write wins) on extra
             - Perform a set on signal_only (only if True)
         - Add hashmap key to pending flushes
+
+        If coalescing is enabled, the increment is merged with any other
+        increments for the same key that are waiting to be written.
         """
 
         key = self._make_key(model, filters)
-        pending_key = self._make_pending_key_from_key(key)
-        # We can't use conn.map() due to wanting to support multiple pending
-        # keys (one per Redis partition)
-        if self.is_redis_cluster:
-            conn = self.cluster
+
+        if not self.incr_coalesce_window:
+            pending = CoalescedIncr(model, filters).merge(columns, extra, signal_only)
+            self._write_incrs({key: pending})
         else:
-            conn = self.cluster.get_local_client_for_key(key)
+            batch = None
+            with self._coalesce_lock:
+                pending = self._coalesced.get(key)
+                if pending is None:
+                    pending = self._coalesced[key] = CoalescedIncr(model, filters)
+                pending.merge(columns, extra, signal_only)
+
+                if len(self._coalesced) >= self.incr_coalesce_max_keys:
+                    batch = self._take_coalesced()
+                elif self._coalesce_timer is None:
+                    self._coalesce_timer = threading.Timer(
+                        self.incr_coalesce_window, self._flush_from_timer
+                    )
+                    self._coalesce_timer.daemon = True
+                    self._coalesce_timer.start()
+
+            if batch:
+                self._write_coalesced(batch)
 
-        pipe = conn.pipeline()
-        pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
-        _validate_json_roundtrip(filters, model)
+        metrics.incr(
+            "buffer.incr",
+            skip_internal=True,
+            tags={"module": model.__module__, "model": model.__name__},
+        )
 
-        if self.is_redis_cluster:
-            pipe.hsetnx(key, "f", json.dumps(self._dump_values(filters)))
-        else:
-            pipe.hsetnx(key, "f", pickle.dumps(filters))
+    def flush(self):
+        """
+        Write all coalesced increments to Redis immediately.
+        """
+        with self._coalesce_lock:
+            batch = self._take_coalesced()
+        if batch:
+            self._write_coalesced(batch)
 
-        for column, amount in columns.items():
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("buffer.coalesce.flush-failed")
+
+    def _take_coalesced(self):
+        # Must be called while holding ``_coalesce_lock``.
+        batch, self._coalesced = self._coalesced, {}
+        if self._coalesce_timer is not None:
+            self._coalesce_timer.cancel()
+            self._coalesce_timer = None
+        return batch
+
+    def _write_coalesced(self, batch):
+        self._write_incrs(batch)
+
+        incr_count = sum(pending.count for pending in batch.values())
+        metrics.incr("buffer.coalesce.incrs", amount=incr_count, skip_internal=True)
+        metrics.incr("buffer.coalesce.writes", amount=len(batch), skip_internal=True)
+        metrics.incr("buffer.coalesce.merged", amount=incr_count - len(batch), skip_internal=True)
+
+    def _pipeline_incr(self, pipe, key, pending, timestamp):
+        """
+        Queue the commands of ``incr.lua`` for a single key on a cluster
+        pipeline.
+        """
+        pipe.hsetnx(key, "m", f"{pending.model.__module__}.{pending.model.__name__}")
+        _validate_json_roundtrip(pending.filters, pending.model)
+        pipe.hsetnx(key, "f", json.dumps(self._dump_values(pending.filters)))
+
+        if pending.signal_only:
+            pipe.hset(key, "s", "1")
+
+        for column, amount in pending.columns.items():
             pipe.hincrby(key, "i+" + column, amount)
 
-        if extra:
+        if pending.extra:
             # Group tries to serialize 'score', so we'd need some kind of processing
             # hook here
             # e.g. "update score if last_seen or times_seen is changed"
-            _validate_json_roundtrip(extra, model)
-            for column, value in extra.items():
-                if self.is_redis_cluster:
-                    pipe.hset(key, "e+" + column, json.dumps(self._dump_value(value)))
-                else:
-                    pipe.hset(key, "e+" + column, pickle.dumps(value))
-
-        if signal_only is True:
-            pipe.hset(key, "s", "1")
+            _validate_json_roundtrip(pending.extra, pending.model)
+            for column, value in pending.extra.items():
+                pipe.hset(key, "e+" + column, json.dumps(self._dump_value(value)))
 
         pipe.expire(key, self.key_expire)
-        pipe.zadd(pending_key, {key: time()})
-        pipe.execute()
+        pipe.zadd(self._make_pending_key_from_key(key), {key: timestamp})
+
+    def _make_incr_script_args(self, pending, timestamp):
+        _validate_json_roundtrip(pending.filters, pending.model)
+
+        args = [
+            f"{pending.model.__module__}.{pending.model.__name__}",
+            pickle.dumps(pending.filters),
+            self.key_expire,
+            timestamp,
+            "1" if pending.signal_only else "0",
+            len(pending.columns),
+        ]
+        for column, amount in pending.columns.items():
+            args.extend(("i+" + column, amount))
+
+        # Group tries to serialize 'score', so we'd need some kind of processing
+        # hook here
+        # e.g. "update score if last_seen or times_seen is changed"
+        if pending.extra:
+            _validate_json_roundtrip(pending.extra, pending.model)
+        args.append(len(pending.extra))
+        for column, value in pending.extra.items():
+            args.extend(("e+" + column, pickle.dumps(value)))
+        return args
+
+    def _write_incrs(self, batch):
+        """
+        Write a mapping of buffer key -> ``CoalescedIncr`` to Redis, using a
+        single script invocation per key, or a single pipeline on Redis
+        Cluster.
+        """
+        timestamp = time()
 
-        metrics.incr(
-            "buffer.incr",
-            skip_internal=True,
-            tags={"module": model.__module__, "model": model.__name__},
-        )
+        if self.is_redis_cluster:
+            # The pending set is not guaranteed to live in the same slot as
+            # the buffer key, so the script can't update both. All commands
+            # go into one pipeline instead, like a single ``incr`` did before.
+            pipe = self.cluster.pipeline(transaction=False)
+            for key, pending in batch.items():
+                self._pipeline_incr(pipe, key, pending, timestamp)
+            pipe.execute()
+        else:
+            # Every host has its own pending set, so the script can update
+            # it directly. Script calls are pipelined per host.
+            router = self.cluster.get_router()
+            keys_by_host = defaultdict(list)
+            for key in batch:
+                keys_by_host[router.get_host_for_key(key)].append(key)
+
+            for host, keys in keys_by_host.items():
+                with self.cluster.get_local_client(host).pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        incr_script(
+                            pipe,
+                            [key, self._make_pending_key_from_key(key)],
+                            self._make_incr_script_args(batch[key], timestamp),
+                        )
+                    pipe.execute()
 
     def process_pending(self, partition=None):
         if partition is None and self.pending_partitions > 1:
@@ -276,7 +460,11 @@ class RedisBuffer(Buffer):
 
         try:
             keycount = 0
-            if self.is_redis_cluster:
+            if self.pending_page_size is not None:
+                keycount = self._process_pending_paged(
+                    client, pending_key, lock_key, pending_buffer
+                )
+            elif self.is_redis_cluster:
                 keys = self.cluster.zrange(pending_key, 0, -1)
                 keycount += len(keys)
 
@@ -311,6 +499,49 @@ class RedisBuffer(Buffer):
         finally:
             client.delete(lock_key)
 
+    def _iter_pending_pages(self, pending_key, max_score):
+        """
+        Yields pages of pending keys that were scheduled up until
+        ``max_score``, as the client they were read with and the keys. The
+        caller must remove every page from the pending set before moving on
+        to the next one. Keys that are (re-)added while we are paging have a
+        higher score and are left for the next run.
+        """
+        if self.is_redis_cluster:
+            clients = [self.cluster]
+        else:
+            clients = [self.cluster.get_local_client(host) for host in self.cluster.hosts]
+
+        for conn in clients:
+            while True:
+                keys = conn.zrangebyscore(
+                    pending_key, "-inf", max_score, start=0, num=self.pending_page_size
+                )
+                if not keys:
+                    break
+                yield conn, keys
+                if len(keys) < self.pending_page_size:
+                    break
+
+    def _process_pending_paged(self, client, pending_key, lock_key, pending_buffer):
+        keycount = 0
+        for conn, keys in self._iter_pending_pages(pending_key, time()):
+            keycount += len(keys)
+            for key in keys:
+                pending_buffer.append(force_str(key))
+                if pending_buffer.full():
+                    process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
+            if not pending_buffer.empty():
+                process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
+            # Only remove the page once all of its keys are queued, so that
+            # they are picked up by the next run if queueing fails.
+            conn.zrem(pending_key, *keys)
+            # Large backlogs can take longer to page through than the lock
+            # is initially held for.
+            client.expire(lock_key, 60)
+            metrics.incr("buffer.pending-page", skip_internal=True)
+        return keycount
+
     def process(self, key=None, batch_keys=None):
         assert not (key is None and batch_keys is None)
         assert not (key is not None and batch_keys is not None)
@@ -318,6 +549,10 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.bulk_process and len(batch_keys) > 1:
+            self._process_batch_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
@@ -352,39 +587,109 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_str(k): v for k, v in values.items()}
-
             if not values:
                 metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
                 logger.debug("buffer.revoked.empty", extra={"redis_key": key})
                 return
 
-            model = import_string(force_str(values.pop("m")))
+            self._process(*self._load_incr(values))
+        finally:
+            client.delete(lock_key)
+
+    def _process_batch_incr(self, keys):
+        lock_keys = [self._make_lock_key(key) for key in keys]
+
+        # prevent a stampede due to the way we use celery etas + duplicate
+        # tasks
+        if self.is_redis_cluster:
+            pipe = self.cluster.pipeline(transaction=False)
+            for lock_key in lock_keys:
+                pipe.set(lock_key, "1", nx=True, ex=10)
+            locks = pipe.execute()
+        else:
+            with self.cluster.map() as conn:
+                promises = [conn.set(lock_key, "1", nx=True, ex=10) for lock_key in lock_keys]
+            locks = [promise.value for promise in promises]
+
+        locked_keys = []
+        for key, locked in zip(keys, locks):
+            if locked:
+                locked_keys.append(key)
+            else:
+                metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+        if not locked_keys:
+            return
 
-            if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
-                filters = self._load_values(json.loads(force_str(values.pop("f"))))
+        try:
+            if self.is_redis_cluster:
+                pipe = self.cluster.pipeline(transaction=False)
+                for key in locked_keys:
+                    pipe.hgetall(key)
+                    pipe.zrem(self._make_pending_key_from_key(key), key)
+                    pipe.delete(key)
+                results = pipe.execute()[::3]
             else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(force_bytes(values.pop("f")))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"[" if not self.is_redis_cluster else "["):
-                        extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(force_bytes(v))
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            self._process(model, incr_values, filters, extra_values, signal_only)
+                with self.cluster.map() as conn:
+                    promises = []
+                    for key in locked_keys:
+                        promises.append(conn.hgetall(key))
+                        conn.zrem(self._make_pending_key_from_key(key), key)
+                        conn.delete(key)
+                results = [promise.value for promise in promises]
+
+            updates = []
+            for key, values in zip(locked_keys, results):
+                if not values:
+                    metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+                    logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+                    continue
+                updates.append(self._load_incr(values))
+
+            self.process_batch(updates)
         finally:
-            client.delete(lock_key)
+            if self.is_redis_cluster:
+                pipe = self.cluster.pipeline(transaction=False)
+                for key in locked_keys:
+                    pipe.delete(self._make_lock_key(key))
+                pipe.execute()
+            else:
+                with self.cluster.map() as conn:
+                    for key in locked_keys:
+                        conn.delete(self._make_lock_key(key))
+
+    def _load_incr(self, values):
+        """
+        Decodes the contents of a buffer hash into the arguments of
+        ``Buffer.process``.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_str(k): v for k, v in values.items()}
+
+        model = import_string(force_str(values.pop("m")))
+
+        if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
+            filters = self._load_values(json.loads(force_str(values.pop("f"))))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(force_bytes(values.pop("f")))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(b"[" if not self.is_redis_cluster else "["):
+                    extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(force_bytes(v))
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
@@ -2001,6 +2001,10 @@ SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_NODESTORE_OPTIONS: dict[str, Any] = {}
 
+# Directory containing the trained zstd dictionaries for nodestore payloads
+# (see sentry.nodestore.dictionaries)
+SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR: str | None = None
+
 # Node storage backend used for ArtifactBundle indexing (aka FlatFileIndex aka BundleIndex)
 SENTRY_INDEXSTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_INDEXSTORE_OPTIONS: dict[str, Any] = {}
@@ -3311,6 +3315,9 @@ SENTRY_SYNTHETIC_MONITORING_PROJECT_ID = None
 # Similarity cluster to use
 # Similarity-v1: uses hardcoded set of event properties for diffing
 SENTRY_SIMILARITY_INDEX_REDIS_CLUSTER = "default"
+# Version of the MinHash signatures stored in the similarity index, see
+# `sentry.similarity.SIGNATURE_VERSIONS`. Every version has its own namespace.
+SENTRY_SIMILARITY_SIGNATURE_VERSION = 1
 
 # Unused legacy option, there to satisfy getsentry CI. Remove from getsentry, then here
 SENTRY_SIMILARITY2_INDEX_REDIS_CLUSTER = None
@@ -3614,6 +3621,7 @@ SENTRY_ORGANIZATION_ONBOARDING_TASK = "sentry.onboarding_tasks.backends.organiza
 # driver.
 SENTRY_REPLAYS_STORAGE_ALLOWLIST: list[int] = []
 SENTRY_REPLAYS_DOM_CLICK_SEARCH_ALLOWLIST: list[int] = []
+SENTRY_REPLAYS_STREAM_CUSTOM_EVENTS_ALLOWLIST: list[int] = []
 
 SENTRY_FEATURE_ADOPTION_CACHE_OPTIONS = {
     "path": "sentry.models.featureadoption.FeatureAdoptionRedisBackend",
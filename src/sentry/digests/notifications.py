@@ -6,12 +6,14 @@ import logging
 from collections import defaultdict, namedtuple
 from typing import Any, Mapping, MutableMapping, MutableSequence, Sequence
 
-from sentry import tsdb
+from sentry import eventstore, options, tsdb
 from sentry.digests import Digest, Record
 from sentry.eventstore.models import Event
+from sentry.issues.issue_occurrence import IssueOccurrence
 from sentry.models import Group, GroupStatus, Project, Rule
 from sentry.notifications.types import ActionTargetType, FallthroughChoiceType
 from sentry.tsdb.base import TSDBModel
+from sentry.utils import metrics
 from sentry.utils.dates import to_timestamp
 from sentry.utils.pipeline import Pipeline
 
@@ -19,6 +21,10 @@ logger = logging.getLogger("sentry.digests")
 
 Notification = namedtuple("Notification", "event rules")
 
+# The value of records that only refer to their event, which is loaded from nodestore when the
+# digest is built. The event id and the timestamp are the key and timestamp of the record.
+NotificationReference = namedtuple("NotificationReference", "group_id rules occurrence_id")
+
 
 def split_key(
     key: str,
@@ -61,12 +67,65 @@ def event_to_record(event: Event, rules: Sequence[Rule]) -> Record:
     if not rules:
         logger.warning(f"Creating record for {event} that does not contain any rules!")
 
-    return Record(
-        event.event_id,
-        Notification(event, [rule.id for rule in rules]),
-        to_timestamp(event.datetime),
+    rule_ids = [rule.id for rule in rules]
+    if options.get("digests.reference-records"):
+        value = NotificationReference(
+            event.group_id, rule_ids, getattr(event, "occurrence_id", None)
+        )
+    else:
+        value = Notification(event, rule_ids)
+
+    return Record(event.event_id, value, to_timestamp(event.datetime))
+
+
+def hydrate_records(project: Project, records: Sequence[Record]) -> Sequence[Record]:
+    """
+    Replaces the values of records that only refer to their event with a
+    `Notification` of the event. The events of all records are bound with one
+    nodestore fetch, and so are their issue occurrences. Records whose group
+    or event no longer exists are dropped.
+    """
+    references = [record for record in records if isinstance(record.value, NotificationReference)]
+    if not references:
+        return records
+
+    groups = Group.objects.in_bulk({record.value.group_id for record in references})
+    events = {
+        record.key: Event(project.id, record.key, group_id=record.value.group_id)
+        for record in references
+    }
+    eventstore.backend.bind_nodes(list(events.values()))
+    occurrence_ids = [
+        record.value.occurrence_id for record in references if record.value.occurrence_id
+    ]
+    occurrences = (
+        dict(zip(occurrence_ids, IssueOccurrence.fetch_multi(occurrence_ids, project.id)))
+        if occurrence_ids
+        else {}
     )
 
+    rv = []
+    for record in records:
+        if not isinstance(record.value, NotificationReference):
+            rv.append(record)
+            continue
+
+        group = groups.get(record.value.group_id)
+        event = events[record.key]
+        if group is None or not event.data:
+            logger.debug(f"{record} could not be associated with an event.")
+            metrics.incr("digests.hydrate_records.missing")
+            continue
+
+        event.project = project
+        group_event = event.for_group(group)
+        group_event.occurrence = occurrences.get(record.value.occurrence_id)
+        rv.append(
+            Record(record.key, Notification(group_event, record.value.rules), record.timestamp)
+        )
+
+    return rv
+
 
 def fetch_state(project: Project, records: Sequence[Record]) -> Mapping[str, Any]:
     # This reads a little strange, but remember that records are returned in
@@ -199,6 +258,7 @@ def build_digest(
     records: Sequence[Record],
     state: Mapping[str, Any] | None = None,
 ) -> tuple[Digest | None, Sequence[str]]:
+    records = hydrate_records(project, records)
     if not records:
         return None, []
 
@@ -12,7 +12,7 @@ from sentry.models import Group, Project, Rule
 from sentry.models.projectownership import ProjectOwnership
 from sentry.models.rulesnooze import RuleSnooze
 from sentry.notifications.types import ActionTargetType, FallthroughChoiceType
-from sentry.notifications.utils.participants import get_send_to
+from sentry.notifications.utils.participants import get_send_to_many
 from sentry.services.hybrid_cloud.actor import RpcActor
 from sentry.types.integrations import ExternalProviders
 
@@ -137,20 +137,16 @@ def get_participants_by_event(
     fallthrough_choice: FallthroughChoiceType | None = None,
 ) -> Mapping[Event, Mapping[ExternalProviders, set[RpcActor]]]:
     """
-    This is probably the slowest part in sending digests because we do a lot of
-    DB calls while we iterate over every event. It would be great if we could
-    combine some queries.
+    Resolves the participants of all events of the digest at once, so the
+    number of queries doesn't grow with the number of events.
     """
-    return {
-        event: get_send_to(
-            project=project,
-            target_type=target_type,
-            target_identifier=target_identifier,
-            event=event,
-            fallthrough_choice=fallthrough_choice,
-        )
-        for event in get_event_from_groups_in_digest(digest)
-    }
+    return get_send_to_many(
+        project=project,
+        events=list(get_event_from_groups_in_digest(digest)),
+        target_type=target_type,
+        target_identifier=target_identifier,
+        fallthrough_choice=fallthrough_choice,
+    )
 
 
 def sort_records(records: Sequence[Record]) -> Sequence[Record]:
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import re
-from typing import TypedDict
+import threading
+from typing import Any, Optional, TypedDict
+
+from cachetools import LRUCache
 
 from sentry import options
 from sentry.grouping.component import GroupingComponent
@@ -24,6 +27,7 @@ from sentry.grouping.variants import (
     FallbackVariant,
     SaltedComponentVariant,
 )
+from sentry.utils import metrics
 from sentry.utils.safe import get_path
 
 HASH_RE = re.compile(r"^[0-9a-f]{32}$")
@@ -52,6 +56,64 @@ class GroupingConfigNotFound(LookupError):
     pass
 
 
+class LocalConfigCache:
+    """
+    A bounded, per-process LRU of grouping configs in front of the shared
+    cache, keyed by the same hashes of the project options.
+
+    Since the keys are derived from the option values, a changed option
+    results in a new key in every process and the entries of the old value are
+    never looked up again. They are evicted once the cache fills up. The size
+    is set by ``store.grouping-config-local-cache.max-size``, and the cache is
+    recreated whenever that option changes.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.__cache: Optional[LRUCache[str, Any]] = None
+        self.__lock = threading.Lock()
+
+    def _get_cache(self) -> Optional[LRUCache[str, Any]]:
+        maxsize = options.get("store.grouping-config-local-cache.max-size")
+        with self.__lock:
+            if not maxsize:
+                self.__cache = None
+            elif self.__cache is None or self.__cache.maxsize != maxsize:
+                self.__cache = LRUCache(maxsize=maxsize)
+            return self.__cache
+
+    def get(self, key: str) -> Any:
+        cache = self._get_cache()
+        if cache is None:
+            return None
+        with self.__lock:
+            rv = cache.get(key)
+        metrics.incr(
+            "grouping.local_config_cache",
+            tags={"cache": self.name, "cache_hit": "false" if rv is None else "true"},
+        )
+        return rv
+
+    def set(self, key: str, value: Any) -> None:
+        cache = self._get_cache()
+        if cache is not None:
+            with self.__lock:
+                cache[key] = value
+
+    def clear(self) -> None:
+        with self.__lock:
+            if self.__cache is not None:
+                self.__cache.clear()
+
+
+# Serialized enhancements by the shared cache key of the project's rules.
+_enhancements_cache = LocalConfigCache("enhancements")
+# Loaded enhancements by the hash of their serialized form.
+_loaded_enhancements_cache = LocalConfigCache("loaded_enhancements")
+# Loaded fingerprinting rules by the shared cache key of the project's rules.
+_fingerprinting_cache = LocalConfigCache("fingerprinting")
+
+
 class GroupingConfig(TypedDict):
     id: str
     enhancements: Enhancements
@@ -82,8 +144,13 @@ class GroupingConfigLoader:
         cache_prefix = self.cache_prefix
         cache_prefix += f"{LATEST_VERSION}:"
         cache_key = cache_prefix + md5_text(f"{enhancements_base}|{enhancements}").hexdigest()
+        rv = _enhancements_cache.get(cache_key)
+        if rv is not None:
+            return rv
+
         rv = cache.get(cache_key)
         if rv is not None:
+            _enhancements_cache.set(cache_key, rv)
             return rv
 
         try:
@@ -91,6 +158,7 @@ class GroupingConfigLoader:
         except InvalidEnhancerConfig:
             rv = get_default_enhancements()
         cache.set(cache_key, rv)
+        _enhancements_cache.set(cache_key, rv)
         return rv
 
     def _get_config_id(self, project):
@@ -174,9 +242,22 @@ def load_grouping_config(config_dict=None):
     config_id = config_dict.pop("id")
     if config_id not in CONFIGURATIONS:
         raise GroupingConfigNotFound(config_id)
+    if isinstance(config_dict.get("enhancements"), str):
+        config_dict["enhancements"] = _load_enhancements(config_dict["enhancements"])
     return CONFIGURATIONS[config_id](**config_dict)
 
 
+def _load_enhancements(enhancements: str) -> Enhancements:
+    from sentry.utils.hashlib import md5_text
+
+    cache_key = md5_text(enhancements).hexdigest()
+    rv = _loaded_enhancements_cache.get(cache_key)
+    if rv is None:
+        rv = Enhancements.loads(enhancements)
+        _loaded_enhancements_cache.set(cache_key, rv)
+    return rv
+
+
 def load_default_grouping_config():
     return load_grouping_config(config_dict=None)
 
@@ -192,15 +273,22 @@ def get_fingerprinting_config_for_project(project):
     from sentry.utils.hashlib import md5_text
 
     cache_key = "fingerprinting-rules:" + md5_text(rules).hexdigest()
+    rv = _fingerprinting_cache.get(cache_key)
+    if rv is not None:
+        return rv
+
     rv = cache.get(cache_key)
     if rv is not None:
-        return FingerprintingRules.from_json(rv)
+        rv = FingerprintingRules.from_json(rv)
+        _fingerprinting_cache.set(cache_key, rv)
+        return rv
 
     try:
         rv = FingerprintingRules.from_config_string(rules)
     except InvalidFingerprintingConfig:
         rv = FingerprintingRules([])
     cache.set(cache_key, rv.to_json())
+    _fingerprinting_cache.set(cache_key, rv)
     return rv
 
 
@@ -32,6 +32,7 @@ from .matchers import (
     Match,
     create_match_frame,
 )
+from .rule_index import RuleIndex
 
 DATADOG_KEY = "save_event.stacktrace"
 logger = logging.getLogger(__name__)
@@ -136,6 +137,9 @@ class Enhancements:
             if updater_rule := rule._as_updater_rule():
                 self._updater_rules.append(updater_rule)
 
+        self._modifier_index = RuleIndex(self._modifier_rules)
+        self._updater_index = RuleIndex(self._updater_rules)
+
     def apply_modifications_to_frame(
         self,
         frames: Sequence[dict[str, Any]],
@@ -169,9 +173,12 @@ class Enhancements:
                 return
 
         with sentry_sdk.start_span(op="stacktrace_processing", description="apply_rules_to_frames"):
-            for rule in self._modifier_rules:
+            candidate_frames = self._modifier_index.get_candidate_frames(
+                match_frames, platform, exception_data, in_memory_cache
+            )
+            for rule, frame_indices in zip(self._modifier_rules, candidate_frames):
                 for idx, action in rule.get_matching_frame_actions(
-                    match_frames, platform, exception_data, in_memory_cache
+                    match_frames, platform, exception_data, in_memory_cache, frame_indices
                 ):
                     # Both frames and match_frames are updated
                     action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
@@ -186,10 +193,13 @@ class Enhancements:
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
+        candidate_frames = self._updater_index.get_candidate_frames(
+            match_frames, platform, exception_data, in_memory_cache
+        )
+        for rule, frame_indices in zip(self._updater_rules, candidate_frames):
 
             for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, in_memory_cache
+                match_frames, platform, exception_data, in_memory_cache, frame_indices
             ):
                 action.update_frame_components_contributions(components, frames, idx, rule=rule)
                 action.modify_stacktrace_state(stacktrace_state, rule)
@@ -369,11 +379,14 @@ class Rule:
         platform: str,
         exception_data: dict[str, Any],
         in_memory_cache: dict[str, str],
+        frame_indices: Sequence[int] | None = None,
     ) -> list[tuple[int, Action]]:
         """Given a frame returns all the matching actions based on this rule.
         If the rule does not match `None` is returned.
+
+        If `frame_indices` is given, only those frames are checked.
         """
-        if not self.matchers:
+        if not self.matchers or frame_indices == []:
             return []
 
         # 1 - Check if exception matchers match
@@ -384,7 +397,9 @@ class Rule:
         rv = []
 
         # 2 - Check if frame matchers match
-        for idx, _ in enumerate(match_frames):
+        if frame_indices is None:
+            frame_indices = range(len(match_frames))
+        for idx in frame_indices:
             if all(
                 m.matches_frame(match_frames, idx, platform, exception_data, in_memory_cache)
                 for m in self._other_matchers
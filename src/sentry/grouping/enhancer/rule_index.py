@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+from .matchers import FamilyMatch, FrameFieldMatch, FrameMatch, PathLikeMatch
+
+if TYPE_CHECKING:
+    from . import Rule
+
+# Frame fields whose matchers can be used to look up rules, in order of
+# preference. Rule actions only ever change `in_app` and `category`, so the
+# value of these fields is the same for every rule that is applied.
+INDEXED_FIELDS = ("function", "module", "path", "package", "family")
+
+# Bounds the number of field values whose matching rules are remembered.
+MAX_CACHED_VALUES = 10000
+
+
+def _get_index_matcher(rule: Rule) -> FrameMatch | None:
+    """
+    Returns the matcher of `rule` that the frames it can match are looked up
+    by. That is a matcher of the rule's own frame on one of the indexed
+    fields, which must match for the whole rule to match.
+    """
+    candidates = {}
+    for matcher in rule._other_matchers:
+        # Caller and callee matchers match neighbouring frames.
+        if not isinstance(matcher, (FamilyMatch, FrameFieldMatch, PathLikeMatch)):
+            continue
+        if matcher.negated or matcher.key not in INDEXED_FIELDS:
+            continue
+        if isinstance(matcher, FamilyMatch) and b"all" in matcher._flags:
+            continue
+        candidates.setdefault(matcher.key, matcher)
+
+    for field in INDEXED_FIELDS:
+        if field in candidates:
+            return candidates[field]
+    return None
+
+
+class RuleIndex:
+    """
+    Finds the frames that each of a list of rules can match.
+
+    Every rule is indexed by one of its matchers on a frame field (see
+    ``INDEXED_FIELDS``). For every value of the field, the rules whose index
+    matcher matches it are computed once and remembered, so that rules are
+    only evaluated on frames they can match instead of on every frame.
+    Rules without such a matcher are evaluated on every frame.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = rules
+        self._unindexed: List[int] = []
+        # field -> [(index matcher, positions of the rules it indexes)]
+        self._matchers: Dict[str, List[Tuple[FrameMatch, List[int]]]] = {}
+        # (field, value) -> positions of the rules whose index matcher matches
+        self._matching_rules: Dict[Tuple[str, Any], Tuple[int, ...]] = {}
+
+        matchers_by_field: Dict[str, Dict[FrameMatch, List[int]]] = {}
+        for position, rule in enumerate(rules):
+            matcher = _get_index_matcher(rule)
+            if matcher is None:
+                self._unindexed.append(position)
+            else:
+                matchers_by_field.setdefault(matcher.key, {}).setdefault(matcher, []).append(
+                    position
+                )
+
+        for field in INDEXED_FIELDS:
+            if field in matchers_by_field:
+                self._matchers[field] = list(matchers_by_field[field].items())
+
+    def _get_matching_rules(
+        self,
+        field: str,
+        match_frame: dict[str, Any],
+        platform: str,
+        exception_data: dict[str, Any],
+        cache: dict[str, str],
+    ) -> Tuple[int, ...]:
+        key = (field, match_frame[field])
+        positions = self._matching_rules.get(key)
+        if positions is None:
+            positions = tuple(
+                position
+                for matcher, rule_positions in self._matchers[field]
+                if matcher._positive_frame_match(match_frame, platform, exception_data, cache)
+                for position in rule_positions
+            )
+            if len(self._matching_rules) >= MAX_CACHED_VALUES:
+                self._matching_rules.clear()
+            self._matching_rules[key] = positions
+        return positions
+
+    def get_candidate_frames(
+        self,
+        match_frames: Sequence[dict[str, Any]],
+        platform: str,
+        exception_data: dict[str, Any],
+        cache: dict[str, str],
+    ) -> List[Sequence[int]]:
+        """
+        Returns the indices of the frames each rule may match, in the order of
+        the rules. The rules still have to be evaluated on these frames.
+        """
+        candidates: List[List[int]] = [[] for _ in self.rules]
+        for idx, match_frame in enumerate(match_frames):
+            for field in self._matchers:
+                for position in self._get_matching_rules(
+                    field, match_frame, platform, exception_data, cache
+                ):
+                    candidates[position].append(idx)
+
+        rv: List[Sequence[int]] = list(candidates)
+        all_frames = range(len(match_frames))
+        for position in self._unindexed:
+            rv[position] = all_frames
+        return rv
@@ -293,9 +293,11 @@ class StrategyConfiguration:
     initial_context: ContextDict = {}
     enhancements_base: Optional[str] = DEFAULT_GROUPING_ENHANCEMENTS_BASE
 
-    def __init__(self, enhancements: Optional[str] = None, **extra: Any):
+    def __init__(self, enhancements: Optional[Union[str, Enhancements]] = None, **extra: Any):
         if enhancements is None:
             enhancements_instance = Enhancements([])
+        elif isinstance(enhancements, Enhancements):
+            enhancements_instance = enhancements
         else:
             enhancements_instance = Enhancements.loads(enhancements)
         self.enhancements = enhancements_instance
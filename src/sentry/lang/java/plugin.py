@@ -1,8 +1,8 @@
 import sentry_sdk
-from symbolic.proguard import ProguardMapper
 from symbolic.sourcemap import SourceView
 
 from sentry.lang.java.processing import deobfuscate_exception_value
+from sentry.lang.java.proguard import open_proguard_mapper
 from sentry.lang.java.utils import (
     deobfuscate_view_hierarchy,
     get_jvm_images,
@@ -45,7 +45,7 @@ class JavaStacktraceProcessor(StacktraceProcessor):
                 error_type = EventError.PROGUARD_MISSING_MAPPING
             else:
                 with sentry_sdk.start_span(op="proguard.open"):
-                    view = ProguardMapper.open(dif_path)
+                    view = open_proguard_mapper(dif_path)
                     if not view.has_line_info:
                         error_type = EventError.PROGUARD_MISSING_LINENO
                     else:
@@ -0,0 +1,145 @@
+"""
+A per-process cache of opened ProGuard mappers.
+
+Mapping files are large, and every event and profile of an Android app
+build uses the same one. ``open_proguard_mapper`` keeps the mappers it opens
+in an LRU that is bounded by the total size of their mapping files, so that
+a mapping file is only parsed once per process rather than once per event.
+Every cached mapper also remembers the results of the lookups made through
+it, since the same frames and signatures show up in most events of an app.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Optional, Tuple
+
+from cachetools import LRUCache
+from symbolic.proguard import ProguardMapper
+
+from sentry import options
+from sentry.profiles.java import deobfuscate_signature
+from sentry.utils import metrics
+
+# The number of lookups remembered per mapper and kind of lookup.
+MAX_MEMOIZED_LOOKUPS = 50000
+
+
+class CachedProguardMapper:
+    """
+    Wraps a ``ProguardMapper`` and memoizes its lookups.
+
+    The frames returned by ``remap_frame`` are shared between callers, and
+    must not be modified.
+    """
+
+    def __init__(self, mapper: ProguardMapper, size: int) -> None:
+        self.mapper = mapper
+        self.size = size
+        self.has_line_info = mapper.has_line_info
+        self.__lock = threading.Lock()
+        self.__frames: LRUCache[Tuple[str, str, int], Tuple[Any, ...]] = LRUCache(
+            maxsize=MAX_MEMOIZED_LOOKUPS
+        )
+        self.__classes: LRUCache[str, Optional[str]] = LRUCache(maxsize=MAX_MEMOIZED_LOOKUPS)
+        self.__signatures: LRUCache[str, str] = LRUCache(maxsize=MAX_MEMOIZED_LOOKUPS)
+
+    def remap_frame(self, klass: str, method: str, line: int) -> Tuple[Any, ...]:
+        key = (klass, method, line)
+        with self.__lock:
+            rv = self.__frames.get(key)
+        if rv is None:
+            rv = tuple(self.mapper.remap_frame(klass, method, line))
+            with self.__lock:
+                self.__frames[key] = rv
+        return rv
+
+    def remap_class(self, klass: str) -> Optional[str]:
+        with self.__lock:
+            if klass in self.__classes:
+                return self.__classes[klass]
+        rv = self.mapper.remap_class(klass)
+        with self.__lock:
+            self.__classes[klass] = rv
+        return rv
+
+    def deobfuscate_signature(self, signature: str) -> str:
+        with self.__lock:
+            rv = self.__signatures.get(signature)
+        if rv is None:
+            # Class lookups of the signature go through the memoized
+            # ``remap_class``.
+            rv = deobfuscate_signature(signature, self)
+            with self.__lock:
+                self.__signatures[signature] = rv
+        return rv
+
+
+class ProguardMapperCache:
+    """
+    An LRU of opened mappers by the path and modification time of their
+    mapping file. The paths of the debug file cache are per project and
+    debug id, and a mapping file that is fetched again after it was removed
+    from the debug file cache gets a new key.
+
+    The mappers are weighed by the size of their mapping file, and the total is
+    bounded by ``proguard.mapper-cache.max-bytes``. The cache is recreated
+    whenever that option changes, and disabled when it is 0.
+    """
+
+    def __init__(self) -> None:
+        self.__cache: Optional[LRUCache[Tuple[str, int], CachedProguardMapper]] = None
+        self.__lock = threading.Lock()
+
+    def _get_cache(self) -> Optional[LRUCache[Tuple[str, int], CachedProguardMapper]]:
+        maxsize = options.get("proguard.mapper-cache.max-bytes")
+        with self.__lock:
+            if not maxsize:
+                self.__cache = None
+            elif self.__cache is None or self.__cache.maxsize != maxsize:
+                self.__cache = LRUCache(maxsize=maxsize, getsizeof=lambda mapper: mapper.size)
+            return self.__cache
+
+    def open(self, path: str) -> CachedProguardMapper:
+        stat = os.stat(path)
+        # Mappers are never weighed as 0, so the number of empty files is
+        # bounded too.
+        size = max(stat.st_size, 1)
+        key = (path, stat.st_mtime_ns)
+
+        cache = self._get_cache()
+        if cache is not None:
+            with self.__lock:
+                mapper = cache.get(key)
+            metrics.incr(
+                "proguard.mapper_cache",
+                tags={"cache_hit": "false" if mapper is None else "true"},
+            )
+            if mapper is not None:
+                return mapper
+
+        with metrics.timer("proguard.mapper_cache.open"):
+            mapper = CachedProguardMapper(ProguardMapper.open(path), size)
+
+        if cache is not None and size <= cache.maxsize:
+            with self.__lock:
+                cache[key] = mapper
+                metrics.gauge("proguard.mapper_cache.bytes", cache.currsize)
+                metrics.gauge("proguard.mapper_cache.mappers", len(cache))
+        return mapper
+
+    def clear(self) -> None:
+        with self.__lock:
+            if self.__cache is not None:
+                self.__cache.clear()
+
+
+_mapper_cache = ProguardMapperCache()
+
+
+def open_proguard_mapper(path: str) -> CachedProguardMapper:
+    """
+    Returns the mapper of the mapping file at ``path``, as returned by
+    ``ProjectDebugFile.difcache.fetch_difs``.
+    """
+    return _mapper_cache.open(path)
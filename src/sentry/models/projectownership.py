@@ -118,6 +118,17 @@ class ProjectOwnership(Model):
             The order is determined by iterating through rules sequentially, evaluating
             CODEOWNERS (if present), followed by Ownership Rules
         """
+        return cls.get_owners_many(project_id, [data])[0]
+
+    @classmethod
+    def get_owners_many(
+        cls, project_id: int, data_list: Sequence[Mapping[str, Any]]
+    ) -> Sequence[Tuple[_Everyone | Sequence[ActorTuple], Optional[Sequence[Rule]]]]:
+        """
+        The result of `get_owners` for each of many event data blobs of the same
+        project. The schemas are loaded once, and the owners of the matching
+        rules of all events are resolved together.
+        """
         from sentry.models import ProjectCodeOwners
 
         ownership = cls.get_ownership_cached(project_id)
@@ -127,27 +138,37 @@ class ProjectOwnership(Model):
         codeowners = ProjectCodeOwners.get_codeowners_cached(project_id)
         ownership.schema = cls.get_combined_schema(ownership, codeowners)
 
-        rules = cls._matching_ownership_rules(ownership, data)
+        schema_rules = load_schema(ownership.schema) if ownership.schema is not None else []
+        rules_by_data = [[rule for rule in schema_rules if rule.test(data)] for data in data_list]
 
-        if not rules:
-            project = Project.objects.get(id=project_id)
-            if features.has(
-                "organizations:issue-alert-fallback-targeting", project.organization, actor=None
-            ):
-                return [], None
-
-            return cls.Everyone if ownership.fallthrough else [], None
+        owners_to_actors = resolve_actors(
+            {o for rules in rules_by_data for rule in rules for o in rule.owners}, project_id
+        )
 
-        owners = {o for rule in rules for o in rule.owners}
-        owners_to_actors = resolve_actors(owners, project_id)
-        ordered_actors = []
-        for rule in rules:
-            for o in rule.owners:
-                if o in owners and owners_to_actors.get(o) is not None:
-                    ordered_actors.append(owners_to_actors[o])
-                    owners.remove(o)
+        fallthrough_to_everyone = None
+        result: list[Tuple[_Everyone | Sequence[ActorTuple], Optional[Sequence[Rule]]]] = []
+        for rules in rules_by_data:
+            if not rules:
+                if fallthrough_to_everyone is None:
+                    project = Project.objects.get(id=project_id)
+                    fallthrough_to_everyone = bool(ownership.fallthrough) and not features.has(
+                        "organizations:issue-alert-fallback-targeting",
+                        project.organization,
+                        actor=None,
+                    )
+                result.append((cls.Everyone if fallthrough_to_everyone else [], None))
+                continue
+
+            owners = {o for rule in rules for o in rule.owners}
+            ordered_actors = []
+            for rule in rules:
+                for o in rule.owners:
+                    if o in owners and owners_to_actors.get(o) is not None:
+                        ordered_actors.append(owners_to_actors[o])
+                        owners.remove(o)
+            result.append((ordered_actors, rules))
 
-        return ordered_actors, rules
+        return result
 
     @classmethod
     def _hydrate_rules(cls, project_id, rules, type: str = OwnerRuleType.OWNERSHIP_RULE.value):
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
-from threading import local
+import atexit
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from threading import Lock, local
+from weakref import WeakKeyDictionary
 
 import sentry_sdk
 from django.core.cache import InvalidCacheBackendError, caches
+from sentry_sdk import Hub
 
-from sentry.utils import json
+from sentry import options
+from sentry.nodestore import dictionaries
+from sentry.nodestore.lru import NodeLRUCache
+from sentry.utils import json, metrics
 from sentry.utils.cache import memoize
 from sentry.utils.services import Service
 
@@ -24,6 +34,40 @@ json_dumps = json.JSONEncoder(
 
 json_loads = json.loads
 
+# Payloads written by ``_encode_indexed`` start with this prefix, which can
+# neither start a JSON document nor a pickle. It is followed by the number of
+# sections, one index entry per section (subkey length, subkey, offset and
+# length of the JSON document relative to the end of the index) and the
+# concatenated JSON documents. The default subkey is stored as an empty subkey.
+INDEXED_PAYLOAD_MAGIC = b"\x00nsi"
+_index_count = struct.Struct("<H")
+_index_key_length = struct.Struct("<B")
+_index_location = struct.Struct("<II")
+
+# ``NodeStorage`` instances are thread-local, the in-memory LRU tier is shared
+# by all threads of a process.
+_lru_caches: WeakKeyDictionary[NodeStorage, NodeLRUCache | None] = WeakKeyDictionary()
+_lru_caches_lock = Lock()
+
+# Shared by all ``NodeStorage`` instances of a process to fetch and decode
+# chunks of ``get_multi`` concurrently, created on first use.
+_get_multi_pool: ThreadPoolExecutor | None = None
+_get_multi_pool_lock = Lock()
+
+
+def _get_get_multi_pool() -> ThreadPoolExecutor:
+    global _get_multi_pool
+
+    if _get_multi_pool is None:
+        with _get_multi_pool_lock:
+            if _get_multi_pool is None:
+                _get_multi_pool = ThreadPoolExecutor(
+                    max_workers=options.get("nodestore.get-multi.concurrency"),
+                    thread_name_prefix="nodestore-get-multi",
+                )
+                atexit.register(_get_multi_pool.shutdown, False)
+    return _get_multi_pool
+
 
 class NodeStorage(local, Service):
     """
@@ -58,6 +102,15 @@ class NodeStorage(local, Service):
 
     This is used in reprocessing to store a snapshot of the event from multiple
     stages of the pipeline.
+
+    When ``nodestore.get-multi.chunk-size`` is set, ``get_multi`` splits
+    large requests into chunks of that size which are fetched and decoded
+    concurrently, overlapping backend I/O with decompression and JSON
+    decoding.
+
+    Optionally, raw payloads are also kept in a per-process LRU tier (see
+    ``NodeLRUCache``) in front of the backend, which is enabled by setting the
+    ``nodestore.lru-cache.max-bytes`` option.
     """
 
     __all__ = (
@@ -96,32 +149,112 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
-        lines_iter = iter(value.splitlines())
+        if subkey is not None:
+            # Those keys should be statically known identifiers in the app, such as
+            # "unprocessed_event". There is really no reason to allow anything but
+            # ASCII here.
+            subkey = subkey.encode("ascii")
+
+        if value.startswith(dictionaries.DICTIONARY_PAYLOAD_MAGIC):
+            value = dictionaries.decompress(value)
+
+        if value.startswith(INDEXED_PAYLOAD_MAGIC):
+            section = self._find_indexed_section(value, subkey)
+        else:
+            section = self._find_section(value, subkey)
+
+        if section is None:
+            return None
+        return json_loads(str(section, "utf8"))
+
+    def _find_section(self, value, subkey):
+        """
+        Locates the JSON document for `subkey` in a newline-delimited payload
+        (see ``_encode``) without splitting the entire payload into lines.
+        """
+        view = memoryview(value)
+
+        def iter_lines():
+            start = 0
+            while start < len(value):
+                end = value.find(b"\n", start)
+                if end == -1:
+                    end = len(value)
+                yield view[start:end]
+                start = end + 1
+
+        lines_iter = iter_lines()
         try:
             if subkey is not None:
-                # Those keys should be statically known identifiers in the app, such as
-                # "unprocessed_event". There is really no reason to allow anything but
-                # ASCII here.
-                subkey = subkey.encode("ascii")
-
                 next(lines_iter)
 
                 for line in lines_iter:
-                    if line.strip() == subkey:
+                    if bytes(line).strip() == subkey:
                         break
 
                     next(lines_iter)
 
-            return json_loads(next(lines_iter))
+            return next(lines_iter)
         except StopIteration:
             return None
 
+    def _find_indexed_section(self, value, subkey):
+        """
+        Locates the JSON document for `subkey` in a payload written by
+        ``_encode_indexed`` by only reading its index.
+        """
+        subkey = subkey or b""
+        view = memoryview(value)
+        cursor = len(INDEXED_PAYLOAD_MAGIC)
+        (count,) = _index_count.unpack_from(view, cursor)
+        cursor += _index_count.size
+
+        location = None
+        for _ in range(count):
+            (key_length,) = _index_key_length.unpack_from(view, cursor)
+            cursor += _index_key_length.size
+            key = view[cursor : cursor + key_length]
+            cursor += key_length
+            if location is None and key == subkey:
+                location = _index_location.unpack_from(view, cursor)
+            cursor += _index_location.size
+
+        if location is None:
+            return None
+
+        offset, length = location
+        return view[cursor + offset : cursor + offset + length]
+
     def get_bytes(self, id):
         """
         >>> nodestore._get_bytes('key1')
         b'{"message": "hello world"}'
         """
-        return self._get_bytes(id)
+        return self._get_bytes_cached(id)
+
+    def _get_bytes_cached(self, id):
+        lru_cache = self.lru_cache
+        if lru_cache is None:
+            return self._get_bytes(id)
+
+        rv = lru_cache.get(id)
+        if rv is None:
+            rv = self._get_bytes(id)
+            lru_cache.set(id, rv)
+        return rv
+
+    def _get_bytes_multi_cached(self, id_list):
+        lru_cache = self.lru_cache
+        if lru_cache is None:
+            return self._get_bytes_multi(id_list)
+
+        rv = lru_cache.get_many(id_list)
+        missing = [id for id in id_list if id not in rv]
+        if missing:
+            fetched = self._get_bytes_multi(missing)
+            lru_cache.set_many(fetched)
+            rv.update(fetched)
+        return rv
 
     def _get_bytes(self, id):
         raise NotImplementedError
@@ -141,7 +274,7 @@ class NodeStorage(local, Service):
                     return item_from_cache
 
             span.set_tag("subkey", str(subkey))
-            bytes_data = self._get_bytes(id)
+            bytes_data = self._get_bytes_cached(id)
             rv = self._decode(bytes_data, subkey=subkey)
             if subkey is None:
                 # set cache item only after we know decoding did not fail
@@ -164,13 +297,18 @@ class NodeStorage(local, Service):
         """
         return {id: self._get_bytes(id) for id in id_list}
 
-    def get_multi(self, id_list, subkey=None):
+    def get_multi(self, id_list, subkey=None, timeout=None):
         """
         >>> nodestore.get_multi(['key1', 'key2')
         {
             "key1": {"message": "hello world"},
             "key2": {"message": "hello world"}
         }
+
+        When the nodes are fetched concurrently, ``timeout`` (in seconds,
+        defaulting to the ``nodestore.get-multi.timeout`` option) bounds the
+        time spent waiting for all of them, after which
+        ``concurrent.futures.TimeoutError`` is raised.
         """
         with sentry_sdk.start_span(op="nodestore.get_multi") as span:
             span.set_tag("subkey", str(subkey))
@@ -186,10 +324,12 @@ class NodeStorage(local, Service):
             else:
                 uncached_ids = id_list
 
-            items = {
-                id: self._decode(value, subkey=subkey)
-                for id, value in self._get_bytes_multi(uncached_ids).items()
-            }
+            chunk_size = options.get("nodestore.get-multi.chunk-size")
+            if chunk_size and len(uncached_ids) > chunk_size:
+                items = self._get_multi_concurrent(uncached_ids, subkey, chunk_size, timeout)
+            else:
+                items = self._get_multi_decoded(uncached_ids, subkey)
+
             if subkey is None:
                 self._set_cache_items(items)
                 items.update(cache_items)
@@ -199,6 +339,45 @@ class NodeStorage(local, Service):
 
             return items
 
+    def _get_multi_decoded(self, id_list, subkey):
+        return {
+            id: self._decode(value, subkey=subkey)
+            for id, value in self._get_bytes_multi_cached(id_list).items()
+        }
+
+    def _get_multi_chunk(self, hub, id_list, subkey):
+        # ``self`` is thread-local, so backends set up their own clients in
+        # every thread of the pool.
+        with hub, sentry_sdk.start_span(op="nodestore.get_multi.chunk") as span:
+            span.set_tag("num_ids", len(id_list))
+            return self._get_multi_decoded(id_list, subkey)
+
+    def _get_multi_concurrent(self, id_list, subkey, chunk_size, timeout=None):
+        if timeout is None:
+            timeout = options.get("nodestore.get-multi.timeout")
+
+        pool = _get_get_multi_pool()
+        hub = Hub(Hub.current)
+        futures = [
+            pool.submit(self._get_multi_chunk, hub, id_list[i : i + chunk_size], subkey)
+            for i in range(0, len(id_list), chunk_size)
+        ]
+        metrics.timing("nodestore.get_multi.chunks", len(futures))
+
+        done, not_done = wait(futures, timeout=timeout or None)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            metrics.incr("nodestore.get_multi.timeout", skip_internal=False)
+            raise FutureTimeoutError(
+                f"{len(not_done)} of {len(futures)} nodestore chunks did not complete in time"
+            )
+
+        items = {}
+        for future in futures:
+            items.update(future.result())
+        return items
+
     def _encode(self, data):
         """
         Encode data dict in a way where its keys can be deserialized
@@ -207,19 +386,64 @@ class NodeStorage(local, Service):
 
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
         b'{"stacktrace": {}}\nunprocessed\n{}'
+
+        If a zstd dictionary is configured for the platform of the event, the
+        result is compressed with it (see ``sentry.nodestore.dictionaries``),
+        unless the dictionary is missing on this host.
+        """
+        default = data.get(None)
+        platform = default.get("platform") if isinstance(default, dict) else None
+
+        if len(data) > 1 and options.get("nodestore.indexed-subkeys"):
+            value = self._encode_indexed(data)
+        else:
+            lines = [json_dumps(data.pop(None)).encode("utf8")]
+            for key, value in data.items():
+                lines.append(key.encode("ascii"))
+                lines.append(json_dumps(value).encode("utf8"))
+            value = b"\n".join(lines)
+
+        dictionary_id = dictionaries.get_dictionary_id_for_platform(platform)
+        if dictionary_id is not None:
+            try:
+                value = dictionaries.compress(value, dictionary_id)
+            except dictionaries.DictionaryNotFound:
+                # The dictionary was enabled before it was deployed to this
+                # host. Payloads are readable without it, so store them as is.
+                metrics.incr(
+                    "nodestore.zstd_dictionary.missing",
+                    tags={"dictionary_id": dictionary_id},
+                    skip_internal=True,
+                )
+        return value
+
+    def _encode_indexed(self, data):
         """
-        lines = [json_dumps(data.pop(None)).encode("utf8")]
+        Encode data dict with an index of the offsets of all subkeys in front,
+        so that a single subkey can be decoded without scanning the entire
+        payload. See ``INDEXED_PAYLOAD_MAGIC`` for the layout.
+        """
+        sections = [(b"", json_dumps(data.pop(None)).encode("utf8"))]
         for key, value in data.items():
-            lines.append(key.encode("ascii"))
-            lines.append(json_dumps(value).encode("utf8"))
+            sections.append((key.encode("ascii"), json_dumps(value).encode("utf8")))
+
+        index = [INDEXED_PAYLOAD_MAGIC, _index_count.pack(len(sections))]
+        offset = 0
+        for key, section in sections:
+            index.append(_index_key_length.pack(len(key)))
+            index.append(key)
+            index.append(_index_location.pack(offset, len(section)))
+            offset += len(section)
 
-        return b"\n".join(lines)
+        return b"".join(index + [section for _, section in sections])
 
     def set_bytes(self, id, data, ttl=None):
         """
         >>> nodestore.set_bytes('key1', b"{'foo': 'bar'}")
         """
-        return self._set_bytes(id, data, ttl)
+        rv = self._set_bytes(id, data, ttl)
+        self._set_lru_item(id, data)
+        return rv
 
     def _set_bytes(self, id, data, ttl=None):
         raise NotImplementedError
@@ -256,6 +480,7 @@ class NodeStorage(local, Service):
             self._set_bytes(id, bytes_data, ttl=ttl)
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
+            self._set_lru_item(id, bytes_data)
 
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
@@ -283,10 +508,35 @@ class NodeStorage(local, Service):
     def _delete_cache_item(self, id):
         if self.cache:
             self.cache.delete(id)
+        if self.lru_cache is not None:
+            self.lru_cache.delete(id)
 
     def _delete_cache_items(self, id_list):
         if self.cache:
             self.cache.delete_many([id for id in id_list])
+        if self.lru_cache is not None:
+            self.lru_cache.delete_many(id_list)
+
+    def _set_lru_item(self, id, data):
+        if self.lru_cache is not None:
+            self.lru_cache.set(id, data)
+
+    @property
+    def lru_cache(self) -> NodeLRUCache | None:
+        try:
+            return _lru_caches[self]
+        except KeyError:
+            pass
+
+        with _lru_caches_lock:
+            if self not in _lru_caches:
+                max_bytes = options.get("nodestore.lru-cache.max-bytes")
+                _lru_caches[self] = (
+                    NodeLRUCache(max_bytes, ttl=options.get("nodestore.lru-cache.ttl"))
+                    if max_bytes > 0
+                    else None
+                )
+            return _lru_caches[self]
 
     @memoize
     def cache(self):
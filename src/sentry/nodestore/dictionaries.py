@@ -0,0 +1,80 @@
+"""
+Trained zstd dictionaries for nodestore payloads.
+
+Event payloads are small and highly repetitive across events of the same
+platform (SDK metadata, common keys, stack frame field names), so compressing
+them individually leaves a lot on the table. Dictionaries are trained offline
+from sampled payloads with ``sentry nodestore train-dictionary`` and stored as
+``<id>.zdict`` files in ``SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR``. The id is a
+single byte that is written into the header of every payload compressed with
+that dictionary, so dictionaries must never be changed or removed once they
+have been used.
+
+Which dictionary is used to write payloads of a platform is controlled by the
+``nodestore.zstd-dictionaries`` option. A dictionary file has to be deployed
+everywhere before it is enabled there.
+"""
+from __future__ import annotations
+
+import functools
+import os
+from typing import Optional, Sequence
+
+import zstandard
+from django.conf import settings
+
+from sentry import options
+
+# Payloads compressed with a dictionary start with this prefix followed by a
+# single byte identifying the dictionary. Like ``INDEXED_PAYLOAD_MAGIC``, it
+# can neither start a JSON document nor a pickle.
+DICTIONARY_PAYLOAD_MAGIC = b"\x00nsz"
+
+COMPRESSION_LEVEL = 3
+
+MAX_DICTIONARY_ID = 255
+
+
+class DictionaryNotFound(Exception):
+    pass
+
+
+def get_dictionary_path(dictionary_id: int) -> str:
+    if not settings.SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR:
+        raise DictionaryNotFound("SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR is not configured")
+    return os.path.join(settings.SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR, f"{dictionary_id}.zdict")
+
+
+@functools.lru_cache(maxsize=None)
+def load_dictionary(dictionary_id: int) -> zstandard.ZstdCompressionDict:
+    path = get_dictionary_path(dictionary_id)
+    try:
+        with open(path, "rb") as f:
+            dictionary = zstandard.ZstdCompressionDict(f.read())
+    except FileNotFoundError:
+        raise DictionaryNotFound(f"zstd dictionary {dictionary_id} not found at {path}")
+
+    dictionary.precompute_compress(level=COMPRESSION_LEVEL)
+    return dictionary
+
+
+def get_dictionary_id_for_platform(platform: Optional[str]) -> Optional[int]:
+    if platform is None:
+        return None
+    return options.get("nodestore.zstd-dictionaries").get(platform)
+
+
+def compress(value: bytes, dictionary_id: int) -> bytes:
+    compressor = zstandard.ZstdCompressor(dict_data=load_dictionary(dictionary_id))
+    return DICTIONARY_PAYLOAD_MAGIC + bytes([dictionary_id]) + compressor.compress(value)
+
+
+def decompress(value: bytes) -> bytes:
+    header_size = len(DICTIONARY_PAYLOAD_MAGIC) + 1
+    dictionary_id = value[header_size - 1]
+    decompressor = zstandard.ZstdDecompressor(dict_data=load_dictionary(dictionary_id))
+    return decompressor.decompress(memoryview(value)[header_size:])
+
+
+def train_dictionary(samples: Sequence[bytes], size: int) -> bytes:
+    return zstandard.train_dictionary(size, list(samples), level=COMPRESSION_LEVEL).as_bytes()
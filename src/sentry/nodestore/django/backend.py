@@ -4,10 +4,12 @@ import logging
 import math
 import pickle
 
+from django.db import close_old_connections
 from django.utils import timezone
 
 from sentry.db.models import create_or_update
-from sentry.nodestore.base import NodeStorage
+from sentry.nodestore.base import INDEXED_PAYLOAD_MAGIC, NodeStorage
+from sentry.nodestore.dictionaries import DICTIONARY_PAYLOAD_MAGIC
 from sentry.utils.strings import compress, decompress
 
 from .models import Node
@@ -25,7 +27,7 @@ class DjangoNodeStorage(NodeStorage):
             return None
 
         try:
-            if value.startswith(b"{"):
+            if value.startswith((b"{", INDEXED_PAYLOAD_MAGIC, DICTIONARY_PAYLOAD_MAGIC)):
                 return NodeStorage._decode(self, value, subkey=subkey)
 
             if subkey is None:
@@ -46,6 +48,14 @@ class DjangoNodeStorage(NodeStorage):
     def _get_bytes_multi(self, id_list: list[str]) -> dict[str, bytes | None]:
         return {n.id: decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
 
+    def _get_multi_chunk(self, hub, id_list, subkey):
+        try:
+            return super()._get_multi_chunk(hub, id_list, subkey)
+        finally:
+            # Pool threads never see ``request_finished``, which is what
+            # usually cleans up connections.
+            close_old_connections()
+
     def delete_multi(self, id_list):
         Node.objects.filter(id__in=id_list).delete()
         self._delete_cache_items(id_list)
@@ -62,6 +72,8 @@ class DjangoNodeStorage(NodeStorage):
         BulkDeleteQuery(model=Node, dtfield="timestamp", days=days).execute()
         if self.cache:
             self.cache.clear()
+        if self.lru_cache is not None:
+            self.lru_cache.clear()
 
     def bootstrap(self):
         # Nothing for Django backend to do during bootstrap
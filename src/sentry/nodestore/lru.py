@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterable, Mapping, MutableMapping
+
+from cachetools import TTLCache
+
+from sentry.utils import metrics
+from sentry.utils.codecs import Codec, ZstdCodec
+
+
+class _MeteredTTLCache(TTLCache):
+    def __init__(self, name: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__name = name
+
+    def popitem(self):
+        # Only called by ``cachetools`` to make room for new items, expired
+        # items are removed through ``expire`` instead.
+        rv = super().popitem()
+        metrics.incr(f"{self.__name}.evicted", skip_internal=True)
+        return rv
+
+
+class NodeLRUCache:
+    """
+    A per-process cache of node payloads, bounded by the size of the
+    (compressed) payloads in bytes rather than by the number of entries.
+
+    Payloads are stored as they are returned by ``NodeStorage._get_bytes``,
+    compressed with ``codec``, and are only decompressed and decoded when they
+    are read. Entries expire after ``ttl`` seconds, which bounds how long other
+    processes may serve a payload after it has been deleted.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        codec: Codec[bytes, bytes] | None = None,
+        metrics_prefix: str = "nodestore.lru",
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.codec = codec if codec is not None else ZstdCodec()
+        self.metrics_prefix = metrics_prefix
+        self.__cache = _MeteredTTLCache(
+            metrics_prefix, maxsize=max_bytes, ttl=ttl, timer=timer, getsizeof=len
+        )
+        self.__lock = threading.Lock()
+
+    def get(self, id: str) -> bytes | None:
+        return self.get_many([id]).get(id)
+
+    def get_many(self, id_list: Iterable[str]) -> MutableMapping[str, bytes]:
+        found = {}
+        misses = 0
+        with self.__lock:
+            for id in id_list:
+                value = self.__cache.get(id)
+                if value is None:
+                    misses += 1
+                else:
+                    found[id] = value
+
+        metrics.incr(f"{self.metrics_prefix}.hit", amount=len(found), skip_internal=True)
+        metrics.incr(f"{self.metrics_prefix}.miss", amount=misses, skip_internal=True)
+        return {id: self.codec.decode(value) for id, value in found.items()}
+
+    def set(self, id: str, data: bytes | None) -> None:
+        self.set_many({id: data})
+
+    def set_many(self, items: Mapping[str, bytes | None]) -> None:
+        encoded = {id: self.codec.encode(data) for id, data in items.items() if data}
+        with self.__lock:
+            for id, value in encoded.items():
+                if len(value) > self.max_bytes:
+                    # Would evict everything else and still not fit.
+                    continue
+                self.__cache[id] = value
+            size = self.__cache.currsize
+
+        metrics.gauge(f"{self.metrics_prefix}.bytes", size)
+
+    def delete(self, id: str) -> None:
+        self.delete_many([id])
+
+    def delete_many(self, id_list: Iterable[str]) -> None:
+        with self.__lock:
+            for id in id_list:
+                self.__cache.pop(id, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__cache.clear()
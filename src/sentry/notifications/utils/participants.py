@@ -246,30 +246,76 @@ def get_owners(
     """
 
     if event:
-        owners, _ = ProjectOwnership.get_owners(project.id, event.data)
-    else:
-        owners = ProjectOwnership.Everyone
+        return get_owners_by_event(project, [event])[event]
 
-    if not owners:
-        outcome = "empty"
-        recipients: List[RpcActor] = list()
+    return get_project_member_actors(project), "everyone"
 
-    elif owners == ProjectOwnership.Everyone:
-        outcome = "everyone"
-        users = user_service.get_many(
-            filter=dict(user_ids=list(project.member_set.values_list("user_id", flat=True)))
-        )
-        recipients = RpcActor.many_from_object(users)
 
-    else:
-        outcome = "match"
-        resolved_owners = ActorTuple.resolve_many(owners)
-        recipients = RpcActor.many_from_object(resolved_owners)
-        # Used to suppress extra notifications to all matched owners, only notify the would-be auto-assignee
-        if not features.has("organizations:notification-all-recipients", project.organization):
-            recipients = recipients[-1:]
+def get_project_member_actors(project: Project) -> List[RpcActor]:
+    users = user_service.get_many(
+        filter=dict(user_ids=list(project.member_set.values_list("user_id", flat=True)))
+    )
+    return RpcActor.many_from_object(users)
+
+
+def get_owners_by_event(
+    project: Project, events: Sequence[Event]
+) -> Mapping[Event, Tuple[List[RpcActor], str]]:
+    """
+    The result of `get_owners` for each of the given events of a project. The
+    ownership rules are evaluated for all events at once, and the owners of all
+    events are resolved together.
+    """
+    owners_by_event = dict(
+        zip(events, ProjectOwnership.get_owners_many(project.id, [event.data for event in events]))
+    )
+
+    matched_owners = {
+        owner
+        for owners, _ in owners_by_event.values()
+        if owners != ProjectOwnership.Everyone
+        for owner in owners
+    }
+    actors_by_owner = {
+        (actor.actor_type, actor.id): actor
+        for actor in RpcActor.many_from_object(ActorTuple.resolve_many(list(matched_owners)))
+    }
+
+    everyone: List[RpcActor] | None = None
+    notify_all_recipients: bool | None = None
+    result = {}
+    for event, (owners, _) in owners_by_event.items():
+        if not owners:
+            result[event] = ([], "empty")
+
+        elif owners == ProjectOwnership.Everyone:
+            if everyone is None:
+                everyone = get_project_member_actors(project)
+            result[event] = (list(everyone), "everyone")
+
+        else:
+            resolved = [
+                actors_by_owner[key]
+                for key in (
+                    (ActorType.USER if owner.type == User else ActorType.TEAM, owner.id)
+                    for owner in owners
+                )
+                if key in actors_by_owner
+            ]
+            # In the order of `RpcActor.many_from_object`, teams before users.
+            recipients = [actor for actor in resolved if actor.actor_type == ActorType.TEAM] + [
+                actor for actor in resolved if actor.actor_type == ActorType.USER
+            ]
+            # Used to suppress extra notifications to all matched owners, only notify the would-be auto-assignee
+            if notify_all_recipients is None:
+                notify_all_recipients = features.has(
+                    "organizations:notification-all-recipients", project.organization
+                )
+            if not notify_all_recipients:
+                recipients = recipients[-1:]
+            result[event] = (recipients, "match")
 
-    return (recipients, outcome)
+    return result
 
 
 def get_owner_reason(
@@ -384,22 +430,52 @@ def determine_eligible_recipients(
             return [RpcActor.from_orm_team(team)]
 
     elif target_type == ActionTargetType.ISSUE_OWNERS:
-        suggested_assignees, outcome = get_owners(project, event, fallthrough_choice)
+        return get_issue_owner_recipients_by_event(project, [event], fallthrough_choice)[event]
+
+    return set()
+
+
+def get_issue_owner_recipients_by_event(
+    project: Project,
+    events: Sequence[Event],
+    fallthrough_choice: FallthroughChoiceType | None = None,
+) -> Mapping[Event, Iterable[RpcActor]]:
+    """
+    The recipients of each of the given events of a project when notifying
+    issue owners. Ownership, assignees and fallthrough recipients are loaded
+    once for all events.
+    """
+    owners_by_event = get_owners_by_event(project, events)
+    group_assignees = {
+        group_assignee.group_id: group_assignee
+        for group_assignee in GroupAssignee.objects.filter(
+            group_id__in={event.group_id for event in events}
+        )
+    }
+    assignee_actors: MutableMapping[int, RpcActor] = {}
+    has_streamline_targeting = features.has(
+        "organizations:streamline-targeting-context", project.organization
+    )
+    fallthrough_recipients: List[RpcActor] | None = None
+
+    result = {}
+    for event in events:
+        suggested_assignees, outcome = owners_by_event[event]
+        suggested_assignees = list(suggested_assignees)
 
         # We're adding the current assignee to the list of suggested assignees because
         # a new issue could have multiple codeowners and one of them got auto-assigned.
-        group_assignee: GroupAssignee | None = GroupAssignee.objects.filter(
-            group_id=event.group_id
-        ).first()
+        group_assignee = group_assignees.get(event.group_id)
         if group_assignee:
             outcome = "match"
-            assignee_actor = RpcActor.from_orm_actor(
-                group_assignee.assigned_actor().resolve_to_actor()
-            )
-            suggested_assignees.append(assignee_actor)
+            if event.group_id not in assignee_actors:
+                assignee_actors[event.group_id] = RpcActor.from_orm_actor(
+                    group_assignee.assigned_actor().resolve_to_actor()
+                )
+            suggested_assignees.append(assignee_actors[event.group_id])
 
         suspect_commit_users = None
-        if features.has("organizations:streamline-targeting-context", project.organization):
+        if has_streamline_targeting:
             try:
                 suspect_commit_users = RpcActor.many_from_object(
                     get_suspect_commit_users(project, event)
@@ -421,11 +497,15 @@ def determine_eligible_recipients(
         )
 
         if suggested_assignees:
-            return dedupe_suggested_assignees(suggested_assignees)
+            result[event] = dedupe_suggested_assignees(suggested_assignees)
+        else:
+            if fallthrough_recipients is None:
+                fallthrough_recipients = RpcActor.many_from_object(
+                    get_fallthrough_recipients(project, fallthrough_choice)
+                )
+            result[event] = list(fallthrough_recipients)
 
-        return RpcActor.many_from_object(get_fallthrough_recipients(project, fallthrough_choice))
-
-    return set()
+    return result
 
 
 def get_send_to(
@@ -457,6 +537,33 @@ def get_send_to(
     return get_recipients_by_provider(project, recipients, notification_type)
 
 
+def get_send_to_many(
+    project: Project,
+    events: Sequence[Event],
+    target_type: ActionTargetType,
+    target_identifier: int | None = None,
+    notification_type: NotificationSettingTypes = NotificationSettingTypes.ISSUE_ALERTS,
+    fallthrough_choice: FallthroughChoiceType | None = None,
+) -> Mapping[Event, Mapping[ExternalProviders, set[RpcActor]]]:
+    """
+    The result of `get_send_to` for each of the given events of a project, with
+    the queries for ownership, assignees and notification settings made once
+    for all events rather than once per event.
+    """
+    if target_type == ActionTargetType.ISSUE_OWNERS and project and project.teams.exists():
+        recipients_by_event = get_issue_owner_recipients_by_event(
+            project, events, fallthrough_choice
+        )
+    else:
+        # The recipients don't depend on the event.
+        recipients = determine_eligible_recipients(
+            project, target_type, target_identifier, None, fallthrough_choice
+        )
+        recipients_by_event = {event: recipients for event in events}
+
+    return get_recipients_by_provider_by_event(project, recipients_by_event, notification_type)
+
+
 def get_fallthrough_recipients(
     project: Project, fallthrough_choice: FallthroughChoiceType | None
 ) -> Iterable[RpcUser]:
@@ -602,3 +709,79 @@ def get_recipients_by_provider(
     )
 
     return combine_recipients_by_provider(teams_by_provider, users_by_provider)
+
+
+def get_recipients_by_provider_by_event(
+    project: Project,
+    recipients_by_event: Mapping[Event, Iterable[RpcActor]],
+    notification_type: NotificationSettingTypes = NotificationSettingTypes.ISSUE_ALERTS,
+) -> Mapping[Event, Mapping[ExternalProviders, set[RpcActor]]]:
+    """
+    The result of `get_recipients_by_provider` for the recipients of each
+    event. Whether a recipient accepts notifications does not depend on the
+    other recipients, so the notification settings of the recipients of all
+    events are loaded at once.
+    """
+    recipients_by_event = {
+        event: partition_recipients(recipients) for event, recipients in recipients_by_event.items()
+    }
+    teams: set[RpcActor] = set()
+    users: set[RpcActor] = set()
+    for recipients_by_type in recipients_by_event.values():
+        teams |= recipients_by_type[ActorType.TEAM]
+        users |= recipients_by_type[ActorType.USER]
+
+    # Teams cannot receive emails so omit EMAIL settings.
+    providers_by_team: MutableMapping[RpcActor, set[ExternalProviders]] = defaultdict(set)
+    for provider, accepting_teams in NotificationSetting.objects.filter_to_accepting_recipients(
+        project, teams, notification_type
+    ).items():
+        if provider != ExternalProviders.EMAIL:
+            for team in accepting_teams:
+                providers_by_team[team].add(provider)
+
+    # Teams that don't accept notifications fall back to their members.
+    member_ids_by_team = {
+        team: {
+            member.user_id
+            for member in organization_service.get_team_members(team_id=team.id)
+            if member.user_id is not None
+        }
+        for team in teams
+        if team not in providers_by_team
+    }
+    member_ids = set().union(*member_ids_by_team.values())
+    members_by_id = {
+        actor.id: actor
+        for actor in RpcActor.many_from_object(
+            user_service.get_many(filter={"user_ids": list(member_ids)}) if member_ids else []
+        )
+    }
+
+    providers_by_user: MutableMapping[RpcActor, set[ExternalProviders]] = defaultdict(set)
+    for provider, accepting_users in NotificationSetting.objects.filter_to_accepting_recipients(
+        project, users | set(members_by_id.values()), notification_type
+    ).items():
+        for user in accepting_users:
+            providers_by_user[user].add(provider)
+
+    result = {}
+    for event, recipients_by_type in recipients_by_event.items():
+        event_users = set(recipients_by_type[ActorType.USER])
+        recipients_by_provider: MutableMapping[ExternalProviders, set[RpcActor]] = defaultdict(set)
+        for team in recipients_by_type[ActorType.TEAM]:
+            if team in providers_by_team:
+                for provider in providers_by_team[team]:
+                    recipients_by_provider[provider].add(team)
+            else:
+                event_users.update(
+                    members_by_id[user_id]
+                    for user_id in member_ids_by_team[team]
+                    if user_id in members_by_id
+                )
+        for user in event_users:
+            for provider in providers_by_user.get(user, ()):
+                recipients_by_provider[provider].add(user)
+        result[event] = recipients_by_provider
+
+    return result
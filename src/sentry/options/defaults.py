@@ -368,6 +368,14 @@ register(
     default=0,
     flags=FLAG_ALLOW_EMPTY | FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
 )
+# The sample rate at which dom-click-search only decodes the custom events of a segment, rather
+# than the whole segment.
+register(
+    "replay.ingest.stream-custom-events",
+    type=Int,
+    default=0,
+    flags=FLAG_ALLOW_EMPTY | FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
 
 # Analytics
 register("analytics.backend", default="noop", flags=FLAG_NOSTORE)
@@ -488,6 +496,12 @@ register("snuba.search.max-chunk-size", default=2000, flags=FLAG_AUTOMATOR_MODIF
 register("snuba.search.max-total-chunk-time-seconds", default=30.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("snuba.search.hits-sample-size", default=100, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("snuba.track-outcomes-sample-rate", default=0.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Only run one query per cache key at a time when the Snuba query cache is
+# used, other processes wait for its result to be cached.
+register("snuba.query-cache.single-flight", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Number of seconds a cached Snuba query result is served after it expired
+# while it is refreshed in the background. 0 disables it.
+register("snuba.query-cache.stale-while-revalidate", default=0, flags=FLAG_AUTOMATOR_MODIFIABLE)
 
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
 register(
@@ -630,6 +644,28 @@ register(
     "nodedata.cache-on-save", default=False, flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE
 )
 
+# Size in bytes of the per-process nodestore LRU tier (0 disables it), and the
+# number of seconds after which cached payloads expire. Both are read once per
+# process.
+register("nodestore.lru-cache.max-bytes", default=0, flags=FLAG_PRIORITIZE_DISK)
+register("nodestore.lru-cache.ttl", default=60, flags=FLAG_PRIORITIZE_DISK)
+
+# Write payloads with subkeys in the indexed layout, which lets a single subkey
+# be decoded without reading the others. Every reader supports both layouts.
+register("nodestore.indexed-subkeys", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
+# Split `get_multi` calls for more than this many nodes into chunks that are
+# fetched and decoded concurrently (0 disables this), using a per-process pool
+# of `concurrency` threads. `timeout` is the default deadline in seconds for
+# the entire call.
+register("nodestore.get-multi.chunk-size", default=0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+register("nodestore.get-multi.concurrency", default=4, flags=FLAG_PRIORITIZE_DISK)
+register("nodestore.get-multi.timeout", default=10.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
+# Mapping of platform to the id of the zstd dictionary new payloads of that
+# platform are compressed with (see sentry.nodestore.dictionaries)
+register("nodestore.zstd-dictionaries", default={}, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
 # Use nodestore for eventstore.get_events
 register(
     "eventstore.use-nodestore",
@@ -768,6 +804,22 @@ register("store.background-grouping-sample-rate", default=0.0, flags=FLAG_AUTOMA
 # True if background grouping should run before secondary and primary grouping
 register("store.background-grouping-before", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
 
+# Maximum number of entries in each of the per-process caches of grouping enhancements and
+# fingerprinting rules, 0 disables them.
+register("store.grouping-config-local-cache.max-size", default=500, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
+# Store digest records as references to their event, which are loaded from nodestore when the
+# digest is delivered, instead of pickling the whole event.
+register("digests.reference-records", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
+# Total size of the mapping files of the ProGuard mappers each process keeps open, 0 disables
+# the cache.
+register(
+    "proguard.mapper-cache.max-bytes",
+    default=512 * 1024 * 1024,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+
 # Store release files bundled as zip files
 register(
     "processing.save-release-archives", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE
@@ -951,6 +1003,16 @@ register(
     "sentry-metrics.indexer.cache-key-double-write", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE
 )
 
+# Maximum number of entries in the per-process cache in front of the string
+# indexer's cache, 0 disables it.
+register("sentry-metrics.indexer.local-cache.max-size", default=0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Use case IDs that bypass the per-process string indexer cache
+register(
+    "sentry-metrics.indexer.local-cache.disabled-use-cases",
+    default=[],
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+
 # Global and per-organization limits on the writes to the string indexer's DB.
 #
 # Format is a list of dictionaries of format {
@@ -8,10 +8,10 @@ from typing import Any, List, Mapping, MutableMapping, Optional, Tuple
 import msgpack
 import sentry_sdk
 from django.conf import settings
-from symbolic.proguard import ProguardMapper
 
 from sentry import quotas
 from sentry.constants import DataCategory
+from sentry.lang.java.proguard import open_proguard_mapper
 from sentry.lang.javascript.processing import _handles_frame as is_valid_javascript_frame
 from sentry.lang.javascript.processing import generate_scraping_config
 from sentry.lang.native.symbolicator import Symbolicator, SymbolicatorTaskKind
@@ -620,7 +620,7 @@ def _deobfuscate(profile: Profile, project: Project) -> None:
             return
 
     with sentry_sdk.start_span(op="proguard.open"):
-        mapper = ProguardMapper.open(debug_file_path)
+        mapper = open_proguard_mapper(debug_file_path)
         if not mapper.has_line_info:
             return
 
@@ -633,7 +633,7 @@ def _deobfuscate(profile: Profile, project: Project) -> None:
             )
 
             if method.get("signature"):
-                method["signature"] = deobfuscate_signature(method["signature"], mapper)
+                method["signature"] = mapper.deobfuscate_signature(method["signature"])
 
             if len(mapped) >= 1:
                 new_frame = mapped[-1]
@@ -1,4 +1,7 @@
-from typing import Any, Optional, Sequence, Tuple
+import threading
+from collections import defaultdict
+from time import time
+from typing import Any, Dict, List, MutableMapping, Optional, Sequence, Tuple
 
 from sentry_redis_tools.clients import RedisCluster, StrictRedis
 from sentry_redis_tools.sliding_windows_rate_limiter import GrantedQuota, Quota
@@ -8,7 +11,7 @@ from sentry_redis_tools.sliding_windows_rate_limiter import (
 from sentry_redis_tools.sliding_windows_rate_limiter import RequestedQuota, Timestamp
 
 from sentry.exceptions import InvalidConfiguration
-from sentry.utils import redis
+from sentry.utils import metrics, redis
 from sentry.utils.services import Service
 
 __all__ = ["Quota", "GrantedQuota", "RequestedQuota", "Timestamp"]
@@ -116,13 +119,58 @@ class SlidingWindowRateLimiter(Service):
         return grants
 
 
+class _Lease:
+    """
+    Quota that has been used up in Redis by this process, but not yet been
+    granted to any request.
+    """
+
+    def __init__(self, expires_at: int) -> None:
+        self.balance = 0
+        self.expires_at = expires_at
+        self.reached_quotas: Sequence[Quota] = []
+
+
+_LeaseKey = Tuple[str, Tuple[Quota, ...]]
+
+
+def _get_lease_key(request: RequestedQuota) -> _LeaseKey:
+    return request.prefix, tuple(request.quotas)
+
+
 class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
-    def __init__(self, **options: Any) -> None:
+    """
+    When ``lease_fraction`` is set, quota is leased: whenever a request does
+    not fit into what this process has leased for its prefix and quotas, the
+    process uses up at least ``lease_fraction`` of the smallest limit of the
+    request's quotas in Redis in one go. Subsequent requests are then granted
+    from the lease in memory, without talking to Redis, until it runs out or
+    expires.
+
+    A lease expires after ``lease_ttl`` seconds at most, and always before the
+    quota it has used up leaves any of the sliding windows. Quota that is
+    still leased when it expires is lost, so the rate limiter admits less
+    than the limits when many processes hold leases for the same prefix.
+
+    Leasing does not make checking quota atomic: processes that lease the
+    same quota at the same time can each be granted what remained of it.
+    Every process can exceed a limit by at most the size of a lease this way,
+    so ``lease_fraction`` bounds the over-admission.
+    """
+
+    def __init__(self, lease_fraction: float = 0.0, lease_ttl: int = 10, **options: Any) -> None:
         cluster_key = options.get("cluster", "default")
         client = redis.redis_clusters.get(cluster_key)
         assert isinstance(client, (StrictRedis, RedisCluster)), client
         self.client = client
         self.impl = RedisSlidingWindowRateLimiterImpl(self.client)
+        self.lease_fraction = lease_fraction
+        self.lease_ttl = lease_ttl
+        assert 0 <= self.lease_fraction <= 1
+        assert self.lease_ttl > 0
+        self.__leases: Dict[_LeaseKey, _Lease] = {}
+        self.__leases_lock = threading.Lock()
+        self.__leases_purged_at = 0
         super().__init__(**options)
 
     def validate(self) -> None:
@@ -135,7 +183,57 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
     def check_within_quotas(
         self, requests: Sequence[RequestedQuota], timestamp: Optional[Timestamp] = None
     ) -> Tuple[Timestamp, Sequence[GrantedQuota]]:
-        return self.impl.check_within_quotas(requests, timestamp)
+        if not self.lease_fraction:
+            return self.impl.check_within_quotas(requests, timestamp)
+
+        timestamp = int(time()) if timestamp is None else int(timestamp)
+
+        requested: MutableMapping[_LeaseKey, int] = defaultdict(int)
+        for request in requests:
+            requested[_get_lease_key(request)] += request.requested
+
+        lease_requests = []
+        with self.__leases_lock:
+            self._purge_leases(timestamp)
+            for request in requests:
+                key = _get_lease_key(request)
+                if key not in requested:
+                    continue
+                lease = self._get_lease(key, timestamp)
+                balance = lease.balance if lease is not None else 0
+                if requested[key] > balance:
+                    size = int(min(quota.limit for quota in request.quotas) * self.lease_fraction)
+                    lease_requests.append(
+                        RequestedQuota(
+                            prefix=request.prefix,
+                            requested=max(size, requested[key] - balance, 1),
+                            quotas=request.quotas,
+                        )
+                    )
+                del requested[key]
+
+        if lease_requests:
+            self._acquire_leases(lease_requests, timestamp)
+
+        grants = []
+        pending: MutableMapping[_LeaseKey, int] = defaultdict(int)
+        with self.__leases_lock:
+            for request in requests:
+                key = _get_lease_key(request)
+                lease = self._get_lease(key, timestamp)
+                available = lease.balance - pending[key] if lease is not None else 0
+                granted = max(0, min(request.requested, available))
+                pending[key] += granted
+                reached_quotas: Sequence[Quota] = []
+                if granted < request.requested and lease is not None:
+                    reached_quotas = lease.reached_quotas
+                grants.append(
+                    GrantedQuota(
+                        prefix=request.prefix, granted=granted, reached_quotas=reached_quotas
+                    )
+                )
+
+        return timestamp, grants
 
     def use_quotas(
         self,
@@ -143,4 +241,55 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
         grants: Sequence[GrantedQuota],
         timestamp: Timestamp,
     ) -> None:
-        return self.impl.use_quotas(requests, grants, timestamp)
+        if not self.lease_fraction:
+            return self.impl.use_quotas(requests, grants, timestamp)
+
+        with self.__leases_lock:
+            for request, grant in zip(requests, grants):
+                lease = self._get_lease(_get_lease_key(request), timestamp)
+                if lease is not None:
+                    lease.balance -= grant.granted
+
+    def _get_lease(self, key: _LeaseKey, timestamp: Timestamp) -> Optional[_Lease]:
+        # Must be called while holding ``__leases_lock``.
+        lease = self.__leases.get(key)
+        if lease is not None and timestamp >= lease.expires_at:
+            del self.__leases[key]
+            return None
+        return lease
+
+    def _purge_leases(self, timestamp: Timestamp) -> None:
+        # Must be called while holding ``__leases_lock``.
+        if timestamp < self.__leases_purged_at + self.lease_ttl:
+            return
+        self.__leases = {
+            key: lease for key, lease in self.__leases.items() if timestamp < lease.expires_at
+        }
+        self.__leases_purged_at = timestamp
+
+    def _acquire_leases(self, requests: List[RequestedQuota], timestamp: Timestamp) -> None:
+        timestamp, grants = self.impl.check_within_quotas(requests, timestamp)
+        self.impl.use_quotas(requests, grants, timestamp)
+        metrics.incr("ratelimits.sliding_windows.lease", amount=len(requests))
+
+        with self.__leases_lock:
+            for request, grant in zip(requests, grants):
+                # The quota used up now is counted by every sliding window until
+                # the window has moved past the granule it was added to.
+                expires_at = min(
+                    [timestamp + self.lease_ttl]
+                    + [
+                        timestamp // quota.granularity_seconds * quota.granularity_seconds
+                        + quota.window_seconds
+                        for quota in request.quotas
+                    ]
+                )
+                key = _get_lease_key(request)
+                lease = self._get_lease(key, timestamp)
+                if lease is None:
+                    lease = self.__leases[key] = _Lease(expires_at)
+                else:
+                    # Quota that was leased before must not outlive its lease.
+                    lease.expires_at = min(lease.expires_at, expires_at)
+                lease.balance += grant.granted
+                lease.reached_quotas = grant.reached_quotas
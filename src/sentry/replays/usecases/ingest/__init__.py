@@ -17,6 +17,7 @@ from sentry.models.project import Project
 from sentry.replays.feature import has_feature_access
 from sentry.replays.lib.storage import RecordingSegmentStorageMeta, make_storage_driver
 from sentry.replays.usecases.ingest.dom_index import parse_and_emit_replay_actions
+from sentry.replays.usecases.ingest.event_stream import parse_custom_events
 from sentry.signals import first_replay_received
 from sentry.utils import json, metrics
 from sentry.utils.outcomes import Outcome, track_outcome
@@ -184,9 +185,19 @@ def replay_click_post_processor(
 
     try:
         with metrics.timer("replays.usecases.ingest.decompress_and_parse"):
-            decompressed_segment = decompress(segment_bytes)
-            parsed_segment_data = json.loads(decompressed_segment, use_rapid_json=True)
-            _report_size_metrics(len(segment_bytes), len(decompressed_segment))
+            if has_feature_access(
+                message.org_id,
+                options.get("replay.ingest.stream-custom-events"),
+                settings.SENTRY_REPLAYS_STREAM_CUSTOM_EVENTS_ALLOWLIST,
+            ):
+                # Only the custom events are searched for clicks. Decode just those, without
+                # holding the decompressed segment in memory.
+                parsed_segment_data, decompressed_size = parse_custom_events(segment_bytes)
+            else:
+                decompressed_segment = decompress(segment_bytes)
+                parsed_segment_data = json.loads(decompressed_segment, use_rapid_json=True)
+                decompressed_size = len(decompressed_segment)
+            _report_size_metrics(len(segment_bytes), decompressed_size)
 
         # Emit DOM search metadata to Clickhouse.
         with transaction.start_child(
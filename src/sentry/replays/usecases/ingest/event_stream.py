@@ -0,0 +1,261 @@
+"""
+Streaming extraction of custom events from recording segments.
+
+A recording segment is a (usually zlib compressed) JSON array of RRWeb events. Most of
+its bytes are full snapshots and incremental snapshots of the DOM, while the ingest
+post-processing only looks at custom events (``"type": 5``), which carry the SDK's
+breadcrumbs, performance spans and options. ``parse_custom_events`` decompresses the
+segment in bounded chunks and finds the boundaries of the events in the array, so that
+only custom events are decoded. The bytes of all other events are dropped as soon as they
+are scanned.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sentry.utils import json
+
+# The size of the chunks the segment is decompressed in.
+CHUNK_SIZE = 64 * 1024
+
+CUSTOM_EVENT_TYPE = 5
+
+OPEN_BRACE = ord("{")
+OPEN_BRACKET = ord("[")
+QUOTE = ord('"')
+
+# The contents of a string after its opening quote, up to an escape that may be incomplete.
+_STRING_PART = rb'[^"\\]*(?:\\.[^"\\]*)*'
+# Anything but brackets and strings, and complete strings, which may contain brackets.
+_NON_BRACKETS = rb'[^"\[\]{}]*(?:"' + _STRING_PART + rb'"[^"\[\]{}]*)*'
+_NUMBER = rb"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?"
+
+# The next bracket. Does not match if the bytes up to it are not complete.
+BRACKET_RE = re.compile(_NON_BRACKETS + rb"[\[\]{}]", re.DOTALL)
+
+# The bytes before the next bracket or the next string that is not complete. Skipping them
+# when there is no next bracket means that a long string is only scanned once.
+NON_BRACKETS_RE = re.compile(_NON_BRACKETS, re.DOTALL)
+NON_TOKENS_RE = re.compile(rb'[^"\[\]{}]*')
+
+# The rest of a string up to its closing quote, after the bytes of it that were scanned.
+STRING_PART_RE = re.compile(_STRING_PART, re.DOTALL)
+
+# The start of an event whose first key is its type.
+TYPE_PREFIX_RE = re.compile(rb'\{\s*"type"\s*:\s*(' + _NUMBER + rb")\s*[,}]")
+
+# The next bracket, type key or string, for events that do not start with their type.
+TOKEN_RE = re.compile(
+    rb'[^"\[\]{}]*(?:(?P<open>[\[{])|(?P<close>[\]}])'
+    rb'|(?P<key>"type"\s*:\s*(?P<type>' + _NUMBER + rb")(?=\s*[,}]))"
+    rb'|(?P<string>"' + _STRING_PART + rb'"))',
+    re.DOTALL,
+)
+
+TYPE_KEY = b'"type"'
+
+# What may follow a type key whose value is not complete yet.
+TYPE_KEY_REST_RE = re.compile(rb"\s*(?::\s*[-+.eE\d]*\s*)?")
+
+# Bytes to wait for after a type key before giving up on its value.
+MAX_TYPE_VALUE_SIZE = 64
+
+
+class MalformedSegment(ValueError):
+    pass
+
+
+def iter_chunks(segment: bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the decompressed segment in chunks of at most ``chunk_size`` bytes."""
+    if segment.startswith(b"["):
+        view = memoryview(segment)
+        for offset in range(0, len(segment), chunk_size):
+            yield bytes(view[offset : offset + chunk_size])
+        return
+
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 32)
+    data = segment
+    while data:
+        chunk = decompressor.decompress(data, chunk_size)
+        if chunk:
+            yield chunk
+        data = decompressor.unconsumed_tail
+
+    chunk = decompressor.flush()
+    if chunk:
+        yield chunk
+    if not decompressor.eof:
+        raise MalformedSegment("Recording segment is truncated.")
+
+
+def parse_custom_events(
+    segment: bytes, chunk_size: int = CHUNK_SIZE
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Return the custom events of a, possibly compressed, recording segment, and the size of
+    the decompressed segment.
+
+    ``MalformedSegment`` is raised if the segment is not an array or is incomplete. Only the
+    nesting of the array is checked, the contents of the skipped events are not validated.
+
+    Besides the custom events, at most a chunk is held in memory at a time.
+    """
+    scanner = EventScanner()
+    events = []
+    for chunk in iter_chunks(segment, chunk_size):
+        events.extend(json.loads(event, use_rapid_json=True) for event in scanner.feed(chunk))
+    events.extend(json.loads(event, use_rapid_json=True) for event in scanner.close())
+    return events, scanner.size
+
+
+class EventScanner:
+    """Finds the custom events in the chunks of a JSON array of RRWeb events."""
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        # The offset of the next token in the buffer, or of the rest of the string that the
+        # previous chunk ended in.
+        self.pos = 0
+        self.in_string = False
+        self.depth = 0
+        self.started = False
+        self.finished = False
+        # The offset of the current event in the buffer, while its bytes are kept.
+        self.event_start: Optional[int] = None
+        self.event_type: Optional[float] = None
+        # The number of decompressed bytes that were fed.
+        self.size = 0
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Scan the next chunk, and return the custom events that were completed by it."""
+        # Drop the bytes that were scanned and are not needed anymore.
+        keep_from = self.pos if self.event_start is None else self.event_start
+        del self.buffer[:keep_from]
+        self.pos -= keep_from
+        if self.event_start is not None:
+            self.event_start -= keep_from
+        self.buffer += chunk
+        self.size += len(chunk)
+
+        if not self.started:
+            stripped = self.buffer.lstrip()
+            if not stripped:
+                return []
+            if not stripped.startswith(b"["):
+                raise MalformedSegment("Recording segment is not an array.")
+            self.started = True
+
+        return self._scan(final=False)
+
+    def close(self) -> List[bytes]:
+        """Check that the array is complete, and return the custom events that were completed
+        by its end."""
+        events = self._scan(final=True)
+        if not self.finished:
+            raise MalformedSegment("Recording segment is incomplete.")
+        return events
+
+    def _scan(self, final: bool) -> List[bytes]:
+        buffer = self.buffer
+        if self.finished:
+            if buffer[self.pos :].strip():
+                raise MalformedSegment("Recording segment has trailing data.")
+            return []
+
+        pos = self.pos
+        in_string = self.in_string
+        depth = self.depth
+        event_start = self.event_start
+        event_type = self.event_type
+        events = []
+        match_bracket = BRACKET_RE.match
+        match_token = TOKEN_RE.match
+
+        while True:
+            if in_string:
+                # Continue the string the previous chunk ended in, from where its scan stopped.
+                pos = STRING_PART_RE.match(buffer, pos).end()
+                if pos == len(buffer) or buffer[pos] != QUOTE:
+                    # Only an escape at the end of the buffer needs to be scanned again.
+                    break
+                in_string = False
+                pos += 1
+            elif event_start is None or event_type is not None:
+                # Only the nesting matters until the next event starts, or the end of a custom
+                # event is found.
+                match = match_bracket(buffer, pos)
+                if match is None:
+                    pos = NON_BRACKETS_RE.match(buffer, pos).end()
+                    if pos == len(buffer):
+                        break
+                    in_string = True
+                    pos += 1
+                    continue
+                bracket = buffer[match.end() - 1]
+                if bracket == OPEN_BRACE or bracket == OPEN_BRACKET:
+                    depth += 1
+                    if depth == 2:
+                        event_start = match.end() - 1
+                        event_type = None
+                        # RRWeb events start with their type, which usually saves looking for
+                        # it among the other keys.
+                        prefix = TYPE_PREFIX_RE.match(buffer, event_start)
+                        if prefix is not None:
+                            event_type = float(prefix.group(1))
+                            if event_type != CUSTOM_EVENT_TYPE:
+                                event_start = None
+                else:
+                    depth -= 1
+                    if depth == 1:
+                        if event_start is not None:
+                            events.append(bytes(buffer[event_start : match.end()]))
+                        event_start = None
+                    elif depth == 0:
+                        self.finished = True
+                        pos = match.end()
+                        break
+                pos = match.end()
+            else:
+                # Look for the type among the keys of the event.
+                match = match_token(buffer, pos)
+                if match is None:
+                    pos = NON_TOKENS_RE.match(buffer, pos).end()
+                    if pos == len(buffer) or (
+                        depth == 2 and not final and len(buffer) - pos < MAX_TYPE_VALUE_SIZE
+                    ):
+                        # The string may be a type key.
+                        break
+                    in_string = True
+                    pos += 1
+                    continue
+                kind = match.lastgroup
+                if kind == "open":
+                    depth += 1
+                elif kind == "close":
+                    depth -= 1
+                    if depth == 1:
+                        # The event has no type.
+                        event_start = None
+                elif kind == "key":
+                    if depth == 2:
+                        event_type = float(match.group("type"))
+                        if event_type != CUSTOM_EVENT_TYPE:
+                            event_start = None
+                elif (
+                    depth == 2
+                    and not final
+                    and match.group("string") == TYPE_KEY
+                    and len(buffer) - match.end() < MAX_TYPE_VALUE_SIZE
+                    and TYPE_KEY_REST_RE.fullmatch(buffer, match.end())
+                ):
+                    # Wait for the value of the type.
+                    break
+                pos = match.end()
+
+        self.pos = pos
+        self.in_string = in_string
+        self.depth = depth
+        self.event_start = event_start
+        self.event_type = event_type
+        return events
@@ -3,7 +3,7 @@ from __future__ import annotations
 import abc
 import logging
 from collections import namedtuple
-from typing import Any, Callable, ClassVar, Dict, Mapping, Sequence, Type
+from typing import Any, Callable, ClassVar, Dict, Mapping, MutableMapping, Sequence, Type
 
 from django import forms
 
@@ -115,8 +115,12 @@ class EventState:
         is_regression: bool,
         is_new_group_environment: bool,
         has_reappeared: bool,
+        frequency_query_cache: MutableMapping[Any, int] | None = None,
     ) -> None:
         self.is_new = is_new
         self.is_regression = is_regression
         self.is_new_group_environment = is_new_group_environment
         self.has_reappeared = has_reappeared
+        # Results of frequency queries, shared by all rules that are evaluated
+        # for the same event.
+        self.frequency_query_cache = frequency_query_cache
@@ -5,7 +5,7 @@ import contextlib
 import logging
 import re
 from datetime import datetime, timedelta
-from typing import Any, Dict, Mapping, Tuple
+from typing import Any, Dict, Hashable, Mapping, MutableMapping, Tuple
 
 from django import forms
 from django.core.cache import cache
@@ -126,7 +126,12 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
             return False
 
         # TODO(mgaeta): Bug: Rule is optional.
-        current_value = self.get_rate(event, interval, self.rule.environment_id)  # type: ignore
+        current_value = self.get_rate(
+            event,
+            interval,
+            self.rule.environment_id,  # type: ignore
+            query_cache=state.frequency_query_cache,
+        )
         logging.info(f"event_frequency_rule current: {current_value}, threshold: {value}")
         return current_value > value
 
@@ -179,7 +184,45 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
         """ """
         raise NotImplementedError  # subclass must implement
 
-    def get_rate(self, event: GroupEvent, interval: str, environment_id: str) -> int:
+    def query_cached(
+        self,
+        query_cache: MutableMapping[Any, int] | None,
+        key: Hashable,
+        event: GroupEvent,
+        start: datetime,
+        end: datetime,
+        environment_id: str,
+    ) -> int:
+        """
+        Like ``query``, but returns the result of an earlier query with the
+        same ``key`` from ``query_cache`` if there is one.
+        """
+        if query_cache is None:
+            return self.query(event, start, end, environment_id=environment_id)
+
+        key = (self.id, event.group_id, environment_id, key)
+        try:
+            result = query_cache[key]
+        except KeyError:
+            result = query_cache[key] = self.query(event, start, end, environment_id=environment_id)
+        else:
+            metrics.incr("rules.conditions.query_deduplicated", skip_internal=True)
+        return result
+
+    def get_rate(
+        self,
+        event: GroupEvent,
+        interval: str,
+        environment_id: str,
+        query_cache: MutableMapping[Any, int] | None = None,
+    ) -> int:
+        """
+        Rules of a project that are evaluated for the same event frequently ask
+        for the same interval, so results are shared through ``query_cache``.
+        Queries are identified by their duration and offset rather than by
+        their exact bounds, as rules are evaluated within moments of each
+        other.
+        """
         _, duration = self.intervals[interval]
         end = timezone.now()
         # For conditions with interval >= 1 hour we don't need to worry about read your writes
@@ -188,7 +231,9 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
         if duration >= timedelta(hours=1):
             option_override_cm = options_override({"consistent": False})
         with option_override_cm:
-            result: int = self.query(event, end - duration, end, environment_id=environment_id)
+            result: int = self.query_cached(
+                query_cache, (duration, None), event, end - duration, end, environment_id
+            )
             comparison_type = self.get_option("comparisonType", COMPARISON_TYPE_COUNT)
             if comparison_type == COMPARISON_TYPE_PERCENT:
                 comparison_interval = comparison_intervals[self.get_option("comparisonInterval")][1]
@@ -196,8 +241,13 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
                 # TODO: Figure out if there's a way we can do this less frequently. All queries are
                 # automatically cached for 10s. We could consider trying to cache this and the main
                 # query for 20s to reduce the load.
-                comparison_result = self.query(
-                    event, comparison_end - duration, comparison_end, environment_id=environment_id
+                comparison_result = self.query_cached(
+                    query_cache,
+                    (duration, comparison_interval),
+                    event,
+                    comparison_end - duration,
+                    comparison_end,
+                    environment_id,
                 )
                 result = percent_increase(result, comparison_result)
 
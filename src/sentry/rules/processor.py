@@ -61,6 +61,7 @@ class RuleProcessor:
         self.grouped_futures: MutableMapping[
             str, Tuple[Callable[[GroupEvent, Sequence[RuleFuture]], None], List[RuleFuture]]
         ] = {}
+        self.frequency_query_cache: MutableMapping[Any, int] = {}
 
     def get_rules(self) -> Sequence[Rule]:
         """Get all of the rules for this project from the DB (or cache)."""
@@ -157,6 +158,7 @@ class RuleProcessor:
             is_regression=self.is_regression,
             is_new_group_environment=self.is_new_group_environment,
             has_reappeared=self.has_reappeared,
+            frequency_query_cache=self.frequency_query_cache,
         )
 
     def apply_rule(self, rule: Rule, status: GroupRuleStatus) -> None:
@@ -347,6 +349,7 @@ class RuleProcessor:
             return {}.values()
 
         self.grouped_futures.clear()
+        self.frequency_query_cache.clear()
         rules = self.get_rules()
         snoozed_rules = RuleSnooze.objects.filter(rule__in=rules, user_id=None).values_list(
             "rule", flat=True
@@ -0,0 +1,132 @@
+import os
+import time
+
+import click
+
+from sentry.runner.decorators import configuration
+
+
+@click.group()
+def nodestore():
+    """Tools for managing the node storage."""
+
+
+@nodestore.command("train-dictionary")
+@click.argument("dictionary_id", type=click.IntRange(1, 255), metavar="DICTIONARY_ID")
+@click.option("--platform", required=True, help="Platform the sampled payloads belong to.")
+@click.option(
+    "--ids",
+    "ids_file",
+    type=click.File("r"),
+    default="-",
+    help="File with one sampled node id per line, defaults to stdin.",
+)
+@click.option("--size", default=110 * 1024, show_default=True, help="Dictionary size in bytes.")
+@click.option(
+    "--activate",
+    is_flag=True,
+    help="Compress new payloads of the platform with the dictionary right away.",
+)
+@configuration
+def train_dictionary(dictionary_id, platform, ids_file, size, activate):
+    """
+    Train a zstd dictionary from sampled node payloads.
+
+    The dictionary is written to SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR. Ids are
+    written into every payload compressed with the dictionary, so they can
+    never be reused. The file has to be deployed to every host that reads
+    from nodestore before the dictionary is activated, either with
+    --activate or with `sentry nodestore activate-dictionary`.
+    """
+    from sentry import nodestore
+    from sentry.nodestore import dictionaries
+    from sentry.utils.codecs import ZstdCodec
+
+    try:
+        path = dictionaries.get_dictionary_path(dictionary_id)
+    except dictionaries.DictionaryNotFound as e:
+        raise click.ClickException(str(e))
+    if os.path.exists(path):
+        raise click.ClickException(f"Dictionary {dictionary_id} already exists at {path}.")
+
+    ids = [line.strip() for line in ids_file if line.strip()]
+    samples = []
+    for value in nodestore.backend._get_bytes_multi(ids).values():
+        if not value:
+            continue
+        if value.startswith(dictionaries.DICTIONARY_PAYLOAD_MAGIC):
+            try:
+                value = dictionaries.decompress(value)
+            except dictionaries.DictionaryNotFound as e:
+                raise click.ClickException(str(e))
+        samples.append(value)
+    if not samples:
+        raise click.ClickException("None of the sampled nodes exist.")
+
+    click.echo(f"Training dictionary {dictionary_id} from {len(samples)} payloads...")
+    dictionary = dictionaries.train_dictionary(samples, size)
+    with open(path, "wb") as f:
+        f.write(dictionary)
+
+    # Report how the dictionary performs on the sampled payloads compared to
+    # compressing them individually.
+    codec = ZstdCodec()
+    total_size = sum(len(sample) for sample in samples)
+    start = time.perf_counter()
+    plain_size = sum(len(codec.encode(sample)) for sample in samples)
+    plain_time = time.perf_counter() - start
+    start = time.perf_counter()
+    dictionary_size = sum(len(dictionaries.compress(sample, dictionary_id)) for sample in samples)
+    dictionary_time = time.perf_counter() - start
+
+    click.echo(f"Wrote {len(dictionary)} bytes to {path}")
+    click.echo(f"zstd:            ratio {total_size / plain_size:.2f}, {plain_time:.3f}s")
+    click.echo(f"zstd+dictionary: ratio {total_size / dictionary_size:.2f}, {dictionary_time:.3f}s")
+
+    if activate:
+        _activate(platform, dictionary_id)
+
+
+@nodestore.command("activate-dictionary")
+@click.argument("dictionary_id", type=click.IntRange(1, 255), metavar="DICTIONARY_ID")
+@click.option("--platform", required=True)
+@configuration
+def activate_dictionary(dictionary_id, platform):
+    """
+    Compress new payloads of a platform with a trained dictionary.
+    """
+    from sentry.nodestore import dictionaries
+
+    try:
+        dictionaries.load_dictionary(dictionary_id)
+    except dictionaries.DictionaryNotFound as e:
+        raise click.ClickException(str(e))
+
+    _activate(platform, dictionary_id)
+
+
+@nodestore.command("deactivate-dictionary")
+@click.option("--platform", required=True)
+@configuration
+def deactivate_dictionary(platform):
+    """
+    Stop compressing new payloads of a platform with a dictionary.
+
+    Payloads that were already written with it remain readable as long as the
+    dictionary file is present.
+    """
+    from sentry import options
+
+    value = dict(options.get("nodestore.zstd-dictionaries"))
+    value.pop(platform, None)
+    options.set("nodestore.zstd-dictionaries", value)
+    click.echo(f"Deactivated dictionary compression for {platform}.")
+
+
+def _activate(platform, dictionary_id):
+    from sentry import options
+
+    value = dict(options.get("nodestore.zstd-dictionaries"))
+    value[platform] = dictionary_id
+    options.set("nodestore.zstd-dictionaries", value)
+    click.echo(f"Activated dictionary {dictionary_id} for {platform}.")
@@ -0,0 +1,44 @@
+-- Apply a set of (possibly coalesced) increments to a single buffer hash.
+--
+-- KEYS[1]: the buffer hash key
+-- KEYS[2]: (optional) the pending set key, which must be located on the same
+--          node as the buffer hash key
+--
+-- ARGV: model, filters, key TTL, pending score, signal only flag, the number of
+--       counter columns followed by (column, amount) pairs, and the number of
+--       extra columns followed by (column, value) pairs.
+assert(#KEYS == 1 or #KEYS == 2, "provide a buffer key and an optional pending key")
+
+local key = KEYS[1]
+
+redis.call("HSETNX", key, "m", ARGV[1])
+redis.call("HSETNX", key, "f", ARGV[2])
+
+local ttl = ARGV[3]
+local score = ARGV[4]
+
+if ARGV[5] == "1" then
+    redis.call("HSET", key, "s", "1")
+end
+
+local cursor = 6
+
+local incr_count = tonumber(ARGV[cursor])
+cursor = cursor + 1
+for _ = 1, incr_count do
+    redis.call("HINCRBY", key, ARGV[cursor], ARGV[cursor + 1])
+    cursor = cursor + 2
+end
+
+local extra_count = tonumber(ARGV[cursor])
+cursor = cursor + 1
+for _ = 1, extra_count do
+    redis.call("HSET", key, ARGV[cursor], ARGV[cursor + 1])
+    cursor = cursor + 2
+end
+
+redis.call("EXPIRE", key, ttl)
+
+if #KEYS == 2 then
+    redis.call("ZADD", KEYS[2], score, key)
+end
@@ -1,11 +1,15 @@
 import logging
 import random
 import re
+from array import array
 from collections import defaultdict
+from itertools import chain
 from typing import (
     Any,
     Callable,
     Dict,
+    Iterable,
+    List,
     Mapping,
     MutableMapping,
     MutableSequence,
@@ -82,7 +86,94 @@ def extract_use_case_id(mri: str) -> UseCaseID:
     raise ValidationError(f"Invalid mri: {mri}")
 
 
+class StringTable:
+    """
+    Interns the strings of a batch. Every distinct metric name, tag key and tag
+    value is stored once and referred to by its position in ``strings``.
+    """
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, string: str) -> int:
+        id = self.ids.get(string)
+        if id is None:
+            id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return id
+
+    def intern_many(self, strings: Iterable[str]) -> List[int]:
+        ids = self.ids
+        rv = []
+        for string in strings:
+            id = ids.get(string)
+            if id is None:
+                id = ids[string] = len(self.strings)
+                self.strings.append(string)
+            rv.append(id)
+        return rv
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+# Marks strings that are missing from the mapping passed to ``reconstruct_messages``.
+_MISSING = object()
+
+
+class _ResolvedGroup:
+    """
+    The indexer results of a single (use case, org) pair, keyed by string id.
+    """
+
+    __slots__ = ("use_case_id", "org_id", "meta", "ids", "id_strs", "fetch_meta")
+
+    def __init__(
+        self,
+        use_case_id: UseCaseID,
+        org_id: OrgId,
+        mapping: Optional[Mapping[str, Optional[int]]],
+        meta: Mapping[str, Metadata],
+        string_ids: Iterable[int],
+        strings: Sequence[str],
+    ) -> None:
+        self.use_case_id = use_case_id
+        self.org_id = org_id
+        self.meta = meta
+        self.ids: Dict[int, Any] = (
+            {sid: mapping.get(strings[sid], _MISSING) for sid in string_ids}
+            if mapping is not None
+            else {}
+        )
+        self.id_strs = {sid: str(id) for sid, id in self.ids.items() if isinstance(id, int)}
+        # string id -> (fetch type value, str(id)), or None if there is no
+        # metadata for the string
+        self.fetch_meta: Dict[int, Optional[Tuple[str, str]]] = {}
+        for sid in string_ids:
+            self.load_fetch_meta(sid, strings)
+
+    def load_fetch_meta(self, sid: int, strings: Sequence[str]) -> Optional[Tuple[str, str]]:
+        metadata = self.meta.get(strings[sid])
+        entry = (metadata.fetch_type.value, str(metadata.id)) if metadata is not None else None
+        self.fetch_meta[sid] = entry
+        return entry
+
+    def is_global_quota(self, string: str) -> bool:
+        metadata = self.meta.get(string)
+        return bool(metadata and metadata.fetch_type_ext and metadata.fetch_type_ext.is_global)
+
+
 class IndexerBatch:
+    """
+    The messages of a batch are stored column-wise: row ``i`` of the batch is
+    described by ``org_ids[i]``, ``use_cases[i]``, ``names[i]`` and the tags
+    ``tag_keys[tag_offsets[i]:tag_offsets[i + 1]]`` (and the same slice of
+    ``tag_values``), all of which refer to the interned ``StringTable`` of the
+    batch. Strings that repeat across messages of the batch are therefore
+    collected and resolved once rather than once per message.
+    """
+
     def __init__(
         self,
         outer_message: Message[MessageBatch],
@@ -101,6 +192,19 @@ class IndexerBatch:
         self.__message_size_sum: MutableMapping[UseCaseID, int] = defaultdict(int)
         self.__message_size_max: MutableMapping[UseCaseID, int] = defaultdict(int)
 
+        self.string_table = StringTable()
+        self.use_case_table: List[UseCaseID] = []
+        self.rows_by_offset: Dict[PartitionIdxOffset, int] = {}
+        self.org_ids = array("q")
+        self.use_cases = array("B")
+        self.names = array("l")
+        self.tag_offsets = array("l", [0])
+        self.tag_keys = array("l")
+        self.tag_values = array("l")
+        self.skipped = bytearray()
+        # (use case index, org id) -> ids of the strings extracted for it
+        self.__strings_by_group: Optional[Dict[Tuple[int, OrgId], Set[int]]] = None
+
         self._extract_messages()
 
     def _extract_namespace(self, headers: Headers) -> Optional[str]:
@@ -110,10 +214,45 @@ class IndexerBatch:
         metrics.incr("sentry-metrics.indexer.killswitch.no-namespace-in-header")
         return None
 
+    def _add_row(
+        self, partition_offset: PartitionIdxOffset, use_case_id: UseCaseID, message: ParsedMessage
+    ) -> bool:
+        """
+        Appends a parsed message to the columns of the batch, returns False if
+        it cannot be represented.
+        """
+        string_table = self.string_table
+        try:
+            org_id = message["org_id"]
+            name = string_table.intern(message["name"])
+            tags = message.get("tags") or {}
+            keys = string_table.intern_many(tags.keys())
+            values = string_table.intern_many(tags.values())
+            self.org_ids.append(org_id)
+        except (TypeError, OverflowError):
+            return False
+
+        try:
+            use_case = self.use_case_table.index(use_case_id)
+        except ValueError:
+            use_case = len(self.use_case_table)
+            self.use_case_table.append(use_case_id)
+
+        self.rows_by_offset[partition_offset] = len(self.names)
+        self.use_cases.append(use_case)
+        self.names.append(name)
+        self.tag_keys.extend(keys)
+        self.tag_values.extend(values)
+        self.tag_offsets.append(len(self.tag_keys))
+        self.skipped.append(0)
+        return True
+
     @metrics.wraps("process_messages.extract_messages")
     def _extract_messages(self) -> None:
-        self.skipped_offsets: Set[PartitionIdxOffset] = set()
         self.parsed_payloads_by_offset: MutableMapping[PartitionIdxOffset, ParsedMessage] = {}
+        # ``extract_use_case_id`` is a regex match, and metric names repeat a
+        # lot within a batch.
+        use_case_ids_by_name: Dict[str, Optional[UseCaseID]] = {}
 
         for msg in self.outer_message.payload:
             assert isinstance(msg.value, BrokerValue)
@@ -122,7 +261,6 @@ class IndexerBatch:
             if namespace := self._extract_namespace(msg.payload.headers) in options.get(
                 "sentry-metrics.indexer.disabled-namespaces"
             ):
-                self.skipped_offsets.add(partition_offset)
                 metrics.incr("process_messages.namespace_disabled", tags={"namespace": namespace})
                 continue
             try:
@@ -130,7 +268,6 @@ class IndexerBatch:
                     msg.payload.value.decode("utf-8"), use_rapid_json=True
                 )
             except rapidjson.JSONDecodeError:
-                self.skipped_offsets.add(partition_offset)
                 logger.error(
                     "process_messages.invalid_json",
                     extra={"payload_value": str(msg.payload.value)},
@@ -152,16 +289,29 @@ class IndexerBatch:
                     exc_info=True,
                 )
 
+            name = parsed_payload["name"]
             try:
-                parsed_payload["use_case_id"] = use_case_id = extract_use_case_id(
-                    parsed_payload["name"]
-                )
-            except ValidationError:
-                self.skipped_offsets.add(partition_offset)
+                use_case_id = use_case_ids_by_name[name]
+            except (KeyError, TypeError):
+                try:
+                    use_case_id = extract_use_case_id(name)
+                except ValidationError:
+                    use_case_id = None
+                if isinstance(name, str):
+                    use_case_ids_by_name[name] = use_case_id
+
+            if use_case_id is None:
                 logger.error(
                     "process_messages.invalid_metric_resource_identifier",
                     extra={"payload_value": str(msg.payload.value)},
-                    exc_info=True,
+                )
+                continue
+            parsed_payload["use_case_id"] = use_case_id
+
+            if not self._add_row(partition_offset, use_case_id, parsed_payload):
+                logger.error(
+                    "process_messages.invalid_payload",
+                    extra={"payload_value": str(msg.payload.value)},
                 )
                 continue
 
@@ -183,13 +333,15 @@ class IndexerBatch:
     def filter_messages(self, keys_to_remove: Sequence[PartitionIdxOffset]) -> None:
         # XXX: it is useful to be able to get a sample of organization ids that are affected by rate limits, but this is really slow.
         for offset in keys_to_remove:
+            row = self.rows_by_offset.get(offset)
+            if row is None:
+                continue
+            self.skipped[row] = 1
+
             if _should_sample_debug_log():
+                sentry_sdk.set_tag("sentry_metrics.organization_id", self.org_ids[row])
                 sentry_sdk.set_tag(
-                    "sentry_metrics.organization_id",
-                    self.parsed_payloads_by_offset[offset]["org_id"],
-                )
-                sentry_sdk.set_tag(
-                    "sentry_metrics.metric_name", self.parsed_payloads_by_offset[offset]["name"]
+                    "sentry_metrics.metric_name", self.string_table.strings[self.names[row]]
                 )
                 logger.error(
                     "process_messages.dropped_message",
@@ -198,38 +350,43 @@ class IndexerBatch:
                     },
                 )
 
-        self.skipped_offsets.update(keys_to_remove)
-
     @metrics.wraps("process_messages.extract_strings")
     def extract_strings(self) -> Mapping[UseCaseID, Mapping[OrgId, Set[str]]]:
-        strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]] = defaultdict(
-            lambda: defaultdict(set)
-        )
+        strings_by_group: Dict[Tuple[int, OrgId], Set[int]] = defaultdict(set)
+        string_table = self.string_table.strings
+        tag_offsets = self.tag_offsets
+        should_index_tag_values = self.__should_index_tag_values
 
-        for partition_offset, message in self.parsed_payloads_by_offset.items():
-            if partition_offset in self.skipped_offsets:
+        # Validity of a metric name only depends on the string.
+        valid_names: Dict[int, bool] = {}
+
+        for partition_offset, row in self.rows_by_offset.items():
+            if self.skipped[row]:
                 continue
 
             partition_idx, offset = partition_offset
+            message = self.parsed_payloads_by_offset[partition_offset]
 
-            metric_name = message["name"]
+            name = self.names[row]
             metric_type = message["type"]
-            use_case_id = message["use_case_id"]
-            org_id = message["org_id"]
-            tags = message.get("tags", {})
+            use_case_id = self.use_case_table[self.use_cases[row]]
+            org_id = self.org_ids[row]
 
-            if not valid_metric_name(metric_name):
+            is_valid_name = valid_names.get(name)
+            if is_valid_name is None:
+                is_valid_name = valid_names[name] = valid_metric_name(string_table[name])
+            if not is_valid_name:
                 logger.error(
                     "process_messages.invalid_metric_name",
                     extra={
                         "use_case_id": use_case_id,
                         "org_id": org_id,
-                        "metric_name": metric_name,
+                        "metric_name": string_table[name],
                         "partition": partition_idx,
                         "offset": offset,
                     },
                 )
-                self.skipped_offsets.add(partition_offset)
+                self.skipped[row] = 1
                 continue
 
             if metric_type not in ACCEPTED_METRIC_TYPES:
@@ -242,9 +399,10 @@ class IndexerBatch:
                         "offset": offset,
                     },
                 )
-                self.skipped_offsets.add(partition_offset)
+                self.skipped[row] = 1
                 continue
 
+            tags = message.get("tags", {})
             if self.tags_validator(tags) is False:
                 # sentry doesn't seem to actually capture nested logger.error extra args
                 sentry_sdk.set_extra("all_metric_tags", tags)
@@ -253,24 +411,29 @@ class IndexerBatch:
                     extra={
                         "use_case_id": use_case_id,
                         "org_id": org_id,
-                        "metric_name": metric_name,
+                        "metric_name": string_table[name],
                         "tags": tags,
                         "partition": partition_idx,
                         "offset": offset,
                     },
                 )
-                self.skipped_offsets.add(partition_offset)
+                self.skipped[row] = 1
                 continue
 
-            strings_in_message = {
-                metric_name,
-                *tags.keys(),
-            }
+            start, end = tag_offsets[row], tag_offsets[row + 1]
+            string_ids = strings_by_group[(self.use_cases[row], org_id)]
+            string_ids.add(name)
+            string_ids.update(self.tag_keys[start:end])
+            if should_index_tag_values:
+                string_ids.update(self.tag_values[start:end])
 
-            if self.__should_index_tag_values:
-                strings_in_message.update(tags.values())
+        self.__strings_by_group = strings_by_group
 
-            strings[use_case_id][org_id].update(strings_in_message)
+        strings: Mapping[UseCaseID, MutableMapping[OrgId, Set[str]]] = defaultdict(dict)
+        for (use_case, org_id), string_ids in strings_by_group.items():
+            strings[self.use_case_table[use_case]][org_id] = {
+                string_table[sid] for sid in string_ids
+            }
 
         for use_case_id, org_mapping in strings.items():
             metrics.gauge(
@@ -289,64 +452,87 @@ class IndexerBatch:
     ) -> IndexerOutputMessageBatch:
         new_messages: IndexerOutputMessageBatch = []
 
+        if self.__strings_by_group is None:
+            self.extract_strings()
+        strings_by_group = self.__strings_by_group
+        assert strings_by_group is not None
+
+        string_table = self.string_table.strings
+        tag_offsets = self.tag_offsets
+        tag_keys = self.tag_keys
+        tag_values = self.tag_values
+        should_index_tag_values = self.__should_index_tag_values
+        groups: Dict[Tuple[int, OrgId], _ResolvedGroup] = {}
+
         for message in self.outer_message.payload:
-            used_tags: Set[str] = set()
-            output_message_meta: Dict[str, Dict[str, str]] = defaultdict(dict)
             assert isinstance(message.value, BrokerValue)
             partition_offset = PartitionIdxOffset(
                 message.value.partition.index, message.value.offset
             )
-            if partition_offset in self.skipped_offsets:
+            row = self.rows_by_offset.get(partition_offset)
+            if row is None or self.skipped[row]:
                 continue
             old_payload_value = self.parsed_payloads_by_offset.pop(partition_offset)
 
-            metric_name = old_payload_value["name"]
-            org_id = old_payload_value["org_id"]
-            use_case_id = old_payload_value["use_case_id"]
+            name = self.names[row]
+            org_id = self.org_ids[row]
+            group_key = (self.use_cases[row], org_id)
+            group = groups.get(group_key)
+            if group is None:
+                use_case_id = self.use_case_table[group_key[0]]
+                group = groups[group_key] = _ResolvedGroup(
+                    use_case_id,
+                    org_id,
+                    mapping.get(use_case_id, {}).get(org_id),
+                    bulk_record_meta.get(use_case_id, {}).get(org_id, {}),
+                    strings_by_group.get(group_key, ()),
+                    string_table,
+                )
+            use_case_id = group.use_case_id
+            ids = group.ids
             sentry_sdk.set_tag("sentry_metrics.organization_id", org_id)
-            tags = old_payload_value.get("tags", {})
-            used_tags.add(metric_name)
+            start, end = tag_offsets[row], tag_offsets[row + 1]
+            keys = tag_keys[start:end]
+            values = tag_values[start:end]
 
             new_tags: Dict[str, Union[str, int]] = {}
             exceeded_global_quotas = 0
             exceeded_org_quotas = 0
 
-            try:
-                for k, v in tags.items():
-                    used_tags.update({k, v})
-                    new_k = mapping[use_case_id][org_id][k]
-                    if new_k is None:
-                        metadata = bulk_record_meta[use_case_id][org_id].get(k)
-                        if (
-                            metadata
-                            and metadata.fetch_type_ext
-                            and metadata.fetch_type_ext.is_global
-                        ):
+            key_error = False
+            for k, v in zip(keys, values):
+                new_k = ids.get(k, _MISSING)
+                if new_k is _MISSING:
+                    key_error = True
+                    break
+                if new_k is None:
+                    if group.is_global_quota(string_table[k]):
+                        exceeded_global_quotas += 1
+                    else:
+                        exceeded_org_quotas += 1
+                    continue
+
+                value_to_write: Union[int, str] = string_table[v]
+                if should_index_tag_values:
+                    new_v = ids.get(v, _MISSING)
+                    if new_v is _MISSING:
+                        key_error = True
+                        break
+                    if new_v is None:
+                        if group.is_global_quota(string_table[v]):
                             exceeded_global_quotas += 1
                         else:
                             exceeded_org_quotas += 1
                         continue
+                    value_to_write = new_v
 
-                    value_to_write: Union[int, str] = v
-                    if self.__should_index_tag_values:
-                        new_v = mapping[use_case_id][org_id][v]
-                        if new_v is None:
-                            metadata = bulk_record_meta[use_case_id][org_id].get(v)
-                            if (
-                                metadata
-                                and metadata.fetch_type_ext
-                                and metadata.fetch_type_ext.is_global
-                            ):
-                                exceeded_global_quotas += 1
-                            else:
-                                exceeded_org_quotas += 1
-                            continue
-                        else:
-                            value_to_write = new_v
+                new_tags[group.id_strs[k]] = value_to_write
 
-                    new_tags[str(new_k)] = value_to_write
-            except KeyError:
-                logger.error("process_messages.key_error", extra={"tags": tags}, exc_info=True)
+            if key_error:
+                logger.error(
+                    "process_messages.key_error",
+                    extra={"tags": old_payload_value.get("tags", {})},
+                )
                 continue
 
             if exceeded_org_quotas or exceeded_global_quotas:
@@ -372,20 +558,24 @@ class IndexerBatch:
                     )
                 continue
 
+            output_message_meta: Dict[str, Dict[str, str]] = defaultdict(dict)
             fetch_types_encountered = set()
-            for tag in used_tags:
-                if tag in bulk_record_meta[use_case_id][org_id]:
-                    metadata = bulk_record_meta[use_case_id][org_id][tag]
-                    fetch_types_encountered.add(metadata.fetch_type)
-                    output_message_meta[metadata.fetch_type.value][str(metadata.id)] = tag
-
-            mapping_header_content = bytes(
-                "".join(sorted(t.value for t in fetch_types_encountered)), "utf-8"
-            )
-
-            numeric_metric_id = mapping[use_case_id][org_id][metric_name]
+            for tag in chain((name,), keys, values):
+                fetch_meta = group.fetch_meta.get(tag, _MISSING)
+                if fetch_meta is _MISSING:
+                    fetch_meta = group.load_fetch_meta(tag, string_table)
+                if fetch_meta is not None:
+                    fetch_type, id_str = fetch_meta
+                    fetch_types_encountered.add(fetch_type)
+                    output_message_meta[fetch_type][id_str] = string_table[tag]
+
+            mapping_header_content = bytes("".join(sorted(fetch_types_encountered)), "utf-8")
+
+            numeric_metric_id = ids.get(name, _MISSING)
+            if numeric_metric_id is _MISSING:
+                # Not part of the mapping at all, this raises a ``KeyError``.
+                numeric_metric_id = mapping[use_case_id][org_id][string_table[name]]
             if numeric_metric_id is None:
-                metadata = bulk_record_meta[use_case_id][org_id].get(metric_name)
                 metrics.incr(
                     "sentry_metrics.indexer.process_messages.dropped_message",
                     tags={
@@ -400,11 +590,7 @@ class IndexerBatch:
                         "process_messages.dropped_message",
                         extra={
                             "string_type": "metric_id",
-                            "is_global_quota": bool(
-                                metadata
-                                and metadata.fetch_type_ext
-                                and metadata.fetch_type_ext.is_global
-                            ),
+                            "is_global_quota": group.is_global_quota(string_table[name]),
                             "org_batch_size": len(mapping[use_case_id][org_id]),
                             "use_case_id": use_case_id.value,
                         },
@@ -2,11 +2,16 @@ from __future__ import annotations
 
 import logging
 import random
-from typing import Collection, Iterable, Mapping, MutableMapping, Optional, Sequence, Set
+import threading
+import time
+from collections import Counter
+from typing import Callable, Collection, Iterable, Mapping, MutableMapping, Optional, Sequence, Set
 
+from cachetools import TLRUCache
 from django.conf import settings
 from django.core.cache import caches
 
+from sentry import options
 from sentry.sentry_metrics.indexer.base import (
     FetchType,
     OrgId,
@@ -26,6 +31,7 @@ logger = logging.getLogger(__name__)
 _INDEXER_CACHE_METRIC = "sentry_metrics.indexer.memcache"
 # only used to compare to the older version of the PGIndexer
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
+_INDEXER_LOCAL_CACHE_METRIC = "sentry_metrics.indexer.local_cache"
 
 
 class StringIndexerCache:
@@ -99,10 +105,98 @@ class StringIndexerCache:
         self.cache.delete_many(cache_keys, version=self.version)
 
 
+def _get_use_case_id(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class LocalStringIndexerCache:
+    """
+    A bounded, per-process LRU of ``"use_case_id:org_id:string"`` keys to ids
+    that sits in front of ``StringIndexerCache``.
+
+    A handful of strings (``transaction``, ``environment``, ``release``, ...)
+    show up in nearly every message, so keeping them in process saves a Redis
+    round trip for most batches. Entries expire after ``ttl()`` seconds, which
+    is evaluated for every entry so that the jitter of
+    ``StringIndexerCache.randomized_ttl`` applies here as well.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Callable[[], float],
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.__cache: TLRUCache[str, int] = TLRUCache(
+            maxsize=maxsize, ttu=lambda key, value, now: now + ttl(), timer=timer
+        )
+        self.__lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> MutableMapping[str, int]:
+        results = {}
+        hits: Counter[str] = Counter()
+        misses: Counter[str] = Counter()
+        with self.__lock:
+            for key in keys:
+                value = self.__cache.get(key)
+                if value is None:
+                    misses[_get_use_case_id(key)] += 1
+                else:
+                    hits[_get_use_case_id(key)] += 1
+                    results[key] = value
+
+        # Tagged by use case so that hit ratios can be compared per use case.
+        for cache_hit, counts in (("true", hits), ("false", misses)):
+            for use_case_id, amount in counts.items():
+                metrics.incr(
+                    _INDEXER_LOCAL_CACHE_METRIC,
+                    tags={"cache_hit": cache_hit, "use_case_id": use_case_id},
+                    amount=amount,
+                )
+        return results
+
+    def set_many(self, key_values: Mapping[str, int]) -> None:
+        with self.__lock:
+            for key, value in key_values.items():
+                self.__cache[key] = value
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__cache.clear()
+
+
 class CachingIndexer(StringIndexer):
     def __init__(self, cache: StringIndexerCache, indexer: StringIndexer) -> None:
         self.cache = cache
         self.indexer = indexer
+        self.__local_cache: Optional[LocalStringIndexerCache] = None
+
+    @property
+    def local_cache(self) -> Optional[LocalStringIndexerCache]:
+        """
+        The per-process cache in front of ``cache``, or ``None`` if it is
+        disabled. It is recreated whenever its size option changes.
+        """
+        maxsize = options.get("sentry-metrics.indexer.local-cache.max-size")
+        if not maxsize:
+            self.__local_cache = None
+        elif self.__local_cache is None or self.__local_cache.maxsize != maxsize:
+            self.__local_cache = LocalStringIndexerCache(maxsize, lambda: self.cache.randomized_ttl)
+        return self.__local_cache
+
+    def _get_local_cache_keys(self, keys: Iterable[str]) -> Sequence[str]:
+        disabled = options.get("sentry-metrics.indexer.local-cache.disabled-use-cases")
+        if not disabled:
+            return list(keys)
+        return [key for key in keys if _get_use_case_id(key) not in disabled]
+
+    def _set_local_many(self, key_values: Mapping[str, int]) -> None:
+        local_cache = self.local_cache
+        if local_cache is None or not key_values:
+            return
+        keys = self._get_local_cache_keys(key_values)
+        local_cache.set_many({key: key_values[key] for key in keys})
 
     def bulk_record(
         self, strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]]
@@ -110,9 +204,17 @@ class CachingIndexer(StringIndexer):
         cache_keys = UseCaseKeyCollection(strings)
         metrics.gauge("sentry_metrics.indexer.lookups_per_batch", value=cache_keys.size)
         cache_key_strs = cache_keys.as_strings()
-        cache_results = self.cache.get_many(cache_key_strs)
 
-        hits = [k for k, v in cache_results.items() if v is not None]
+        local_cache = self.local_cache
+        local_results: Mapping[str, int] = {}
+        if local_cache is not None:
+            local_results = local_cache.get_many(self._get_local_cache_keys(cache_key_strs))
+            cache_key_strs = [k for k in cache_key_strs if k not in local_results]
+
+        cache_results = self.cache.get_many(cache_key_strs) if cache_key_strs else {}
+
+        hits = {k: v for k, v in cache_results.items() if v is not None}
+        self._set_local_many(hits)
 
         # record all the cache hits we had
         metrics.incr(
@@ -134,7 +236,11 @@ class CachingIndexer(StringIndexer):
 
         cache_key_results = UseCaseKeyResults()
         cache_key_results.add_use_case_key_results(
-            [UseCaseKeyResult.from_string(k, v) for k, v in cache_results.items() if v is not None],
+            [
+                UseCaseKeyResult.from_string(k, v)
+                for results in (local_results, hits)
+                for k, v in results.items()
+            ],
             FetchType.CACHE_HIT,
         )
 
@@ -150,7 +256,9 @@ class CachingIndexer(StringIndexer):
             }
         )
 
-        self.cache.set_many(db_record_key_results.get_mapped_strings_to_ints())
+        db_results = db_record_key_results.get_mapped_strings_to_ints()
+        self.cache.set_many(db_results)
+        self._set_local_many(db_results)
 
         return cache_key_results.merge(db_record_key_results)
 
@@ -161,10 +269,17 @@ class CachingIndexer(StringIndexer):
     @metric_path_key_compatible_resolve
     def resolve(self, use_case_id: UseCaseID, org_id: int, string: str) -> Optional[int]:
         key = f"{use_case_id.value}:{org_id}:{string}"
+        local_cache = self.local_cache
+        if local_cache is not None:
+            local_result = local_cache.get_many(self._get_local_cache_keys([key])).get(key)
+            if local_result is not None:
+                return local_result
+
         result = self.cache.get(key)
 
         if result and isinstance(result, int):
             metrics.incr(_INDEXER_CACHE_METRIC, tags={"cache_hit": "true", "caller": "resolve"})
+            self._set_local_many({key: result})
             return result
 
         metrics.incr(_INDEXER_CACHE_METRIC, tags={"cache_hit": "false", "caller": "resolve"})
@@ -172,6 +287,7 @@ class CachingIndexer(StringIndexer):
 
         if id is not None:
             self.cache.set(key, id)
+            self._set_local_many({key: id})
 
         return id
 
@@ -15,7 +15,7 @@ from sentry.similarity.features import (
     MessageFeature,
     get_application_chunks,
 )
-from sentry.similarity.signatures import MinHashSignatureBuilder
+from sentry.similarity.signatures import HashLaneMinHashSignatureBuilder, MinHashSignatureBuilder
 from sentry.utils import redis
 from sentry.utils.datastructures import BidirectionalMapping
 from sentry.utils.iterators import shingle
@@ -57,7 +57,20 @@ def get_frame_attributes(frame):
     return attributes
 
 
-def _make_index_backend(cluster, namespace="sim:1"):
+# Signatures built by different builders can't be compared with each other, so
+# every version is stored in its own namespace. Switching versions starts with
+# an empty index.
+SIGNATURE_VERSIONS = {
+    1: ("sim:1", MinHashSignatureBuilder),
+    2: ("sim:2", HashLaneMinHashSignatureBuilder),
+}
+
+
+def _make_index_backend(cluster, version=None):
+    if version is None:
+        version = settings.SENTRY_SIMILARITY_SIGNATURE_VERSION
+    namespace, signature_builder = SIGNATURE_VERSIONS[version]
+
     if isinstance(cluster, str):
         cluster_id = cluster
 
@@ -70,7 +83,7 @@ def _make_index_backend(cluster, namespace="sim:1"):
 
     return MetricsWrapper(
         RedisScriptMinHashIndexBackend(
-            cluster, namespace, MinHashSignatureBuilder(16, 0xFFFF), 8, 60 * 60 * 24 * 30, 3, 5000
+            cluster, namespace, signature_builder(16, 0xFFFF), 8, 60 * 60 * 24 * 30, 3, 5000
         ),
         scope_tag_name=None,
     )
@@ -78,8 +91,7 @@ def _make_index_backend(cluster, namespace="sim:1"):
 
 features = FeatureSet(
     _make_index_backend(
-        getattr(settings, "SENTRY_SIMILARITY_INDEX_REDIS_CLUSTER", None) or "similarity",
-        namespace="sim:1",
+        getattr(settings, "SENTRY_SIMILARITY_INDEX_REDIS_CLUSTER", None) or "similarity"
     ),
     Encoder({Frame: get_frame_attributes}),
     BidirectionalMapping(
@@ -123,4 +135,5 @@ def _build_dispatcher(methodname):
 
 merge = _build_dispatcher("merge")
 record = _build_dispatcher("record")
+bulk_record = _build_dispatcher("bulk_record")
 delete = _build_dispatcher("delete")
@@ -6,14 +6,26 @@ class AbstractIndexBackend(metaclass=ABCMeta):
     def classify(self, scope, items, limit=None, timestamp=None):
         pass
 
+    @abstractmethod
+    def bulk_classify(self, requests, limit=None, timestamp=None):
+        pass
+
     @abstractmethod
     def compare(self, scope, key, items, limit=None, timestamp=None):
         pass
 
+    @abstractmethod
+    def bulk_compare(self, requests, limit=None, timestamp=None):
+        pass
+
     @abstractmethod
     def record(self, scope, key, items, timestamp=None):
         pass
 
+    @abstractmethod
+    def bulk_record(self, requests):
+        pass
+
     @abstractmethod
     def merge(self, scope, destination, items, timestamp=None):
         pass
@@ -5,12 +5,21 @@ class DummyIndexBackend(AbstractIndexBackend):
     def classify(self, scope, items, limit=None, timestamp=None):
         return []
 
+    def bulk_classify(self, requests, limit=None, timestamp=None):
+        return [[] for _ in requests]
+
     def compare(self, scope, key, items, limit=None, timestamp=None):
         return []
 
+    def bulk_compare(self, requests, limit=None, timestamp=None):
+        return [[] for _ in requests]
+
     def record(self, scope, key, items, timestamp=None):
         return {}
 
+    def bulk_record(self, requests):
+        return [{} for _ in requests]
+
     def merge(self, scope, destination, items, timestamp=None):
         return False
 
@@ -22,6 +22,20 @@ class MetricsWrapper(AbstractIndexBackend):
     def record(self, *args, **kwargs):
         return self.__instrumented_method_call("record", *args, **kwargs)
 
+    def __instrumented_bulk_method_call(self, method, *args, **kwargs):
+        # The requests may span several scopes, so they aren't tagged.
+        with timer(self.template.format(method)):
+            return getattr(self.backend, method)(*args, **kwargs)
+
+    def bulk_record(self, *args, **kwargs):
+        return self.__instrumented_bulk_method_call("bulk_record", *args, **kwargs)
+
+    def bulk_classify(self, *args, **kwargs):
+        return self.__instrumented_bulk_method_call("bulk_classify", *args, **kwargs)
+
+    def bulk_compare(self, *args, **kwargs):
+        return self.__instrumented_bulk_method_call("bulk_compare", *args, **kwargs)
+
     def classify(self, *args, **kwargs):
         return self.__instrumented_method_call("classify", *args, **kwargs)
 
@@ -2,6 +2,7 @@ import itertools
 import time
 
 from django.utils.encoding import force_str
+from rediscluster import RedisCluster
 
 from sentry.similarity.backends.abstract import AbstractIndexBackend
 from sentry.utils.iterators import chunked
@@ -31,12 +32,15 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
         self.retention = retention
         self.candidate_set_limit = candidate_set_limit
 
-    def _build_signature_arguments(self, features):
+    def _build_signature_arguments(self, features, signature=None):
         if not features:
             return [0] * self.bands
 
+        if signature is None:
+            signature = self.signature_builder(features)
+
         arguments = []
-        for bucket in band(self.bands, self.signature_builder(features)):
+        for bucket in band(self.bands, signature):
             arguments.extend([1, ",".join(str(b) for b in bucket), 1])
         return arguments
 
@@ -47,100 +51,170 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
         # all redis operations.
         return index(self.cluster, [scope], args)
 
+    def __index_many(self, requests):
+        """
+        Executes the script for many ``(scope, args)`` requests and returns
+        the results in the same order, in a single pipeline unless the index
+        is stored in a Redis Cluster.
+        """
+        if isinstance(self.cluster, RedisCluster):
+            # The scopes are spread over the nodes of the cluster, and scripts
+            # can't be pipelined across nodes.
+            return [self.__index(scope, args) for scope, args in requests]
+
+        with self.cluster.pipeline(transaction=False) as pipe:
+            for scope, args in requests:
+                index(pipe, [scope], args)
+            return pipe.execute()
+
     def _as_search_result(self, results):
         score_replacements = {
             -1.0: None,  # both items don't have the feature (no comparison)
             -2.0: 0,  # one item doesn't have the feature (totally dissimilar)
         }
 
-        def decode_search_result(result):
-            key, scores = result
-            return (
-                force_str(key),
-                [score_replacements.get(float(score), float(score)) for score in scores],
-            )
-
-        def get_comparison_key(result):
-            key, scores = result
-
-            scores = [score for score in scores if score is not None]
-
-            return (
-                sum(scores) / len(scores) * -1,  # average score, descending
-                len(scores) * -1,  # number of indexes with scores, descending
-                key,  # lexicographical sort on key, ascending
+        # Decodes the results and builds their sort keys in a single pass.
+        decoded = []
+        for key, scores in results:
+            scores = [score_replacements.get(score, score) for score in map(float, scores)]
+            present = [score for score in scores if score is not None]
+            sort_key = (
+                sum(present) / len(present) * -1,  # average score, descending
+                len(present) * -1,  # number of indexes with scores, descending
+                force_str(key),  # lexicographical sort on key, ascending
             )
+            decoded.append((sort_key, scores))
 
-        return sorted((decode_search_result(result) for result in results), key=get_comparison_key)
+        decoded.sort(key=lambda item: item[0])
+        return [(sort_key[2], scores) for sort_key, scores in decoded]
 
     def classify(self, scope, items, limit=None, timestamp=None):
+        return self.bulk_classify([(scope, items)], limit=limit, timestamp=timestamp)[0]
+
+    def bulk_classify(self, requests, limit=None, timestamp=None):
+        """
+        Classifies many ``(scope, items)`` requests, executing the script calls
+        in one pipeline per host.
+        """
         if timestamp is None:
             timestamp = int(time.time())
 
-        arguments = [
-            "CLASSIFY",
-            timestamp,
-            self.namespace,
-            self.bands,
-            self.interval,
-            self.retention,
-            self.candidate_set_limit,
-            scope,
-            limit if limit is not None else -1,
-        ]
-
-        for idx, threshold, features in items:
-            arguments.extend([idx, threshold])
-            arguments.extend(self._build_signature_arguments(features))
-
-        return self._as_search_result(self.__index(scope, arguments))
+        signatures = iter(
+            self.signature_builder.build_many(
+                [features for _, items in requests for _, _, features in items if features]
+            )
+        )
+
+        calls = []
+        for scope, items in requests:
+            arguments = [
+                "CLASSIFY",
+                timestamp,
+                self.namespace,
+                self.bands,
+                self.interval,
+                self.retention,
+                self.candidate_set_limit,
+                scope,
+                limit if limit is not None else -1,
+            ]
+
+            for idx, threshold, features in items:
+                arguments.extend([idx, threshold])
+                arguments.extend(
+                    self._build_signature_arguments(
+                        features, next(signatures) if features else None
+                    )
+                )
+
+            calls.append((scope, arguments))
+
+        return [self._as_search_result(result) for result in self.__index_many(calls)]
 
     def compare(self, scope, key, items, limit=None, timestamp=None):
+        return self.bulk_compare([(scope, key, items)], limit=limit, timestamp=timestamp)[0]
+
+    def bulk_compare(self, requests, limit=None, timestamp=None):
+        """
+        Compares many ``(scope, key, items)`` requests, executing the script
+        calls in one pipeline per host.
+        """
         if timestamp is None:
             timestamp = int(time.time())
 
-        arguments = [
-            "COMPARE",
-            timestamp,
-            self.namespace,
-            self.bands,
-            self.interval,
-            self.retention,
-            self.candidate_set_limit,
-            scope,
-            limit if limit is not None else -1,
-            key,
-        ]
-
-        for idx, threshold in items:
-            arguments.extend([idx, threshold])
+        calls = []
+        for scope, key, items in requests:
+            arguments = [
+                "COMPARE",
+                timestamp,
+                self.namespace,
+                self.bands,
+                self.interval,
+                self.retention,
+                self.candidate_set_limit,
+                scope,
+                limit if limit is not None else -1,
+                key,
+            ]
 
-        return self._as_search_result(self.__index(scope, arguments))
+            for idx, threshold in items:
+                arguments.extend([idx, threshold])
 
-    def record(self, scope, key, items, timestamp=None):
-        if not items:
-            return  # nothing to do
+            calls.append((scope, arguments))
 
-        if timestamp is None:
-            timestamp = int(time.time())
+        return [self._as_search_result(result) for result in self.__index_many(calls)]
 
-        arguments = [
-            "RECORD",
-            timestamp,
-            self.namespace,
-            self.bands,
-            self.interval,
-            self.retention,
-            self.candidate_set_limit,
-            scope,
-            key,
-        ]
-
-        for idx, features in items:
-            arguments.append(idx)
-            arguments.extend(self._build_signature_arguments(features))
-
-        return self.__index(scope, arguments)
+    def record(self, scope, key, items, timestamp=None):
+        return self.bulk_record([(scope, key, items, timestamp)])[0]
+
+    def bulk_record(self, requests):
+        """
+        Records the features of many keys, given as a sequence of ``(scope,
+        key, items, timestamp)`` tuples. The signatures of all features are
+        built in one batch.
+        """
+        signatures = iter(
+            self.signature_builder.build_many(
+                [features for _, _, items, _ in requests for _, features in items if features]
+            )
+        )
+
+        results = [None] * len(requests)
+        calls = []
+        positions = []
+        for position, (scope, key, items, timestamp) in enumerate(requests):
+            if not items:
+                continue  # nothing to do
+
+            if timestamp is None:
+                timestamp = int(time.time())
+
+            arguments = [
+                "RECORD",
+                timestamp,
+                self.namespace,
+                self.bands,
+                self.interval,
+                self.retention,
+                self.candidate_set_limit,
+                scope,
+                key,
+            ]
+
+            for idx, features in items:
+                arguments.append(idx)
+                arguments.extend(
+                    self._build_signature_arguments(
+                        features, next(signatures) if features else None
+                    )
+                )
+
+            calls.append((scope, arguments))
+            positions.append(position)
+
+        for position, result in zip(positions, self.__index_many(calls)):
+            results[position] = result
+        return results
 
     def merge(self, scope, destination, items, timestamp=None):
         if timestamp is None:
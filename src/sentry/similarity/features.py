@@ -94,6 +94,23 @@ class FeatureSet:
                 )
         return results
 
+    def __encode(self, event, label, features):
+        try:
+            return [self.encoder.dumps(feature) for feature in features]
+        except Exception as error:
+            log = (
+                logger.debug
+                if isinstance(error, self.expected_encoding_errors)
+                else functools.partial(logger.warning, exc_info=True)
+            )
+            log(
+                "Could not encode features from %r for %r due to error: %r",
+                event,
+                label,
+                error,
+            )
+            return None
+
     def record(self, events):
         if not events:
             return []
@@ -120,26 +137,39 @@ class FeatureSet:
                         self.__get_key(event.group) == key
                     ), "all events must be associated with the same group"
 
-                try:
-                    features = [self.encoder.dumps(feature) for feature in features]
-                except Exception as error:
-                    log = (
-                        logger.debug
-                        if isinstance(error, self.expected_encoding_errors)
-                        else functools.partial(logger.warning, exc_info=True)
-                    )
-                    log(
-                        "Could not encode features from %r for %r due to error: %r",
-                        event,
-                        label,
-                        error,
-                    )
-                else:
-                    if features:
-                        items.append((self.aliases[label], features))
+                features = self.__encode(event, label, features)
+                if features:
+                    items.append((self.aliases[label], features))
 
         return self.index.record(scope, key, items, timestamp=int(to_timestamp(event.datetime)))
 
+    def bulk_record(self, events):
+        """
+        Records events of any number of groups and projects, building the
+        signatures of all of them in one batch.
+        """
+        requests = {}
+        for event in events:
+            if not event.group_id:
+                continue
+
+            scope = self.__get_scope(event.project)
+            key = self.__get_key(event.group)
+            timestamp = int(to_timestamp(event.datetime))
+            items, latest = requests.get((scope, key), ([], timestamp))
+            for label, features in self.extract(event).items():
+                features = self.__encode(event, label, features)
+                if features:
+                    items.append((self.aliases[label], features))
+            requests[(scope, key)] = (items, max(latest, timestamp))
+
+        return self.index.bulk_record(
+            [
+                (scope, key, items, timestamp)
+                for (scope, key), (items, timestamp) in requests.items()
+            ]
+        )
+
     def classify(self, events, limit=None, thresholds=None):
         if not events:
             return []
@@ -160,24 +190,10 @@ class FeatureSet:
                         self.__get_scope(event.project) == scope
                     ), "all events must be associated with the same project"
 
-                try:
-                    features = [self.encoder.dumps(feature) for feature in features]
-                except Exception as error:
-                    log = (
-                        logger.debug
-                        if isinstance(error, self.expected_encoding_errors)
-                        else functools.partial(logger.warning, exc_info=True)
-                    )
-                    log(
-                        "Could not encode features from %r for %r due to error: %r",
-                        event,
-                        label,
-                        error,
-                    )
-                else:
-                    if features:
-                        items.append((self.aliases[label], thresholds.get(label, 0), features))
-                        labels.append(label)
+                features = self.__encode(event, label, features)
+                if features:
+                    items.append((self.aliases[label], thresholds.get(label, 0), features))
+                    labels.append(label)
 
         return [
             (int(key), dict(zip(labels, scores)))
@@ -190,6 +206,13 @@ class FeatureSet:
         ]
 
     def compare(self, group, limit=None, thresholds=None):
+        return self.bulk_compare([group], limit=limit, thresholds=thresholds)[0]
+
+    def bulk_compare(self, groups, limit=None, thresholds=None):
+        """
+        Compares each of `groups` with the other groups of its project, with a
+        single request to the index.
+        """
         if thresholds is None:
             thresholds = {}
 
@@ -197,11 +220,13 @@ class FeatureSet:
 
         items = [(self.aliases[label], thresholds.get(label, 0)) for label in features]
 
+        results = self.index.bulk_compare(
+            [(self.__get_scope(group.project), self.__get_key(group), items) for group in groups],
+            limit=limit,
+        )
         return [
-            (int(key), dict(zip(features, scores)))
-            for key, scores in self.index.compare(
-                self.__get_scope(group.project), self.__get_key(group), items, limit=limit
-            )
+            [(int(key), dict(zip(features, scores))) for key, scores in result]
+            for result in results
         ]
 
     def merge(self, destination, sources, allow_unsafe=False):
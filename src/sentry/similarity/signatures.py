@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Iterable
+import math
+import sys
+from array import array
+from typing import Iterable, MutableMapping, Sequence
 
 import mmh3
 
@@ -15,3 +18,59 @@ class MinHashSignatureBuilder:
             min(mmh3.hash(feature, column) % self.rows for feature in features)
             for column in range(self.columns)
         ]
+
+    def build_many(self, feature_sets: Iterable[Iterable[str]]) -> list[list[int]]:
+        return [self(features) for features in feature_sets]
+
+
+class HashLaneMinHashSignatureBuilder:
+    """
+    Builds the same kind of signatures as ``MinHashSignatureBuilder``, but
+    hashes every feature once into a 128 bit hash (or a few of them, for many
+    columns) instead of once per column. The hash is split into lanes that
+    are used as the hash values of the individual columns. The minimum of
+    each column is then taken over a strided slice of an array, so the only
+    per-feature work done in Python is the call to the hash function.
+
+    The signatures are different from the ones built by
+    ``MinHashSignatureBuilder``, so they must not be stored in the same index.
+    """
+
+    HASH_SIZE = 16
+
+    def __init__(self, columns: int, rows: int) -> None:
+        self.columns = columns
+        self.rows = rows
+        # The smallest lane that can hold a value for every row.
+        self.typecode = "H" if rows <= 1 << 16 else "I"
+        lanes_per_hash = self.HASH_SIZE // array(self.typecode).itemsize
+        self.seeds = range(math.ceil(columns / lanes_per_hash))
+        self.stride = len(self.seeds) * lanes_per_hash
+
+    def __hash(self, feature: str | bytes) -> bytes:
+        return b"".join([mmh3.hash_bytes(feature, seed) for seed in self.seeds])
+
+    def __sign(self, hashes: Sequence[bytes]) -> list[int]:
+        values = array(self.typecode, b"".join(hashes))
+        if sys.byteorder == "big":
+            # Lanes are little endian everywhere so signatures don't depend on
+            # the platform.
+            values.byteswap()
+        return [min(values[column :: self.stride]) % self.rows for column in range(self.columns)]
+
+    def __call__(self, features: Iterable[str]) -> list[int]:
+        return self.__sign([self.__hash(feature) for feature in features])
+
+    def build_many(self, feature_sets: Iterable[Iterable[str]]) -> list[list[int]]:
+        # Events of the same group mostly share their features, only hash them once.
+        hashes: MutableMapping[str | bytes, bytes] = {}
+        signatures = []
+        for features in feature_sets:
+            feature_hashes = []
+            for feature in features:
+                value = hashes.get(feature)
+                if value is None:
+                    value = hashes[feature] = self.__hash(feature)
+                feature_hashes.append(value)
+            signatures.append(self.__sign(feature_hashes))
+        return signatures
@@ -0,0 +1,195 @@
+"""
+Merging and counting of Redis HyperLogLog values outside of Redis.
+
+Redis stores a HyperLogLog as a string of a 16 byte header followed by
+16384 registers, either in the dense encoding (6 bits per register) or in
+the run length based sparse encoding. ``count`` merges any number of such
+strings, as returned by ``GET``, and estimates the cardinality of the union
+with the same estimator as ``PFCOUNT`` (Redis 4.0 and later), so the result
+is the same as ``PFCOUNT`` with the same keys.
+
+Registers are kept in byte strings rather than lists of integers. Dense
+registers are unpacked with slicing and ``bytes.translate``, and merged with
+arithmetic on the registers packed into a single large integer, so there are
+no per-register Python loops for dense values.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, Optional
+
+__all__ = ["count", "merge", "estimate"]
+
+HEADER_SIZE = 16
+PRECISION = 14
+REGISTERS = 1 << PRECISION
+# The largest possible register value (the number of hash bits that are not
+# used to select a register).
+Q = 64 - PRECISION
+DENSE_SIZE = HEADER_SIZE + REGISTERS * 6 // 8
+
+MAGIC = b"HYLL"
+DENSE = 0
+SPARSE = 1
+
+ALPHA_INF = 0.5 / math.log(2)
+
+# Unpacking of the dense encoding. Every 3 bytes hold 4 registers, with the
+# first register in the lowest bits of the first byte.
+_LOW_6 = bytes(x & 0x3F for x in range(256))
+_HIGH_2 = bytes(x >> 6 for x in range(256))
+_LOW_4_SHIFTED = bytes((x & 0x0F) << 2 for x in range(256))
+_HIGH_4 = bytes(x >> 4 for x in range(256))
+_LOW_2_SHIFTED = bytes((x & 0x03) << 4 for x in range(256))
+_HIGH_6 = bytes(x >> 2 for x in range(256))
+
+# Masks for the registers packed into an integer, one register per byte.
+_LANES_0x80 = int.from_bytes(b"\x80" * REGISTERS, "little")
+_LANES_0x3F = int.from_bytes(b"\x3F" * REGISTERS, "little")
+
+
+def _or(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, "little") | int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+def _decode_dense(value: bytes) -> bytes:
+    if len(value) != DENSE_SIZE:
+        raise ValueError("Invalid dense HyperLogLog size")
+    a = value[HEADER_SIZE::3]
+    b = value[HEADER_SIZE + 1 :: 3]
+    c = value[HEADER_SIZE + 2 :: 3]
+
+    registers = bytearray(REGISTERS)
+    registers[0::4] = a.translate(_LOW_6)
+    registers[1::4] = _or(a.translate(_HIGH_2), b.translate(_LOW_4_SHIFTED))
+    registers[2::4] = _or(b.translate(_HIGH_4), c.translate(_LOW_2_SHIFTED))
+    registers[3::4] = c.translate(_HIGH_6)
+    return bytes(registers)
+
+
+def _merge_sparse(registers: bytearray, value: bytes) -> None:
+    index = 0
+    pos = HEADER_SIZE
+    end = len(value)
+    while pos < end:
+        opcode = value[pos]
+        if opcode & 0x80:
+            # VAL: 1vvvvvxx, a run of xx + 1 registers set to vvvvv + 1.
+            count = (opcode >> 2 & 0x1F) + 1
+            run = (opcode & 0x03) + 1
+            for i in range(index, index + run):
+                if registers[i] < count:
+                    registers[i] = count
+            pos += 1
+        elif opcode & 0x40:
+            # XZERO: 01xxxxxx yyyyyyyy, a run of xxxxxxyyyyyyyy + 1 registers set to 0.
+            if pos + 1 >= end:
+                raise ValueError("Invalid sparse HyperLogLog")
+            run = ((opcode & 0x3F) << 8 | value[pos + 1]) + 1
+            pos += 2
+        else:
+            # ZERO: 00xxxxxx, a run of xxxxxx + 1 registers set to 0.
+            run = (opcode & 0x3F) + 1
+            pos += 1
+        index += run
+        if index > REGISTERS:
+            raise ValueError("Invalid sparse HyperLogLog")
+
+    if index != REGISTERS:
+        raise ValueError("Invalid sparse HyperLogLog")
+
+
+def merge(values: Iterable[Optional[bytes]]) -> bytes:
+    """
+    Returns the registers (one per byte) of the union of HyperLogLog values
+    in the Redis encoding. ``None`` values, such as the ``GET`` of a missing
+    key, are skipped. Raises ``ValueError`` for anything that is not a
+    HyperLogLog value.
+    """
+    dense = None
+    sparse = []
+    for value in values:
+        if value is None:
+            continue
+        if value[:4] != MAGIC or len(value) < HEADER_SIZE:
+            raise ValueError("Not a HyperLogLog value")
+
+        encoding = value[4]
+        if encoding == DENSE:
+            registers = int.from_bytes(_decode_dense(value), "little")
+            if dense is None:
+                dense = registers
+            else:
+                # Per register maximum: bit 7 of a register in the difference is
+                # set where the register of ``dense`` is greater or equal.
+                ge = ((dense | _LANES_0x80) - registers) & _LANES_0x80
+                mask = (ge >> 1) - (ge >> 7)
+                dense = (dense & mask) | (registers & (_LANES_0x3F ^ mask))
+        elif encoding == SPARSE:
+            sparse.append(value)
+        else:
+            raise ValueError("Unknown HyperLogLog encoding")
+
+    if dense is None:
+        rv = bytearray(REGISTERS)
+    else:
+        rv = bytearray(dense.to_bytes(REGISTERS, "little"))
+    for value in sparse:
+        _merge_sparse(rv, value)
+    return bytes(rv)
+
+
+def _sigma(x: float) -> float:
+    if x == 1.0:
+        return math.inf
+    y = 1.0
+    z = x
+    while True:
+        x *= x
+        z_prime = z
+        z += x * y
+        y += y
+        if z_prime == z:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x == 0.0 or x == 1.0:
+        return 0.0
+    y = 1.0
+    z = 1 - x
+    while True:
+        x = math.sqrt(x)
+        z_prime = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z_prime == z:
+            return z / 3
+
+
+def estimate(registers: bytes) -> int:
+    """
+    Estimates the cardinality of the registers returned by ``merge``, the
+    same way as Redis' ``hllCount`` (see "New cardinality estimation
+    algorithms for HyperLogLog sketches", Otmar Ertl, arXiv:1702.01284).
+    """
+    m = float(REGISTERS)
+    histogram = [registers.count(value) for value in range(Q + 2)]
+
+    z = m * _tau((m - histogram[Q + 1]) / m)
+    for j in range(Q, 0, -1):
+        z += histogram[j]
+        z *= 0.5
+    z += m * _sigma(histogram[0] / m)
+    if math.isinf(z):
+        return 0
+    # ``llroundl`` rounds halfway cases away from zero.
+    return int(math.floor(ALPHA_INF * m * m / z + 0.5))
+
+
+def count(values: Iterable[Optional[bytes]]) -> int:
+    """
+    Returns the estimated cardinality of the union of HyperLogLog values,
+    like ``PFCOUNT`` would for the keys holding them.
+    """
+    return estimate(merge(values))
@@ -1,7 +1,10 @@
+import atexit
 import itertools
 import logging
 import random
+import threading
 import uuid
+from array import array
 from collections import defaultdict, namedtuple
 from functools import reduce
 from hashlib import md5
@@ -11,7 +14,9 @@ from django.utils import timezone
 from django.utils.encoding import force_bytes
 from pkg_resources import resource_string
 
+from sentry.tsdb import hyperloglog
 from sentry.tsdb.base import BaseTSDB
+from sentry.utils import metrics
 from sentry.utils.compat import crc32
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import SentryScript, check_cluster_versions, get_cluster_from_options
@@ -52,6 +57,67 @@ class SuppressionWrapper:
         return True
 
 
+class CounterMatrix:
+    """\
+    The values of a counter for a list of keys over a series of timestamps.
+
+    Values are stored in a single typed array, one row of ``len(series)``
+    values per key, rather than as a tuple per value. Callers that only need
+    the sums or the series of some keys should use ``sums`` and ``row``
+    instead of converting the whole matrix with ``to_dict``.
+    """
+
+    def __init__(self, keys, series, values):
+        self.keys = keys
+        self.series = series
+        self.values = values
+        self.__rows = {key: i for i, key in enumerate(keys)}
+
+    def row(self, key):
+        width = len(self.series)
+        start = self.__rows[key] * width
+        return self.values[start : start + width]
+
+    def sums(self):
+        return {key: sum(self.row(key)) for key in self.keys}
+
+    def to_dict(self):
+        """
+        Returns a mapping of key => [(timestamp, count), ...], like
+        ``get_range``.
+        """
+        return {key: list(zip(self.series, self.row(key))) for key in self.keys}
+
+
+class CombinedIncrs:
+    """\
+    Counter increments that have not been written to Redis yet, merged by
+    hash key and field.
+    """
+
+    def __init__(self):
+        # (hash_key, hash_field) -> count
+        self.operations = defaultdict(int)
+        # hash_key -> "max expiration encountered"
+        self.expiries = defaultdict(float)
+        # The number of increments merged into ``operations``.
+        self.count = 0
+
+    def add(self, hash_key, hash_field, count, expiry):
+        self.operations[(hash_key, hash_field)] += count
+        if self.expiries[hash_key] < expiry:
+            self.expiries[hash_key] = expiry
+        self.count += 1
+
+    def merge(self, other):
+        for key, count in other.operations.items():
+            self.operations[key] += count
+        for hash_key, expiry in other.expiries.items():
+            if self.expiries[hash_key] < expiry:
+                self.expiries[hash_key] = expiry
+        self.count += other.count
+
+
 class RedisTSDB(BaseTSDB):
     """
     A time series storage backend for Redis.
@@ -105,17 +171,50 @@ class RedisTSDB(BaseTSDB):
     frequency table can be displayed as percentages of the whole data set.
     (Additional documentation and the bulk of the logic for implementing the
     frequency table API can be found in the ``cmsketch.lua`` script.)
+
+    When ``incr_combine_window`` is set (in seconds), counter increments are
+    combined in-process across ``incr_multi`` calls and written out at most
+    ``incr_combine_window`` seconds later, or as soon as more than
+    ``incr_combine_max_keys`` distinct hash fields are waiting to be written.
+    Increments that have not been written yet are lost if the process dies,
+    and are not visible to ``get_range`` until they are written.
+
+    When ``distinct_counts_local_merge`` is set, distinct counter totals and
+    unions are computed in-process from the raw HyperLogLog values instead of
+    with ``PFCOUNT`` and ``PFMERGE`` (see ``sentry.tsdb.hyperloglog``). The
+    values are fetched with pipelined ``GET`` commands, and no temporary keys
+    are written.
     """
 
     DEFAULT_SKETCH_PARAMETERS = SketchParameters(3, 128, 50)
 
-    def __init__(self, prefix="ts:", vnodes=64, **options):
+    def __init__(
+        self,
+        prefix="ts:",
+        vnodes=64,
+        incr_combine_window=0,
+        incr_combine_max_keys=1000,
+        distinct_counts_local_merge=False,
+        **options,
+    ):
         self.cluster, options = get_cluster_from_options("SENTRY_TSDB_OPTIONS", options)
         self.prefix = prefix
         self.vnodes = vnodes
         self.enable_frequency_sketches = options.pop("enable_frequency_sketches", False)
+        self.incr_combine_window = incr_combine_window
+        self.incr_combine_max_keys = incr_combine_max_keys
+        self.distinct_counts_local_merge = distinct_counts_local_merge
+        assert self.incr_combine_window >= 0
+        assert self.incr_combine_max_keys > 0
         super().__init__(**options)
 
+        # (cluster, durable) -> CombinedIncrs
+        self._combined = {}
+        self._combine_lock = threading.Lock()
+        self._combine_timer = None
+        if self.incr_combine_window:
+            atexit.register(self.flush)
+
     def validate(self):
         logger.debug("Validating Redis version...")
         version = Version((2, 8, 18)) if self.enable_frequency_sketches else Version((2, 8, 9))
@@ -224,43 +323,97 @@ class RedisTSDB(BaseTSDB):
             default_timestamp = timezone.now()
 
         for (cluster, durable), environment_ids in self.get_cluster_groups({None, environment_id}):
-            manager = cluster.map()
-            if not durable:
-                manager = SuppressionWrapper(manager)
-
-            with manager as client:
-                # (hash_key, hash_field) -> count
-                key_operations = defaultdict(lambda: 0)
-                # (hash_key) -> "max expiration encountered"
-                key_expiries = defaultdict(lambda: 0.0)
-
-                for rollup, max_values in self.rollups.items():
-                    for item in items:
-                        if len(item) == 2:
-                            model, key = item
-                            options = {}
-                        else:
-                            model, key, options = item
-
-                        count = options.get("count", default_count)
-                        timestamp = options.get("timestamp", default_timestamp)
-
-                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
-
-                        for environment_id in environment_ids:
-                            hash_key, hash_field = self.make_counter_key(
-                                model, rollup, timestamp, key, environment_id
-                            )
+            incrs = CombinedIncrs()
+            for rollup, max_values in self.rollups.items():
+                for item in items:
+                    if len(item) == 2:
+                        model, key = item
+                        options = {}
+                    else:
+                        model, key, options = item
+
+                    count = options.get("count", default_count)
+                    timestamp = options.get("timestamp", default_timestamp)
+
+                    expiry = self.calculate_expiry(rollup, max_values, timestamp)
+
+                    for environment_id in environment_ids:
+                        hash_key, hash_field = self.make_counter_key(
+                            model, rollup, timestamp, key, environment_id
+                        )
+                        incrs.add(hash_key, hash_field, count, expiry)
+
+            if not self.incr_combine_window:
+                self._write_incrs(cluster, durable, incrs)
+                continue
+
+            batch = None
+            with self._combine_lock:
+                combined = self._combined.get((cluster, durable))
+                if combined is None:
+                    combined = self._combined[(cluster, durable)] = CombinedIncrs()
+                combined.merge(incrs)
+
+                pending = sum(len(c.operations) for c in self._combined.values())
+                if pending >= self.incr_combine_max_keys:
+                    batch = self._take_combined()
+                elif self._combine_timer is None:
+                    self._combine_timer = threading.Timer(
+                        self.incr_combine_window, self._flush_from_timer
+                    )
+                    self._combine_timer.daemon = True
+                    self._combine_timer.start()
 
-                            if key_expiries[hash_key] < expiry:
-                                key_expiries[hash_key] = expiry
+            if batch:
+                self._write_combined(batch)
 
-                            key_operations[(hash_key, hash_field)] += count
+    def flush(self):
+        """
+        Write all combined counter increments to Redis immediately.
+        """
+        with self._combine_lock:
+            batch = self._take_combined()
+        if batch:
+            self._write_combined(batch)
 
-                for (hash_key, hash_field), count in key_operations.items():
-                    client.hincrby(hash_key, hash_field, count)
-                    if key_expiries.get(hash_key):
-                        client.expireat(hash_key, key_expiries.pop(hash_key))
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("tsdb.incr_combine.flush-failed")
+
+    def _take_combined(self):
+        # Must be called while holding ``_combine_lock``.
+        batch, self._combined = self._combined, {}
+        if self._combine_timer is not None:
+            self._combine_timer.cancel()
+            self._combine_timer = None
+        return batch
+
+    def _write_combined(self, batch):
+        incr_count = 0
+        write_count = 0
+        for (cluster, durable), incrs in batch.items():
+            incr_count += incrs.count
+            write_count += len(incrs.operations)
+            self._write_incrs(cluster, durable, incrs)
+
+        metrics.incr("tsdb.incr_combine.incrs", amount=incr_count, skip_internal=True)
+        metrics.incr("tsdb.incr_combine.writes", amount=write_count, skip_internal=True)
+        if write_count:
+            metrics.timing("tsdb.incr_combine.ratio", incr_count / write_count)
+
+    def _write_incrs(self, cluster, durable, incrs):
+        manager = cluster.map()
+        if not durable:
+            manager = SuppressionWrapper(manager)
+
+        with manager as client:
+            expiries = dict(incrs.expiries)
+            for (hash_key, hash_field), count in incrs.operations.items():
+                client.hincrby(hash_key, hash_field, count)
+                if expiries.get(hash_key):
+                    client.expireat(hash_key, expiries.pop(hash_key))
 
     def get_range(
         self,
@@ -290,28 +443,62 @@ class RedisTSDB(BaseTSDB):
 
         self.validate_arguments([model], [environment_id])
 
+        return self.get_range_matrix(model, keys, start, end, rollup, environment_id).to_dict()
+
+    def get_sums(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_id=None,
+        use_cache=False,
+        jitter_value=None,
+        tenant_ids=None,
+        referrer_suffix=None,
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        return self.get_range_matrix(model, keys, start, end, rollup, environment_id).sums()
+
+    def get_range_matrix(self, model, keys, start, end, rollup=None, environment_id=None):
+        """
+        Returns the counters of ``keys`` as a ``CounterMatrix``.
+
+        The fields of all keys and timestamps are grouped by the hash they are
+        stored in and read with one ``HMGET`` per hash.
+        """
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
         series = [to_datetime(item) for item in series]
+        keys = list(dict.fromkeys(keys))
+        width = len(series)
+
+        # hash key -> ([hash field], [position of the value in the matrix])
+        fields_by_hash_key = defaultdict(lambda: ([], []))
+        for row, key in enumerate(keys):
+            for column, timestamp in enumerate(series):
+                hash_key, hash_field = self.make_counter_key(
+                    model, rollup, timestamp, key, environment_id
+                )
+                fields, positions = fields_by_hash_key[hash_key]
+                fields.append(hash_field)
+                positions.append(row * width + column)
 
-        results = []
         cluster, _ = self.get_cluster(environment_id)
         with cluster.map() as client:
-            for key in keys:
-                for timestamp in series:
-                    hash_key, hash_field = self.make_counter_key(
-                        model, rollup, timestamp, key, environment_id
-                    )
-                    results.append(
-                        (to_timestamp(timestamp), key, client.hget(hash_key, hash_field))
-                    )
+            responses = [
+                (client.hmget(hash_key, fields), positions)
+                for hash_key, (fields, positions) in fields_by_hash_key.items()
+            ]
 
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count.value or 0)
+        values = array("q", bytes(array("q").itemsize * len(keys) * width))
+        for response, positions in responses:
+            for position, count in zip(positions, response.value):
+                if count is not None:
+                    values[position] = int(count)
 
-        for key, points in results_by_key.items():
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        return CounterMatrix(keys, [to_timestamp(timestamp) for timestamp in series], values)
 
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
@@ -466,6 +653,14 @@ class RedisTSDB(BaseTSDB):
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
 
+        if self.distinct_counts_local_merge:
+            return {
+                key: hyperloglog.count(values)
+                for key, values in self._get_distinct_counts_values(
+                    model, keys, rollup, series, environment_id
+                ).items()
+            }
+
         responses = {}
         cluster, _ = self.get_cluster(environment_id)
         with cluster.fanout() as client:
@@ -494,6 +689,10 @@ class RedisTSDB(BaseTSDB):
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
 
+        if self.distinct_counts_local_merge:
+            values = self._get_distinct_counts_values(model, keys, rollup, series, environment_id)
+            return hyperloglog.count(itertools.chain.from_iterable(values.values()))
+
         temporary_id = uuid.uuid1().hex
 
         def make_temporary_key(key):
@@ -567,6 +766,23 @@ class RedisTSDB(BaseTSDB):
             ]
         )
 
+    def _get_distinct_counts_values(self, model, keys, rollup, series, environment_id):
+        """
+        Returns the raw HyperLogLog values of each key for every timestamp of
+        the series, with ``None`` for missing values.
+        """
+        responses = {}
+        cluster, _ = self.get_cluster(environment_id)
+        with cluster.fanout() as client:
+            for key in keys:
+                c = client.target_key(key)
+                responses[key] = [
+                    c.get(self.make_key(model, rollup, timestamp, key, environment_id))
+                    for timestamp in series
+                ]
+
+        return {key: [promise.value for promise in promises] for key, promises in responses.items()}
+
     def merge_distinct_counts(
         self, model, destination, sources, timestamp=None, environment_ids=None
     ):
@@ -34,6 +34,8 @@ from sentry_sdk import Hub
 from snuba_sdk import Request
 from snuba_sdk.legacy import json_to_snql
 
+from sentry import options
+from sentry.locks import locks
 from sentry.models import (
     Environment,
     Group,
@@ -50,6 +52,8 @@ from sentry.snuba.events import Columns
 from sentry.snuba.referrer import validate_referrer
 from sentry.utils import json, metrics
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.locking import UnableToAcquireLock
+from sentry.utils.locking.lock import Lock
 
 logger = logging.getLogger(__name__)
 
@@ -407,6 +411,8 @@ _snuba_pool = connection_from_url(
     maxsize=10,
 )
 _query_thread_pool = ThreadPoolExecutor(max_workers=10)
+# Refreshes stale query cache entries in stale-while-revalidate mode.
+_revalidate_thread_pool = ThreadPoolExecutor(max_workers=4)
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -849,11 +855,98 @@ def bulk_raw_query(
     return _apply_cache_and_build_results(params, referrer=referrer, use_cache=use_cache)
 
 
+def _get_fresh_cache_key(cache_key: str) -> str:
+    return f"{cache_key}:fresh"
+
+
+def _set_query_cache(cache_key: str, result: Mapping[str, Any]) -> None:
+    ttl = settings.SENTRY_SNUBA_CACHE_TTL_SECONDS
+    stale_ttl = options.get("snuba.query-cache.stale-while-revalidate")
+    if stale_ttl:
+        # The result outlives its freshness marker by `stale_ttl` seconds,
+        # during which it is served stale while it is refreshed.
+        cache.set(cache_key, json.dumps(result), ttl + stale_ttl)
+        cache.set(_get_fresh_cache_key(cache_key), 1, ttl)
+    else:
+        cache.set(cache_key, json.dumps(result), ttl)
+
+
+def _get_query_lock(cache_key: str) -> Lock:
+    return locks.get(
+        f"{cache_key}:lock", duration=settings.SENTRY_SNUBA_TIMEOUT, name="snuba_query_cache"
+    )
+
+
+def _try_acquire(lock: Lock) -> bool:
+    try:
+        lock.acquire()
+    except UnableToAcquireLock:
+        return False
+    return True
+
+
+def _revalidate_query(
+    query_params: SnubaQueryBody,
+    cache_key: str,
+    headers: Mapping[str, str],
+    lock: Lock,
+    hub: Hub,
+) -> None:
+    with Hub(hub):
+        try:
+            result = _bulk_snuba_query([query_params], headers)[0]
+            _set_query_cache(cache_key, result)
+        except Exception:
+            logger.warning("snuba.query_cache.revalidate-failed", exc_info=True)
+        finally:
+            lock.release()
+
+
+def _wait_for_query_cache(
+    cache_keys: Sequence[str], stop: float
+) -> MutableMapping[str, Mapping[str, Any]]:
+    """
+    Polls the query cache until results for all of `cache_keys` have been
+    written by other processes. Stops waiting for a key once its lock is
+    released without a result being cached, and for all keys at the `stop`
+    time (in `time.monotonic()` seconds).
+    """
+    results: MutableMapping[str, Mapping[str, Any]] = {}
+    delay = 0.05
+    pending = list(cache_keys)
+    while pending:
+        # Results are cached before the lock is released, so the lock has to
+        # be checked first.
+        locked = [cache_key for cache_key in pending if _get_query_lock(cache_key).locked()]
+        for cache_key, value in cache.get_many(pending).items():
+            if value is not None:
+                results[cache_key] = json.loads(value)
+        pending = [cache_key for cache_key in locked if cache_key not in results]
+        now = time.monotonic()
+        if not pending or now >= stop:
+            break
+        time.sleep(min(delay, stop - now))
+        delay = min(delay * 2, 0.5)
+    return results
+
+
 def _apply_cache_and_build_results(
     snuba_param_list: Sequence[SnubaQueryBody],
     referrer: Optional[str] = None,
     use_cache: Optional[bool] = False,
 ) -> ResultSet:
+    """
+    Runs the queries, reading and populating the query cache if `use_cache`
+    is set.
+
+    With the `snuba.query-cache.single-flight` option, only one process runs
+    a query that misses the cache at a time. Processes that miss the cache
+    while it runs wait for its result to be written to the cache instead,
+    for as long as the process holds the lock for the query.
+    With `snuba.query-cache.stale-while-revalidate`, results are kept past
+    their TTL and served while a single process refreshes them in the
+    background.
+    """
     headers = {}
     validate_referrer(referrer)
     if referrer:
@@ -862,29 +955,109 @@ def _apply_cache_and_build_results(
     query_param_list = list(enumerate(snuba_param_list))
 
     results = []
+    locks_held: List[Lock] = []
+    # Queries that are being run by another process
+    to_wait: List[Tuple[int, SnubaQueryBody, str]] = []
+    metric_tags = {"referrer": referrer} if referrer else None
 
     if use_cache:
+        single_flight = options.get("snuba.query-cache.single-flight")
+        stale_while_revalidate = options.get("snuba.query-cache.stale-while-revalidate")
+
         cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
-        cache_data = cache.get_many(cache_keys)
+        fetch_keys = list(cache_keys)
+        if stale_while_revalidate:
+            fetch_keys.extend(_get_fresh_cache_key(cache_key) for cache_key in cache_keys)
+        cache_data = cache.get_many(fetch_keys)
         to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
         for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
             cached_result = cache_data.get(cache_key)
-            metric_tags = {"referrer": referrer} if referrer else None
             if cached_result is None:
                 metrics.incr("snuba.query_cache.miss", tags=metric_tags)
+                if single_flight:
+                    lock = _get_query_lock(cache_key)
+                    if not _try_acquire(lock):
+                        to_wait.append((query_pos, query_params, cache_key))
+                        continue
+                    locks_held.append(lock)
                 to_query.append((query_pos, query_params, cache_key))
-            else:
-                metrics.incr("snuba.query_cache.hit", tags=metric_tags)
-                results.append((query_pos, json.loads(cached_result)))
+                continue
+
+            metrics.incr("snuba.query_cache.hit", tags=metric_tags)
+            results.append((query_pos, json.loads(cached_result)))
+
+            if stale_while_revalidate and _get_fresh_cache_key(cache_key) not in cache_data:
+                lock = _get_query_lock(cache_key)
+                if _try_acquire(lock):
+                    metrics.incr("snuba.query_cache.revalidate", tags=metric_tags)
+                    _revalidate_thread_pool.submit(
+                        _revalidate_query,
+                        query_params,
+                        cache_key,
+                        headers,
+                        lock,
+                        Hub(Hub.current),
+                    )
+                else:
+                    # Another process is refreshing the result already.
+                    metrics.incr("snuba.query_cache.revalidate.suppressed", tags=metric_tags)
     else:
         to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
 
-    if to_query:
-        query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
-        for result, (query_pos, _, cache_key) in zip(query_results, to_query):
-            if cache_key:
-                cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
-            results.append((query_pos, result))
+    try:
+        if to_query:
+            query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
+            for result, (query_pos, _, cache_key) in zip(query_results, to_query):
+                if cache_key:
+                    _set_query_cache(cache_key, result)
+                results.append((query_pos, result))
+    finally:
+        for lock in locks_held:
+            lock.release()
+
+    # Locks expire after the Snuba timeout, so nobody waits for a lock longer.
+    stop = time.monotonic() + settings.SENTRY_SNUBA_TIMEOUT
+    while to_wait:
+        waited_results = _wait_for_query_cache([cache_key for _, _, cache_key in to_wait], stop)
+        metrics.incr(
+            "snuba.query_cache.single_flight.suppressed",
+            amount=len(waited_results),
+            tags=metric_tags,
+        )
+        pending = to_wait
+        to_wait = []
+        to_query = []
+        locks_held = []
+        timed_out = 0
+        for query_pos, query_params, cache_key in pending:
+            if cache_key in waited_results:
+                results.append((query_pos, waited_results[cache_key]))
+                continue
+            # The process running the query failed, take over from it unless
+            # another process did already.
+            lock = _get_query_lock(cache_key)
+            if _try_acquire(lock):
+                locks_held.append(lock)
+            elif time.monotonic() < stop:
+                to_wait.append((query_pos, query_params, cache_key))
+                continue
+            else:
+                timed_out += 1
+            to_query.append((query_pos, query_params, cache_key))
+
+        if timed_out:
+            metrics.incr(
+                "snuba.query_cache.single_flight.timeout", amount=timed_out, tags=metric_tags
+            )
+        try:
+            if to_query:
+                query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
+                for result, (query_pos, _, cache_key) in zip(query_results, to_query):
+                    _set_query_cache(cache_key, result)
+                    results.append((query_pos, result))
+        finally:
+            for lock in locks_held:
+                lock.release()
 
     # Sort so that we get the results back in the original param list order
     results.sort()
@@ -56,6 +56,43 @@ class TestRedisBuffer:
         client = self.buf.get_routing_client()
         assert client.zrange("b:p", 0, -1) == []
 
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_paged(self, process_incr):
+        self.buf.incr_batch_size = 2
+        self.buf.pending_page_size = 3
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": 2, "baz": 3, "qux": 4, "quux": 5})
+        with mock.patch("sentry.buffer.redis.metrics") as metrics:
+            self.buf.process_pending()
+        assert process_incr.apply_async.mock_calls == [
+            mock.call(kwargs={"batch_keys": ["foo", "bar"]}),
+            mock.call(kwargs={"batch_keys": ["baz"]}),
+            mock.call(kwargs={"batch_keys": ["qux", "quux"]}),
+        ]
+        metrics.timing.assert_called_once_with("buffer.pending-size", 5)
+        assert client.zrange("b:p", 0, -1) == []
+
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_paged_keeps_unqueued_pages(self, process_incr):
+        self.buf.incr_batch_size = 2
+        self.buf.pending_page_size = 3
+        process_incr.apply_async.side_effect = [None, Exception("broker unavailable")]
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": 2, "baz": 3, "qux": 4, "quux": 5})
+        with pytest.raises(Exception):
+            self.buf.process_pending()
+        # The page whose keys were not all queued is still pending.
+        assert len(client.zrange("b:p", 0, -1)) == 5
+
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_paged_skips_newer_keys(self, process_incr):
+        self.buf.pending_page_size = 10
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": 10**10})
+        self.buf.process_pending()
+        process_incr.apply_async.assert_called_once_with(kwargs={"batch_keys": ["foo"]})
+        assert len(client.zrange("b:p", 0, -1)) == 1
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.base.Buffer.process")
     def test_process_does_bubble_up_json(self, process):
@@ -119,6 +156,29 @@ class TestRedisBuffer:
         group = Group.objects.get_from_cache(id=default_group.id)
         assert group.times_seen == orig_times_seen + times_seen_incr
 
+    @django_db_all
+    @freeze_time()
+    def test_process_batch_bulk_updates_groups(self, factories, default_project, task_runner):
+        self.buf.bulk_process = True
+        self.buf.incr_batch_size = 10
+        groups = [factories.create_group(project=default_project) for _ in range(3)]
+        now = timezone.now()
+        for i, group in enumerate(groups):
+            self.buf.incr(Group, {"times_seen": i + 1}, {"id": group.id}, {"last_seen": now})
+
+        with task_runner(), mock.patch("sentry.buffer", self.buf), mock.patch(
+            "sentry.buffer.base.Buffer.process"
+        ) as process, mock.patch("sentry.buffer.base.buffer_incr_complete") as signal:
+            self.buf.process_pending()
+
+        # All groups are updated with a single statement
+        assert not process.called
+        assert len(signal.send_robust.mock_calls) == 3
+        for i, group in enumerate(groups):
+            assert Group.objects.get(id=group.id).times_seen == group.times_seen + i + 1
+            assert Group.objects.get(id=group.id).last_seen == now
+            assert Group.objects.get_from_cache(id=group.id).times_seen == group.times_seen + i + 1
+
     def test_get(self):
         model = mock.Mock()
         model.__name__ = "Mock"
@@ -131,6 +191,65 @@ class TestRedisBuffer:
         self.buf.incr(model, {"times_seen": 5}, filters)
         assert self.buf.get(model, columns, filters=filters) == {"times_seen": 6}
 
+    def test_incr_coalesces(self):
+        self.buf.incr_coalesce_window = 60
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        columns = ["times_seen"]
+        filters = {"pk": 1}
+        key = self.buf._make_key(model, filters=filters)
+
+        self.buf.incr(model, {"times_seen": 1}, filters, extra={"foo": "bar"})
+        self.buf.incr(model, {"times_seen": 5}, filters, extra={"foo": "baz"})
+        # Coalesced increments are visible locally before they are written.
+        assert client.hgetall(key) == {}
+        assert self.buf.get(model, columns, filters=filters) == {"times_seen": 6}
+
+        with mock.patch("sentry.buffer.redis.metrics") as metrics:
+            self.buf.flush()
+        metrics.incr.assert_any_call("buffer.coalesce.incrs", amount=2, skip_internal=True)
+        metrics.incr.assert_any_call("buffer.coalesce.writes", amount=1, skip_internal=True)
+        metrics.incr.assert_any_call("buffer.coalesce.merged", amount=1, skip_internal=True)
+
+        assert self.buf.get(model, columns, filters=filters) == {"times_seen": 6}
+        result = client.hgetall(key)
+        if not self.buf.is_redis_cluster:
+            result = {k.decode(): v for k, v in result.items()}
+            assert pickle.loads(result["e+foo"]) == "baz"
+        else:
+            assert self.buf._load_value(json.loads(result["e+foo"])) == "baz"
+
+        pending = client.zrange("b:p", 0, -1)
+        if self.buf.is_redis_cluster:
+            assert pending == [key]
+        else:
+            assert pending == [key.encode("utf-8")]
+
+    def test_incr_without_coalescing(self):
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+
+        with mock.patch("sentry.buffer.redis.metrics") as metrics:
+            self.buf.incr(model, {"times_seen": 1}, filters)
+        assert [call.args[0] for call in metrics.incr.call_args_list] == ["buffer.incr"]
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 1}
+        assert len(self.buf.get_routing_client().zrange("b:p", 0, -1)) == 1
+
+    def test_incr_coalesce_max_keys(self):
+        self.buf.incr_coalesce_window = 60
+        self.buf.incr_coalesce_max_keys = 2
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 1})
+        assert client.zrange("b:p", 0, -1) == []
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 2})
+        assert len(client.zrange("b:p", 0, -1)) == 2
+        assert self.buf._coalesced == {}
+
     def test_incr_saves_to_redis(self):
         now = datetime.datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
         client = self.buf.get_routing_client()
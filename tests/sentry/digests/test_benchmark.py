@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from uuid import uuid4
+
+import pytest
+
+from sentry.digests import Record
+from sentry.digests.notifications import Notification
+from sentry.digests.utils import get_event_from_groups_in_digest, get_participants_by_event
+from sentry.eventstore.models import Event
+from sentry.models.projectownership import ProjectOwnership
+from sentry.notifications.types import ActionTargetType
+from sentry.notifications.utils.participants import get_send_to
+from sentry.ownership.grammar import Matcher, Owner, Rule, dump_schema
+from sentry.testutils.helpers.benchmark import requires_benchmark
+from sentry.testutils.pytest.fixtures import django_db_all
+from sentry.utils.dates import to_timestamp
+from tests.sentry.mail import make_event_data
+
+pytestmark = [requires_benchmark]
+
+EVENTS = 500
+TEAMS = 20
+USERS_PER_TEAM = 5
+
+
+@pytest.fixture
+def digest(factories):
+    owner = factories.create_user()
+    organization = factories.create_organization(owner=owner)
+    teams = []
+    users = []
+    for i in range(TEAMS):
+        team_users = [factories.create_user() for _ in range(USERS_PER_TEAM)]
+        teams.append(factories.create_team(organization=organization, members=team_users))
+        users.extend(team_users)
+    project = factories.create_project(organization=organization, teams=teams)
+    rule = factories.create_project_rule(project)
+
+    # Every event is owned by a team and one of its members.
+    ProjectOwnership.objects.create(
+        project_id=project.id,
+        schema=dump_schema(
+            [
+                Rule(Matcher("path", f"module{i}/*"), [Owner("team", team.slug)])
+                for i, team in enumerate(teams)
+            ]
+            + [
+                Rule(Matcher("path", f"*/user{i}.py"), [Owner("user", user.email)])
+                for i, user in enumerate(users)
+            ]
+        ),
+        fallthrough=True,
+    )
+
+    rule_groups = OrderedDict()
+    for i in range(EVENTS):
+        group = factories.create_group(project)
+        event = Event(
+            project_id=project.id,
+            event_id=uuid4().hex,
+            group_id=group.id,
+            data=make_event_data(f"module{i % TEAMS}/user{i % len(users)}.py"),
+        )
+        rule_groups[group] = [
+            Record(event.event_id, Notification(event, [rule.id]), to_timestamp(event.datetime))
+        ]
+    return project, OrderedDict([(rule, rule_groups)])
+
+
+def get_participants_per_event(digest, project):
+    """
+    Resolves the participants with one ``get_send_to`` per event, like
+    ``get_participants_by_event`` did before it resolved all events at once.
+    """
+    return {
+        event: get_send_to(project, ActionTargetType.ISSUE_OWNERS, event=event)
+        for event in get_event_from_groups_in_digest(digest)
+    }
+
+
+@django_db_all
+@pytest.mark.parametrize("method", ["per_event", "bulk"])
+def test_benchmark_get_participants_by_event(digest, benchmark, method):
+    project, digest = digest
+
+    if method == "per_event":
+        result = benchmark(get_participants_per_event, digest, project)
+    else:
+        result = benchmark(get_participants_by_event, digest, project)
+
+    assert len(result) == EVENTS
@@ -7,8 +7,10 @@ from typing import Mapping, MutableMapping, MutableSequence
 from sentry.digests import Record
 from sentry.digests.notifications import (
     Notification,
+    NotificationReference,
     event_to_record,
     group_records,
+    hydrate_records,
     rewrite_record,
     sort_group_contents,
     sort_rule_groups,
@@ -18,6 +20,7 @@ from sentry.digests.notifications import (
 from sentry.models import Rule
 from sentry.notifications.types import ActionTargetType, FallthroughChoiceType
 from sentry.testutils.cases import TestCase
+from sentry.testutils.helpers import override_options
 from sentry.testutils.silo import region_silo_test
 
 
@@ -63,6 +66,59 @@ class RewriteRecordTestCase(TestCase):
         )
 
 
+@region_silo_test(stable=True)
+@override_options({"digests.reference-records": True})
+class HydrateRecordsTestCase(TestCase):
+    @cached_property
+    def rule(self):
+        return self.event.project.rule_set.all()[0]
+
+    def test_reference(self):
+        record = event_to_record(self.event, (self.rule,))
+        assert record.key == self.event.event_id
+        assert record.value == NotificationReference(self.event.group_id, [self.rule.id], None)
+
+        (hydrated,) = hydrate_records(self.project, [record])
+        assert hydrated.key == record.key
+        assert hydrated.timestamp == record.timestamp
+        event = hydrated.value.event
+        assert hydrated.value.rules == [self.rule.id]
+        assert event.event_id == self.event.event_id
+        assert event.group == self.event.group
+        assert event.project == self.project
+        assert event.data["event_id"] == self.event.event_id
+        assert "_ref" not in event.data
+        assert "_ref_version" not in event.data
+        assert event.message == self.event.message
+
+    def test_notification(self):
+        with override_options({"digests.reference-records": False}):
+            record = event_to_record(self.event, (self.rule,))
+        assert isinstance(record.value, Notification)
+        assert hydrate_records(self.project, [record]) == [record]
+
+    def test_mixed(self):
+        with override_options({"digests.reference-records": False}):
+            old_record = event_to_record(self.event, (self.rule,))
+        event = self.store_event(data={"fingerprint": ["group-2"]}, project_id=self.project.id)
+        record = event_to_record(event, (self.rule,))
+
+        hydrated = hydrate_records(self.project, [record, old_record])
+        assert [r.key for r in hydrated] == [event.event_id, self.event.event_id]
+        assert hydrated[0].value.event.group == event.group
+        assert hydrated[1] == old_record
+
+    def test_without_event(self):
+        record = event_to_record(self.event, (self.rule,))
+        missing = Record("0" * 32, record.value, record.timestamp)
+        assert [r.key for r in hydrate_records(self.project, [missing, record])] == [record.key]
+
+    def test_without_group(self):
+        record = event_to_record(self.event, (self.rule,))
+        self.event.group.delete()
+        assert hydrate_records(self.project, [record]) == []
+
+
 @region_silo_test(stable=True)
 class GroupRecordsTestCase(TestCase):
     @cached_property
@@ -0,0 +1,63 @@
+from unittest import mock
+
+from sentry.grouping.api import (
+    _enhancements_cache,
+    _fingerprinting_cache,
+    _loaded_enhancements_cache,
+    get_fingerprinting_config_for_project,
+    get_grouping_config_dict_for_project,
+    load_grouping_config,
+)
+from sentry.testutils.cases import TestCase
+from sentry.testutils.helpers import override_options
+from sentry.testutils.silo import region_silo_test
+
+
+@region_silo_test(stable=True)
+class LocalConfigCacheTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        for local_cache in (_enhancements_cache, _loaded_enhancements_cache, _fingerprinting_cache):
+            local_cache.clear()
+            self.addCleanup(local_cache.clear)
+
+    def test_enhancements(self):
+        self.project.update_option("sentry:grouping_enhancements", "function:foo -app")
+
+        config = get_grouping_config_dict_for_project(self.project)
+        with mock.patch("sentry.utils.cache.cache.get") as cache_get:
+            assert get_grouping_config_dict_for_project(self.project) == config
+        assert not cache_get.called
+
+        loaded = load_grouping_config(config)
+        assert load_grouping_config(config).enhancements is loaded.enhancements
+        assert loaded.enhancements.dumps() == config["enhancements"]
+
+        self.project.update_option("sentry:grouping_enhancements", "function:bar -app")
+        new_config = get_grouping_config_dict_for_project(self.project)
+        assert new_config != config
+        new_loaded = load_grouping_config(new_config)
+        assert new_loaded.enhancements is not loaded.enhancements
+        assert new_loaded.enhancements.dumps() == new_config["enhancements"]
+
+    def test_fingerprinting(self):
+        self.project.update_option("sentry:fingerprinting_rules", "function:foo -> foo")
+
+        rules = get_fingerprinting_config_for_project(self.project)
+        with mock.patch("sentry.utils.cache.cache.get") as cache_get:
+            assert get_fingerprinting_config_for_project(self.project) is rules
+        assert not cache_get.called
+
+        self.project.update_option("sentry:fingerprinting_rules", "function:bar -> bar")
+        new_rules = get_fingerprinting_config_for_project(self.project)
+        assert new_rules is not rules
+        assert new_rules.rules[0].fingerprint == ["bar"]
+
+    @override_options({"store.grouping-config-local-cache.max-size": 0})
+    def test_disabled(self):
+        self.project.update_option("sentry:fingerprinting_rules", "function:foo -> foo")
+
+        rules = get_fingerprinting_config_for_project(self.project)
+        new_rules = get_fingerprinting_config_for_project(self.project)
+        assert new_rules is not rules
+        assert new_rules.to_json() == rules.to_json()
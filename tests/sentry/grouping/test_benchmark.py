@@ -1,22 +1,15 @@
 import pytest
 
 from sentry.grouping.api import get_default_grouping_config_dict
+from sentry.grouping.enhancer import Enhancements
 from sentry.grouping.strategies.configurations import CONFIGURATIONS
+from sentry.testutils.helpers.benchmark import requires_benchmark
 from tests.sentry.grouping import grouping_input as grouping_inputs
 
 CONFIGS = {key: get_default_grouping_config_dict(key) for key in sorted(CONFIGURATIONS.keys())}
 
 
-def benchmark_available() -> bool:
-    try:
-        __import__("pytest_benchmark")
-    except ModuleNotFoundError:
-        return False
-    else:
-        return True
-
-
-@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@requires_benchmark
 @pytest.mark.parametrize(
     "config_name", sorted(CONFIGURATIONS.keys()), ids=lambda x: x.replace("-", "_")
 )
@@ -37,3 +30,43 @@ def run_configuration(grouping_input, config):
     event.project = None
 
     event.get_hashes()
+
+
+def make_deep_stacktrace(platform, depth):
+    """
+    A stack trace as deep as the ones of Java services or iOS apps, mostly
+    made up of framework frames.
+    """
+    if platform == "java":
+        frames = [
+            {"function": "run", "module": "java.lang.Thread", "filename": "Thread.java"},
+            {"function": "invoke", "module": "sun.reflect.NativeMethodAccessorImpl"},
+            {"function": "doFilter", "module": "org.apache.catalina.core.ApplicationFilterChain"},
+            {"function": "handle", "module": "org.springframework.web.servlet.DispatcherServlet"},
+            {"function": "call", "module": "com.example.service.Handler", "filename": "H.java"},
+        ]
+    else:
+        frames = [
+            {"function": "__CFRunLoopRun", "package": "/System/Library/CoreFoundation"},
+            {"function": "objc_msgSend", "package": "/usr/lib/libobjc.A.dylib"},
+            {"function": "-[UIApplication sendEvent:]", "package": "/System/Library/UIKitCore"},
+            {"function": "_dispatch_call_block_and_release", "package": "/usr/lib/libdispatch"},
+            {"function": "ViewController.viewDidLoad", "package": "/private/var/MyApp"},
+        ]
+    return [dict(frames[i % len(frames)]) for i in range(depth)]
+
+
+@requires_benchmark
+@pytest.mark.parametrize(
+    "base,platform", [("newstyle:2023-01-11", "java"), ("mobile:2021-04-02", "cocoa")]
+)
+def test_benchmark_enhancements(base, platform, benchmark):
+    enhancements = Enhancements.from_config_string("function:foo* -app", bases=[base])
+
+    def setup():
+        return (make_deep_stacktrace(platform, 250),), {}
+
+    def apply(frames):
+        enhancements.apply_modifications_to_frame(frames, platform, {})
+
+    benchmark.pedantic(apply, setup=setup, rounds=50)
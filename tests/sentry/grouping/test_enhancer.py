@@ -448,3 +448,57 @@ def test_app_no_matches(frame):
     enhancements = Enhancements.from_config_string("app:no +app")
     enhancements.apply_modifications_to_frame([frame], "native", None)
     assert frame.get("in_app")
+
+
+@pytest.mark.parametrize(
+    "base,platform,frames",
+    [
+        (
+            "newstyle:2023-01-11",
+            "java",
+            [
+                {"function": "run", "module": "java.lang.Thread"},
+                {"function": "invoke", "module": "sun.reflect.NativeMethodAccessorImpl"},
+                {"function": "handle", "module": "org.springframework.web.Dispatcher"},
+                {"function": "bar", "module": "com.example.Foo", "filename": "Foo.java"},
+                {"function": "foo", "module": "com.example.Foo", "filename": "Foo.java"},
+            ],
+        ),
+        (
+            "mobile:2021-04-02",
+            "cocoa",
+            [
+                {"function": "main", "package": "/private/var/containers/MyApp"},
+                {"function": "__CFRunLoopRun", "package": "/System/CoreFoundation"},
+                {"function": "objc_msgSend", "package": "/usr/lib/libobjc.A.dylib"},
+                {"function": "foo", "package": "/private/var/containers/MyApp"},
+                {"function": "abort", "package": "/usr/lib/system/libsystem_c.dylib"},
+            ],
+        ),
+    ],
+)
+def test_rule_index(base, platform, frames):
+    enhancements = Enhancements.from_config_string(
+        """
+        function:foo                -app
+        module:com.example.*        +app ^-group
+        family:native !app:yes      -group
+        [ function:foo ] | function:bar +prefix
+        """,
+        bases=[base],
+    )
+    match_frames = [create_match_frame(frame, platform) for frame in frames]
+
+    for rules, index in [
+        (enhancements._modifier_rules, enhancements._modifier_index),
+        (enhancements._updater_rules, enhancements._updater_index),
+    ]:
+        candidate_frames = index.get_candidate_frames(match_frames, platform, {}, {})
+        assert len(candidate_frames) == len(rules)
+        # Only rules that can match a frame are evaluated on it.
+        assert sum(map(len, candidate_frames)) < len(rules) * len(frames)
+
+        for rule, frame_indices in zip(rules, candidate_frames):
+            assert rule.get_matching_frame_actions(
+                match_frames, platform, {}, {}, frame_indices
+            ) == rule.get_matching_frame_actions(match_frames, platform, {}, {})
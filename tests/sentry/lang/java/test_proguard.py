@@ -0,0 +1,91 @@
+import os
+
+import pytest
+from symbolic.proguard import ProguardMapper
+
+from sentry.lang.java.proguard import _mapper_cache, open_proguard_mapper
+from sentry.testutils.helpers import override_options
+
+PROGUARD_SOURCE = b"""\
+# compiler: R8
+# compiler_version: 2.0.74
+# min_api: 16
+# pg_map_id: 5b46fdc
+# common_typos_disable
+# {"id":"com.android.tools.r8.mapping","version":"1.0"}
+org.slf4j.helpers.Util$ClassContextSecurityManager -> org.a.b.g$a:
+    65:65:void <init>() -> <init>
+    67:67:java.lang.Class[] getClassContext() -> a
+    69:69:java.lang.Class[] getExtraClassContext() -> a
+    65:65:void <init>(org.slf4j.helpers.Util$1) -> <init>
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_mapper_cache():
+    _mapper_cache.clear()
+    yield
+    _mapper_cache.clear()
+
+
+@pytest.fixture
+def mapping_file(tmp_path):
+    def write(name="mapping.txt", source=PROGUARD_SOURCE, mtime_ns=None):
+        path = tmp_path / name
+        path.write_bytes(source)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return str(path)
+
+    return write
+
+
+def test_remap(mapping_file):
+    path = mapping_file()
+    mapper = open_proguard_mapper(path)
+    raw_mapper = ProguardMapper.open(path)
+    assert mapper.has_line_info
+
+    frames = mapper.remap_frame("org.a.b.g$a", "a", 67)
+    assert [(f.class_name, f.method, f.line) for f in frames] == [
+        (f.class_name, f.method, f.line) for f in raw_mapper.remap_frame("org.a.b.g$a", "a", 67)
+    ]
+    assert mapper.remap_frame("org.a.b.g$a", "a", 67) is frames
+
+    assert mapper.remap_class("org.a.b.g$a") == "org.slf4j.helpers.Util$ClassContextSecurityManager"
+    assert mapper.remap_class("org.a.b.x") is None
+    assert mapper.remap_class("org.a.b.x") is None
+
+    assert (
+        mapper.deobfuscate_signature("(Lorg/a/b/g$a;)V")
+        == "(org.slf4j.helpers.Util$ClassContextSecurityManager)"
+    )
+    assert mapper.deobfuscate_signature("()V") == "()"
+
+
+def test_cached(mapping_file):
+    path = mapping_file(mtime_ns=1_000_000_000)
+    mapper = open_proguard_mapper(path)
+    assert open_proguard_mapper(path) is mapper
+
+    # A mapping file that is fetched again gets a new mapper.
+    mapping_file(mtime_ns=2_000_000_000)
+    assert open_proguard_mapper(path) is not mapper
+
+
+def test_evicted_by_size(mapping_file):
+    first = mapping_file("first.txt")
+    second = mapping_file("second.txt")
+
+    with override_options({"proguard.mapper-cache.max-bytes": len(PROGUARD_SOURCE) * 3 // 2}):
+        first_mapper = open_proguard_mapper(first)
+        assert open_proguard_mapper(first) is first_mapper
+        second_mapper = open_proguard_mapper(second)
+        assert open_proguard_mapper(second) is second_mapper
+        assert open_proguard_mapper(first) is not first_mapper
+
+
+@override_options({"proguard.mapper-cache.max-bytes": 0})
+def test_disabled(mapping_file):
+    path = mapping_file()
+    assert open_proguard_mapper(path) is not open_proguard_mapper(path)
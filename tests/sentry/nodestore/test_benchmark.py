@@ -0,0 +1,103 @@
+import pytest
+
+from sentry.nodestore.base import NodeStorage, json_dumps
+from sentry.testutils.helpers.benchmark import requires_benchmark
+from sentry.testutils.helpers.options import override_options
+
+
+def make_event(frames):
+    return {
+        "event_id": "a" * 32,
+        "platform": "python",
+        "exception": {
+            "values": [
+                {
+                    "type": "ValueError",
+                    "value": "invalid literal for int() with base 10",
+                    "stacktrace": {
+                        "frames": [
+                            {
+                                "filename": f"sentry/module_{i}.py",
+                                "function": f"function_{i}",
+                                "lineno": i,
+                                "context_line": "    return int(value)",
+                                "pre_context": ["def f(value):"] * 5,
+                                "post_context": [""] * 5,
+                                "vars": {"value": "'abc'", "i": str(i)},
+                                "in_app": i % 2 == 0,
+                            }
+                            for i in range(frames)
+                        ]
+                    },
+                }
+            ]
+        },
+    }
+
+
+def encode(indexed):
+    # Reprocessing stores several stages of the same event as subkeys.
+    data = {
+        None: make_event(500),
+        "unprocessed": make_event(500),
+        "reprocessed": make_event(500),
+        "minimal": {"event_id": "a" * 32},
+    }
+    with override_options({"nodestore.indexed-subkeys": indexed}):
+        return NodeStorage()._encode(data)
+
+
+@requires_benchmark
+@pytest.mark.parametrize("indexed", [False, True], ids=["newline", "indexed"])
+@pytest.mark.parametrize("subkey", [None, "minimal"])
+def test_benchmark_decode(benchmark, indexed, subkey):
+    ns = NodeStorage()
+    value = encode(indexed)
+    result = benchmark(ns._decode, value, subkey)
+    assert result is not None
+
+
+@pytest.fixture(scope="module")
+def samples():
+    return [
+        json_dumps(dict(make_event(20 + i % 30), event_id=f"{i:032x}")).encode("utf8")
+        for i in range(500)
+    ]
+
+
+@requires_benchmark
+@pytest.mark.parametrize("use_dictionary", [False, True], ids=["zstd", "zstd_dictionary"])
+def test_benchmark_compression(benchmark, tmp_path, samples, use_dictionary):
+    from django.test import override_settings
+
+    from sentry.nodestore import dictionaries
+    from sentry.utils.codecs import ZstdCodec
+
+    training, payloads = samples[:400], samples[400:]
+    codec = ZstdCodec()
+
+    with override_settings(SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR=str(tmp_path)):
+        dictionaries.load_dictionary.cache_clear()
+        with open(dictionaries.get_dictionary_path(1), "wb") as f:
+            f.write(dictionaries.train_dictionary(training, 32 * 1024))
+
+        if use_dictionary:
+
+            def roundtrip():
+                return [
+                    dictionaries.decompress(dictionaries.compress(payload, 1))
+                    for payload in payloads
+                ]
+
+            compressed = [dictionaries.compress(payload, 1) for payload in payloads]
+        else:
+
+            def roundtrip():
+                return [codec.decode(codec.encode(payload)) for payload in payloads]
+
+            compressed = [codec.encode(payload) for payload in payloads]
+
+        assert benchmark(roundtrip) == payloads
+        dictionaries.load_dictionary.cache_clear()
+
+    benchmark.extra_info["compression_ratio"] = sum(map(len, payloads)) / sum(map(len, compressed))
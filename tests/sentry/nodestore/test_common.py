@@ -3,10 +3,12 @@ Testsuite of backend-independent nodestore tests. Add your backend to the
 `ns` fixture to have it tested.
 """
 from contextlib import nullcontext
+from unittest import mock
 
 import pytest
 
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.testutils.helpers.options import override_options
 from sentry.testutils.silo import region_silo_test
 from tests.sentry.nodestore.bigtable.test_backend import (
     MockedBigtableNodeStorage,
@@ -97,3 +99,49 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+@region_silo_test(stable=True)
+@pytest.mark.parametrize("indexed", [False, True])
+def test_set_subkeys_layouts(ns, indexed):
+    """
+    Payloads written in either layout must remain readable no matter which
+    layout is currently being written.
+    """
+    with override_options({"nodestore.indexed-subkeys": indexed}):
+        ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}, "x": [1]})
+        ns.set("node_2", {"foo": "c"})
+
+    with override_options({"nodestore.indexed-subkeys": not indexed}):
+        assert ns.get("node_1") == {"foo": "a"}
+        assert ns.get("node_1", subkey="other") == {"foo": "b"}
+        assert ns.get("node_1", subkey="x") == [1]
+        assert ns.get("node_1", subkey="missing") is None
+        assert ns.get_multi(["node_1", "node_2"], subkey="other") == {
+            "node_1": {"foo": "b"},
+            "node_2": None,
+        }
+
+
+@region_silo_test(stable=True)
+def test_lru_cache(ns):
+    with override_options({"nodestore.lru-cache.max-bytes": 1024 * 1024}):
+        ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+        ns.set("node_2", {"foo": "c"})
+
+        with mock.patch.object(ns, "_get_bytes") as get_bytes, mock.patch.object(
+            ns, "_get_bytes_multi"
+        ) as get_bytes_multi:
+            assert ns.get("node_1") == {"foo": "a"}
+            assert ns.get("node_1", subkey="other") == {"foo": "b"}
+            assert ns.get_multi(["node_1", "node_2"]) == {
+                "node_1": {"foo": "a"},
+                "node_2": {"foo": "c"},
+            }
+        assert not get_bytes.called
+        assert not get_bytes_multi.called
+
+        ns.delete("node_1")
+        assert ns.get("node_1") is None
+        ns.delete_multi(["node_2"])
+        assert ns.get("node_2") is None
@@ -0,0 +1,82 @@
+import pytest
+from django.test import override_settings
+
+from sentry.nodestore import dictionaries
+from sentry.nodestore.base import NodeStorage
+from sentry.testutils.helpers.options import override_options
+from sentry.utils import json
+
+
+def make_payload(i):
+    return {
+        "platform": "python",
+        "sdk": {"name": "sentry.python", "version": f"1.{i % 30}.0"},
+        "tags": [["environment", "production"], ["server_name", f"web-{i % 7}"]],
+        "exception": {
+            "values": [
+                {
+                    "type": "ValueError",
+                    "stacktrace": {
+                        "frames": [
+                            {"filename": f"app/{j}.py", "function": f"f{j}", "lineno": i + j}
+                            for j in range(10)
+                        ]
+                    },
+                }
+            ]
+        },
+    }
+
+
+@pytest.fixture
+def dictionary_dir(tmp_path):
+    samples = [json.dumps(make_payload(i)).encode("utf8") for i in range(1000)]
+    with override_settings(SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR=str(tmp_path)):
+        dictionaries.load_dictionary.cache_clear()
+        with open(dictionaries.get_dictionary_path(7), "wb") as f:
+            f.write(dictionaries.train_dictionary(samples, 16 * 1024))
+        yield tmp_path
+        dictionaries.load_dictionary.cache_clear()
+
+
+def test_roundtrip(dictionary_dir):
+    ns = NodeStorage()
+    payload = make_payload(1234)
+
+    with override_options({"nodestore.zstd-dictionaries": {"python": 7}}):
+        value = ns._encode({None: payload, "other": {"foo": "bar"}})
+
+    assert value.startswith(dictionaries.DICTIONARY_PAYLOAD_MAGIC + bytes([7]))
+    assert len(value) < len(json.dumps(payload))
+    assert ns._decode(value, None) == payload
+    assert ns._decode(value, "other") == {"foo": "bar"}
+
+
+def test_other_platforms_unaffected(dictionary_dir):
+    ns = NodeStorage()
+    payload = dict(make_payload(1), platform="javascript")
+    with override_options({"nodestore.zstd-dictionaries": {"python": 7}}):
+        value = ns._encode({None: payload})
+    assert value.startswith(b"{")
+    assert ns._decode(value, None) == payload
+
+
+def test_missing_dictionary(dictionary_dir):
+    with pytest.raises(dictionaries.DictionaryNotFound):
+        dictionaries.compress(b"{}", 8)
+
+
+def test_encode_without_deployed_dictionary(dictionary_dir):
+    ns = NodeStorage()
+    payload = make_payload(1)
+    with override_options({"nodestore.zstd-dictionaries": {"python": 8}}):
+        value = ns._encode({None: payload})
+    assert value.startswith(b"{")
+    assert ns._decode(value, None) == payload
+
+    with override_settings(SENTRY_NODESTORE_ZSTD_DICTIONARY_DIR=None), override_options(
+        {"nodestore.zstd-dictionaries": {"python": 7}}
+    ):
+        dictionaries.load_dictionary.cache_clear()
+        value = ns._encode({None: payload})
+    assert value.startswith(b"{")
@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import TimeoutError
+from unittest import mock
+
+import pytest
+
+from sentry.nodestore.base import NodeStorage
+from sentry.testutils.helpers.options import override_options
+
+
+class InMemoryNodeStorage(NodeStorage):
+    # ``NodeStorage`` is thread-local, so the data has to live on the class to
+    # be visible from the ``get_multi`` pool.
+    nodes: dict = {}
+    fetched: list = []
+
+    def _get_bytes(self, id):
+        return self.nodes.get(id)
+
+    def _get_bytes_multi(self, id_list):
+        self.fetched.append((threading.current_thread().name, list(id_list)))
+        return {id: self.nodes.get(id) for id in id_list}
+
+    def _set_bytes(self, id, data, ttl=None):
+        self.nodes[id] = data
+
+    def _get_cache_items(self, id_list):
+        return {}
+
+    def _set_cache_items(self, items):
+        pass
+
+    def _set_cache_item(self, id, data):
+        pass
+
+
+@pytest.fixture
+def ns():
+    InMemoryNodeStorage.nodes = {}
+    InMemoryNodeStorage.fetched = []
+    ns = InMemoryNodeStorage()
+    for i in range(10):
+        ns.set_subkeys(f"node_{i}", {None: {"i": i}, "other": {"j": i}})
+    return ns
+
+
+def test_get_multi_chunked(ns):
+    ids = [f"node_{i}" for i in range(10)] + ["missing"]
+
+    with override_options({"nodestore.get-multi.chunk-size": 3}):
+        result = ns.get_multi(ids)
+        assert ns.get_multi(ids, subkey="other") == {
+            **{f"node_{i}": {"j": i} for i in range(10)},
+            "missing": None,
+        }
+
+    assert result == {**{f"node_{i}": {"i": i} for i in range(10)}, "missing": None}
+    assert sorted(len(chunk) for _, chunk in ns.fetched[:4]) == [2, 3, 3, 3]
+    assert all(name.startswith("nodestore-get-multi") for name, _ in ns.fetched)
+
+
+def test_get_multi_not_chunked(ns):
+    with override_options({"nodestore.get-multi.chunk-size": 20}):
+        assert ns.get_multi(["node_1", "node_2"]) == {"node_1": {"i": 1}, "node_2": {"i": 2}}
+    assert ns.fetched == [(threading.current_thread().name, ["node_1", "node_2"])]
+
+
+def test_get_multi_timeout(ns):
+    def slow_get_bytes_multi(id_list):
+        time.sleep(0.5)
+        return {}
+
+    with override_options({"nodestore.get-multi.chunk-size": 1}), mock.patch.object(
+        InMemoryNodeStorage, "_get_bytes_multi", side_effect=slow_get_bytes_multi
+    ):
+        with pytest.raises(TimeoutError):
+            ns.get_multi(["node_1", "node_2"], timeout=0.01)
@@ -0,0 +1,54 @@
+import os
+from unittest import mock
+
+from sentry.nodestore.lru import NodeLRUCache
+
+
+def test_get_set():
+    cache = NodeLRUCache(max_bytes=1024 * 1024, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", b'{"foo":"bar"}')
+    assert cache.get("a") == b'{"foo":"bar"}'
+
+    cache.set_many({"b": b"b" * 100, "c": None})
+    assert cache.get_many(["a", "b", "c"]) == {"a": b'{"foo":"bar"}', "b": b"b" * 100}
+
+
+def test_delete():
+    cache = NodeLRUCache(max_bytes=1024 * 1024, ttl=60)
+    cache.set_many({"a": b"a", "b": b"b", "c": b"c"})
+    cache.delete("a")
+    cache.delete_many(["b", "missing"])
+    assert cache.get_many(["a", "b", "c"]) == {"c": b"c"}
+
+
+def test_bounded_by_bytes():
+    # zstd does not compress random bytes, so every entry takes at least 1kb.
+    payloads = {str(i): os.urandom(1024) for i in range(10)}
+    cache = NodeLRUCache(max_bytes=5 * 1024, ttl=60)
+
+    with mock.patch("sentry.nodestore.lru.metrics") as metrics:
+        for id, payload in payloads.items():
+            cache.set(id, payload)
+
+    assert metrics.incr.call_count > 0
+    metrics.incr.assert_any_call("nodestore.lru.evicted", skip_internal=True)
+    cached = cache.get_many(payloads.keys())
+    assert 0 < len(cached) < len(payloads)
+    # The most recently set payloads survive.
+    assert "9" in cached
+
+
+def test_skips_oversized_payloads():
+    cache = NodeLRUCache(max_bytes=16, ttl=60)
+    cache.set("a", os.urandom(256))
+    assert cache.get("a") is None
+
+
+def test_ttl():
+    timer = mock.Mock(return_value=0)
+    cache = NodeLRUCache(max_bytes=1024, ttl=60, timer=timer)
+    cache.set("a", b"a")
+    assert cache.get("a") == b"a"
+    timer.return_value = 61
+    assert cache.get("a") is None
@@ -26,6 +26,7 @@ from sentry.notifications.utils.participants import (
     get_owner_reason,
     get_owners,
     get_send_to,
+    get_send_to_many,
 )
 from sentry.ownership import grammar
 from sentry.ownership.grammar import Matcher, Owner, Rule, dump_schema
@@ -385,6 +386,35 @@ class GetSendToOwnersTest(_ParticipantsTest):
 
         assert self.get_send_to_owners(event) == {}
 
+    def test_send_to_many(self):
+        events = [
+            self.store_event_owners(filename)
+            for filename in ("team.py", "user.jsx", "everyone.cbl", "no_rule.cpp", "empty.lol")
+        ]
+        assert events[1].group is not None
+        GroupAssignee.objects.create(
+            group=events[1].group,
+            project=self.project,
+            user_id=self.user2.id,
+            date_added=datetime.now(),
+        )
+
+        assert get_send_to_many(self.project, events, ActionTargetType.ISSUE_OWNERS) == {
+            event: self.get_send_to_owners(event) for event in events
+        }
+
+    def test_send_to_many_member(self):
+        events = [self.store_event_owners("team.py"), self.store_event_owners("user.jsx")]
+
+        assert get_send_to_many(
+            self.project, events, ActionTargetType.MEMBER, target_identifier=self.user2.id
+        ) == {
+            event: get_send_to(
+                self.project, ActionTargetType.MEMBER, target_identifier=self.user2.id, event=event
+            )
+            for event in events
+        }
+
     def test_send_to_current_assignee_team(self):
         """
         Test the current issue assignee is notified
@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 
 from sentry.ratelimits.sliding_windows import (
@@ -71,3 +73,47 @@ def test_basic(limiter):
         )
 
         assert resp == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
+
+
+def test_lease(limiter):
+    leasing_limiter = RedisSlidingWindowRateLimiter(lease_fraction=0.5)
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=10)]
+
+    def request(requested=1):
+        return RequestedQuota(prefix="foo", requested=requested, quotas=quotas)
+
+    resp = leasing_limiter.check_and_use_quotas([request()], timestamp=TIMESTAMP_OFFSET)
+    assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+
+    # Half of the limit has been used up for the lease.
+    _, resp = limiter.check_within_quotas([request(10)], timestamp=TIMESTAMP_OFFSET)
+    assert resp == [GrantedQuota(prefix="foo", granted=5, reached_quotas=quotas)]
+
+    with mock.patch.object(leasing_limiter.impl, "check_within_quotas") as check_within_quotas:
+        for timestamp in range(4):
+            resp = leasing_limiter.check_and_use_quotas(
+                [request()], timestamp=TIMESTAMP_OFFSET + timestamp
+            )
+            assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+    assert not check_within_quotas.called
+
+    # Checking without using quota doesn't consume the lease.
+    _, resp = leasing_limiter.check_within_quotas(
+        [request(4), request(2)], timestamp=TIMESTAMP_OFFSET + 4
+    )
+    assert resp == [
+        GrantedQuota(prefix="foo", granted=4, reached_quotas=[]),
+        GrantedQuota(prefix="foo", granted=1, reached_quotas=quotas),
+    ]
+
+    resp = leasing_limiter.check_and_use_quotas([request(6)], timestamp=TIMESTAMP_OFFSET + 4)
+    assert resp == [GrantedQuota(prefix="foo", granted=5, reached_quotas=quotas)]
+    resp = leasing_limiter.check_and_use_quotas([request()], timestamp=TIMESTAMP_OFFSET + 4)
+    assert resp == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
+
+    # Leases expire before the quota they used up leaves the window, the
+    # quota used up at TIMESTAMP_OFFSET + 4 still counts.
+    resp = leasing_limiter.check_and_use_quotas([request()], timestamp=TIMESTAMP_OFFSET + 11)
+    assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+    _, resp = limiter.check_within_quotas([request()], timestamp=TIMESTAMP_OFFSET + 11)
+    assert resp == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
@@ -0,0 +1,39 @@
+import zlib
+
+import pytest
+
+from sentry.replays.usecases.ingest import decompress
+from sentry.replays.usecases.ingest.event_stream import parse_custom_events
+from sentry.testutils.helpers.benchmark import requires_benchmark
+from sentry.utils import json
+from tests.sentry.replays.unit.test_ingest_event_stream import make_segment
+
+pytestmark = [requires_benchmark]
+
+
+@pytest.fixture(scope="module")
+def segment():
+    # About 7 MB of snapshots, with 200 clicks.
+    return zlib.compress(json.dumps(make_segment(depth=8, clicks=200)).encode())
+
+
+def parse_segment(segment):
+    """
+    Decodes the whole segment, like the recordings consumer does without
+    ``replay.ingest.stream-custom-events``.
+    """
+    return [
+        event
+        for event in json.loads(decompress(segment), use_rapid_json=True)
+        if event["type"] == 5
+    ]
+
+
+@pytest.mark.parametrize("method", ["json", "stream"])
+def test_benchmark_parse_custom_events(segment, benchmark, method):
+    if method == "json":
+        events = benchmark(parse_segment, segment)
+    else:
+        events, _ = benchmark(parse_custom_events, segment)
+
+    assert len(events) == 200
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import random
+import zlib
+from typing import Any
+from unittest import mock
+
+import pytest
+
+from sentry.replays.usecases.ingest import RecordingIngestMessage, replay_click_post_processor
+from sentry.replays.usecases.ingest.event_stream import (
+    EventScanner,
+    MalformedSegment,
+    iter_chunks,
+    parse_custom_events,
+)
+from sentry.testutils.helpers import override_options
+from sentry.utils import json
+
+
+def make_node(node_id: int, depth: int) -> dict[str, Any]:
+    if depth == 0:
+        return {"type": 3, "textContent": 'Close with "]}" or "\\\\"', "id": node_id}
+    return {
+        "type": 2,
+        "tagName": "div",
+        "attributes": {"class": "a [b] {c}"},
+        "childNodes": [make_node(node_id * 4 + i, depth - 1) for i in range(4)],
+        "id": node_id,
+    }
+
+
+def make_click(timestamp: int) -> dict[str, Any]:
+    return {
+        "type": 5,
+        "timestamp": timestamp,
+        "data": {
+            "tag": "breadcrumb",
+            "payload": {
+                "timestamp": timestamp,
+                "type": "default",
+                "category": "ui.click",
+                "message": "div#hello",
+                "data": {
+                    "nodeId": 1,
+                    "node": {"id": 1, "tagName": "div", "attributes": {}, "textContent": "x"},
+                },
+            },
+        },
+    }
+
+
+def make_segment(depth: int = 4, clicks: int = 5) -> list[dict[str, Any]]:
+    events = [
+        {"type": 4, "data": {"href": "https://sentry.io"}, "timestamp": 1},
+        {"type": 2, "data": {"node": make_node(1, depth)}, "timestamp": 1},
+    ]
+    for i in range(clicks):
+        events.append(make_click(i))
+        events.append(
+            {"type": 3, "data": {"source": 0, "adds": [{"node": make_node(i, 2)}]}, "timestamp": i}
+        )
+    return events
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024, 64 * 1024])
+@pytest.mark.parametrize("compressed", [False, True])
+def test_parse_custom_events(chunk_size, compressed):
+    events = make_segment()
+    segment = json.dumps(events).encode()
+    size = len(segment)
+    if compressed:
+        segment = zlib.compress(segment)
+
+    assert parse_custom_events(segment, chunk_size) == (
+        [event for event in events if event["type"] == 5],
+        size,
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64 * 1024])
+def test_parse_custom_events_key_order(chunk_size):
+    click = make_click(1)
+    events = [
+        {"data": click["data"], "timestamp": 1, "type": 5},
+        {"timestamp": 1, "type": 3.0, "data": {"adds": [{"node": make_node(1, 2)}], "type": 5}},
+        {"data": {"type": 5, "text": '"type": 5 ]'}, "type": 2},
+        {"data": {"values": [1, {"type": 5}]}},
+        {"type": 5.0, "data": {}},
+        {"type": "5", "data": {}},
+        [{"type": 5}],
+        5,
+    ]
+    segment = json.dumps(events, indent=1).encode()
+
+    assert parse_custom_events(segment, chunk_size)[0] == [events[0], events[4]]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64 * 1024])
+def test_parse_custom_events_type_values(chunk_size):
+    events = [
+        {"data": {}, "tag": "type"},
+        {"type": 5, "data": {"tag": "breadcrumb"}},
+        {"data": ["type", {"type": 3}], "type": 5},
+        {"tag": "type", "data": {"type": "type"}},
+        {"type": "type", "data": {"type": 5}},
+    ]
+    segment = json.dumps(events).encode()
+
+    assert parse_custom_events(segment, chunk_size)[0] == [events[1], events[2]]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_parse_custom_events_random(chunk_size):
+    rng = random.Random(chunk_size)
+
+    def make_value(depth):
+        kind = rng.randrange(6 if depth < 4 else 3)
+        if kind == 0:
+            return rng.choice([5, 5.0, 3, -1, 1e3, None, True])
+        if kind in (1, 2):
+            return rng.choice(["type", "", '"type": 5', "]}", "\\", '"', "a" * 70])
+        if kind in (3, 4):
+            return {
+                rng.choice(["type", "data", "tag", '"type"']): make_value(depth + 1)
+                for _ in range(rng.randrange(4))
+            }
+        return [make_value(depth + 1) for _ in range(rng.randrange(4))]
+
+    for _ in range(20):
+        events = [make_value(1) for _ in range(rng.randrange(8))]
+        segment = json.dumps(events, indent=rng.choice([None, 1])).encode()
+        expected = [event for event in events if isinstance(event, dict) and event.get("type") == 5]
+        assert parse_custom_events(segment, chunk_size)[0] == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1000, 64 * 1024])
+def test_parse_custom_events_long_string(chunk_size):
+    text = '"]} \\' * 1024 * 1024
+    events = [{"type": 3, "data": {"text": text}}, make_click(1), {"data": text, "type": 5}]
+    segment = json.dumps(events).encode()
+
+    scanner = EventScanner()
+    custom_events = []
+    for chunk in iter_chunks(segment, chunk_size):
+        custom_events.extend(scanner.feed(chunk))
+        if scanner.event_start is None:
+            # The string is scanned once, not again with every chunk.
+            assert len(scanner.buffer) - scanner.pos <= 1
+    custom_events.extend(scanner.close())
+
+    assert len(segment) > 8 * 1024 * 1024
+    assert [json.loads(event.decode()) for event in custom_events] == events[1:]
+
+
+@pytest.mark.parametrize(
+    "segment",
+    [
+        b"",
+        b"[",
+        b'[{"type": 5}',
+        b'[{"type": 5, "data": "]}',
+        b"[]]",
+        b"[] []",
+        b'{"type": 5}',
+        zlib.compress(b"[]")[:-2],
+    ],
+)
+def test_parse_custom_events_malformed(segment):
+    with pytest.raises((MalformedSegment, zlib.error)):
+        parse_custom_events(segment)
+
+
+def test_scanner_memory_bounded():
+    events = make_segment(depth=7)
+    segment = zlib.compress(json.dumps(events).encode())
+    chunk_size = 1024
+
+    scanner = EventScanner()
+    custom_events = []
+    max_buffer_size = 0
+    for chunk in iter_chunks(segment, chunk_size):
+        custom_events.extend(scanner.feed(chunk))
+        max_buffer_size = max(max_buffer_size, len(scanner.buffer))
+    custom_events.extend(scanner.close())
+
+    # The snapshots are not held in memory, only the chunk being scanned and the custom
+    # events.
+    assert scanner.size > 100 * chunk_size
+    assert max_buffer_size < chunk_size + len(json.dumps(make_click(0)))
+    assert [json.loads(event.decode()) for event in custom_events] == events[2::2]
+
+
+@pytest.mark.parametrize("stream", [0, 100])
+@mock.patch("sentry.replays.usecases.ingest.parse_and_emit_replay_actions")
+def test_replay_click_post_processor(parse_and_emit_replay_actions, stream):
+    events = make_segment()
+    message = RecordingIngestMessage(
+        retention_days=30,
+        org_id=1,
+        project_id=1,
+        replay_id="a" * 32,
+        key_id=None,
+        received=0,
+        payload_with_headers=b"",
+    )
+
+    with override_options(
+        {"replay.ingest.dom-click-search": 100, "replay.ingest.stream-custom-events": stream}
+    ):
+        replay_click_post_processor(
+            message,
+            {"segment_id": 0},
+            zlib.compress(json.dumps(events).encode()),
+            mock.MagicMock(),
+        )
+
+    segment_data = parse_and_emit_replay_actions.call_args.kwargs["segment_data"]
+    custom_events = [event for event in segment_data if event["type"] == 5]
+    assert custom_events == [event for event in events if event["type"] == 5]
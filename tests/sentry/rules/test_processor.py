@@ -338,6 +338,49 @@ class RuleProcessorTest(TestCase):
         # mock condition first.
         assert passes.call_count == 0
 
+    def test_frequency_queries_shared_between_rules(self):
+        frequency_condition = {
+            "id": "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+            "interval": "1h",
+            "value": 1000,
+        }
+        self.rule.update(
+            data={"conditions": [frequency_condition], "actions": [EMAIL_ACTION_DATA]},
+        )
+        Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [{**frequency_condition, "value": 10}],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [{**frequency_condition, "interval": "1d"}],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+
+        with patch(
+            "sentry.rules.conditions.event_frequency.EventFrequencyCondition.query_hook",
+            return_value=100,
+        ) as query_hook:
+            rp = RuleProcessor(
+                self.group_event,
+                is_new=True,
+                is_regression=True,
+                is_new_group_environment=True,
+                has_reappeared=True,
+            )
+            results = list(rp.apply())
+
+        assert len(results) == 1
+        callback, futures = results[0]
+        assert len(futures) == 1
+        # One query for each distinct interval.
+        assert query_hook.call_count == 2
+
 
 class MockFilterTrue(EventFilter):
     id = "tests.sentry.rules.test_processor.MockFilterTrue"
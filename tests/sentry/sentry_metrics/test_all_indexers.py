@@ -251,6 +251,36 @@ def test_indexer(indexer, indexer_cache, use_case_id):
     assert not results[use_case_id].results.get(999)
 
 
+def test_local_cache(indexer, indexer_cache, use_case_id):
+    org_id = 1
+    strings = {"hello", "hey"}
+
+    with override_options({"sentry-metrics.indexer.local-cache.max-size": 100}):
+        indexer = CachingIndexer(indexer_cache, indexer)
+        indexer.bulk_record({use_case_id: {org_id: strings}})
+        expected = indexer_cache.get_many([f"{use_case_id.value}:{org_id}:{s}" for s in strings])
+
+        # Served from the local cache without going to the shared cache.
+        indexer_cache.cache.clear()
+        results = indexer.bulk_record({use_case_id: {org_id: strings}})
+        assert {
+            f"{use_case_id.value}:{org_id}:{s}": results[use_case_id][org_id][s] for s in strings
+        } == expected
+        assert_fetch_type_for_tag_string_set(
+            results.get_fetch_metadata()[use_case_id][org_id], FetchType.CACHE_HIT, strings
+        )
+        hello_id = results[use_case_id][org_id]["hello"]
+        assert indexer.resolve(use_case_id, org_id, "hello") == hello_id
+
+        with override_options(
+            {"sentry-metrics.indexer.local-cache.disabled-use-cases": [use_case_id.value]}
+        ):
+            results = indexer.bulk_record({use_case_id: {org_id: strings}})
+            assert_fetch_type_for_tag_string_set(
+                results.get_fetch_metadata()[use_case_id][org_id], FetchType.DB_READ, strings
+            )
+
+
 def test_resolve_and_reverse_resolve(indexer, indexer_cache, use_case_id):
     """
     Test `resolve` and `reverse_resolve` methods
@@ -0,0 +1,115 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+from arroyo.backends.kafka import KafkaPayload
+from arroyo.types import BrokerValue, Message, Partition, Topic, Value
+
+from sentry.sentry_metrics.consumers.indexer.batch import IndexerBatch
+from sentry.sentry_metrics.consumers.indexer.tags_validator import GenericMetricsTagsValidator
+from sentry.sentry_metrics.indexer.base import FetchType, Metadata
+from sentry.sentry_metrics.use_case_id_registry import UseCaseID
+from sentry.testutils.helpers.benchmark import requires_benchmark
+from sentry.utils import json
+
+pytestmark = [pytest.mark.sentry_metrics, pytest.mark.django_db, requires_benchmark]
+
+BATCH_SIZE = 10000
+BROKER_TIMESTAMP = datetime.now(tz=timezone.utc)
+
+
+def make_outer_message(size):
+    """
+    A batch of transaction metrics that looks like production traffic: a few
+    metric names and tag keys, a long tail of tag values and many orgs.
+    """
+    rng = random.Random(0)
+    ts = int(BROKER_TIMESTAMP.timestamp())
+    names = [
+        "d:transactions/duration@millisecond",
+        "d:transactions/measurements.lcp@millisecond",
+        "s:transactions/user@none",
+        "c:transactions/count_per_root_project@none",
+    ]
+    messages = []
+    for offset in range(size):
+        payload = {
+            "name": rng.choice(names),
+            "tags": {
+                "environment": rng.choice(["production", "staging"]),
+                "release": f"backend@{rng.randint(1, 50)}",
+                "transaction": f"/api/0/endpoint/{rng.randint(1, 500)}/",
+                "transaction.status": rng.choice(["ok", "cancelled", "internal_error"]),
+                "http.method": rng.choice(["GET", "POST"]),
+            },
+            "timestamp": ts,
+            "type": "d",
+            "value": [rng.random() * 100],
+            "org_id": rng.randint(1, 100),
+            "retention_days": 90,
+            "project_id": rng.randint(1, 1000),
+        }
+        messages.append(
+            Message(
+                BrokerValue(
+                    KafkaPayload(None, json.dumps(payload).encode("utf-8"), []),
+                    Partition(Topic("topic"), 0),
+                    offset,
+                    BROKER_TIMESTAMP,
+                )
+            )
+        )
+    return Message(Value(messages, messages[-1].committable))
+
+
+def make_batch(outer_message):
+    return IndexerBatch(
+        outer_message,
+        should_index_tag_values=False,
+        is_output_sliced=False,
+        input_codec=None,
+        tags_validator=GenericMetricsTagsValidator().is_allowed,
+    )
+
+
+def resolve(strings):
+    mapping = {}
+    meta = {}
+    for use_case_id, orgs in strings.items():
+        for org_id, org_strings in orgs.items():
+            mapping.setdefault(use_case_id, {})[org_id] = {
+                string: i for i, string in enumerate(sorted(org_strings), 1)
+            }
+            meta.setdefault(use_case_id, {})[org_id] = {
+                string: Metadata(id=i, fetch_type=FetchType.CACHE_HIT)
+                for string, i in mapping[use_case_id][org_id].items()
+            }
+    return mapping, meta
+
+
+@pytest.fixture(scope="module")
+def outer_message():
+    return make_outer_message(BATCH_SIZE)
+
+
+def test_benchmark_extract(benchmark, outer_message):
+    def extract():
+        return make_batch(outer_message).extract_strings()
+
+    strings = benchmark(extract)
+    assert UseCaseID.TRANSACTIONS in strings
+
+
+def test_benchmark_reconstruct(benchmark, outer_message):
+    mapping, meta = resolve(make_batch(outer_message).extract_strings())
+
+    def setup():
+        batch = make_batch(outer_message)
+        batch.extract_strings()
+        return (batch, mapping, meta), {}
+
+    def reconstruct(batch, mapping, meta):
+        return batch.reconstruct_messages(mapping, meta)
+
+    messages = benchmark.pedantic(reconstruct, setup=setup, rounds=5)
+    assert len(messages) == BATCH_SIZE
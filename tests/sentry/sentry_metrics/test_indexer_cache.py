@@ -1,7 +1,7 @@
 import pytest
 from django.conf import settings
 
-from sentry.sentry_metrics.indexer.cache import StringIndexerCache
+from sentry.sentry_metrics.indexer.cache import LocalStringIndexerCache, StringIndexerCache
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
 from sentry.utils.cache import cache
 from sentry.utils.hashlib import md5_text
@@ -81,3 +81,25 @@ def test_separate_namespacing() -> None:
     indexer_cache.set("transactions:3:what", 2)
     assert indexer_cache.get("sessions:3:what") == 1
     assert indexer_cache.get("transactions:3:what") == 2
+
+
+def test_local_cache() -> None:
+    now = [0.0]
+    local_cache = LocalStringIndexerCache(maxsize=2, ttl=lambda: 10, timer=lambda: now[0])
+
+    local_cache.set_many({"sessions:1:a": 1, "sessions:1:b": 2})
+    assert local_cache.get_many(["sessions:1:a", "sessions:1:b", "sessions:1:c"]) == {
+        "sessions:1:a": 1,
+        "sessions:1:b": 2,
+    }
+
+    # "b" is the least recently used entry
+    local_cache.get_many(["sessions:1:a"])
+    local_cache.set_many({"sessions:1:c": 3})
+    assert local_cache.get_many(["sessions:1:a", "sessions:1:b", "sessions:1:c"]) == {
+        "sessions:1:a": 1,
+        "sessions:1:c": 3,
+    }
+
+    now[0] = 10
+    assert local_cache.get_many(["sessions:1:a", "sessions:1:c"]) == {}
@@ -113,6 +113,52 @@ class RedisScriptMinHashIndexBackendTestCase(TestCase):
             "5",
         ]
 
+    def test_bulk_record(self):
+        timestamp = int(time.time())
+        results = self.index.bulk_record(
+            [
+                ("example", "1", [("index:a", "hello world"), ("index:b", "hello world")], None),
+                ("example", "2", [("index:a", "hello world")], timestamp),
+                ("example", "3", [], timestamp),
+                ("other", "4", [("index:a", "hello world")], timestamp),
+            ]
+        )
+        assert len(results) == 4
+        assert results[2] is None
+
+        results = self.index.compare("example", "1", [("index:a", 0), ("index:b", 0)])
+        assert results == [("1", [1.0, 1.0]), ("2", [1.0, 0.0])]
+        assert self.index.compare("other", "4", [("index:a", 0)]) == [("4", [1.0])]
+
+    def test_bulk_classify_compare(self):
+        self.index.record("example", "1", [("index", "hello world")])
+        self.index.record("example", "2", [("index", "jello world")])
+        self.index.record("other", "3", [("index", "hello world")])
+
+        results = self.index.bulk_compare(
+            [("example", "1", [("index", 0)]), ("other", "3", [("index", 0)])]
+        )
+        assert results == [
+            self.index.compare("example", "1", [("index", 0)]),
+            self.index.compare("other", "3", [("index", 0)]),
+        ]
+        assert [key for key, _ in results[0]] == ["1", "2"]
+        assert results[1] == [("3", [1.0])]
+
+        results = self.index.bulk_classify(
+            [
+                ("example", [("index", 0, "hello world")]),
+                ("other", [("index", 0, "hello world")]),
+                ("empty", [("index", 0, "hello world")]),
+            ]
+        )
+        assert results == [
+            self.index.classify("example", [("index", 0, "hello world")]),
+            self.index.classify("other", [("index", 0, "hello world")]),
+            [],
+        ]
+        assert results[0][0] == ("1", [1.0])
+
     def test_multiple_index(self):
         self.index.record("example", "1", [("index:a", "hello world"), ("index:b", "hello world")])
         self.index.record("example", "2", [("index:a", "hello world"), ("index:b", "hello world")])
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from sentry.similarity.signatures import HashLaneMinHashSignatureBuilder, MinHashSignatureBuilder
+from sentry.testutils.helpers.benchmark import requires_benchmark
+
+pytestmark = [requires_benchmark]
+
+
+def make_feature_sets(count):
+    """
+    Character shingles of exception messages that share most of their text,
+    like the events of a group do.
+    """
+    rng = random.Random(0)
+    words = ["connection", "refused", "timeout", "while", "reading", "from", "host", "port"]
+    feature_sets = []
+    for _ in range(count):
+        message = " ".join(rng.choice(words) for _ in range(20)).encode("utf8")
+        feature_sets.append([message[i : i + 5] for i in range(len(message) - 4)])
+    return feature_sets
+
+
+FEATURE_SETS = make_feature_sets(100)
+
+
+@pytest.mark.parametrize(
+    "builder",
+    [MinHashSignatureBuilder, HashLaneMinHashSignatureBuilder],
+    ids=["per_column", "hash_lanes"],
+)
+def test_benchmark_signatures(builder, benchmark):
+    get_signature = builder(16, 0xFFFF)
+
+    def sign():
+        return [get_signature(features) for features in FEATURE_SETS]
+
+    assert len(benchmark(sign)) == len(FEATURE_SETS)
+
+
+@pytest.mark.parametrize(
+    "builder",
+    [MinHashSignatureBuilder, HashLaneMinHashSignatureBuilder],
+    ids=["per_column", "hash_lanes"],
+)
+def test_benchmark_build_many(builder, benchmark):
+    get_signature = builder(16, 0xFFFF)
+    assert len(benchmark(get_signature.build_many, FEATURE_SETS)) == len(FEATURE_SETS)
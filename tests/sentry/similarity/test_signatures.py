@@ -2,13 +2,14 @@ from collections import Counter
 
 import pytest
 
-from sentry.similarity.signatures import MinHashSignatureBuilder
+from sentry.similarity.signatures import HashLaneMinHashSignatureBuilder, MinHashSignatureBuilder
 
 
-def test_signatures() -> None:
+@pytest.mark.parametrize("builder", [MinHashSignatureBuilder, HashLaneMinHashSignatureBuilder])
+def test_signatures(builder) -> None:
     n = 32
     r = 0xFFFF
-    get_signature = MinHashSignatureBuilder(n, r)
+    get_signature = builder(n, r)
     assert get_signature({"foo", "bar", "baz"}) == get_signature({"foo", "bar", "baz"})
 
     assert len(get_signature("hello world")) == n
@@ -24,3 +25,27 @@ def test_signatures() -> None:
     estimation = results[True] / float(sum(results.values()))
 
     assert similarity == pytest.approx(estimation, 0.1)
+
+
+@pytest.mark.parametrize("builder", [MinHashSignatureBuilder, HashLaneMinHashSignatureBuilder])
+def test_build_many(builder) -> None:
+    get_signature = builder(16, 0xFFFF)
+    feature_sets = [["foo", "bar"], [b"foo", b"baz"], ["bar"]]
+    assert get_signature.build_many(feature_sets) == [
+        get_signature(features) for features in feature_sets
+    ]
+
+
+def test_hash_lane_signature_sizes() -> None:
+    # More rows than fit into 16 bit lanes, and columns that don't fill the
+    # lanes of the last hash.
+    get_signature = HashLaneMinHashSignatureBuilder(10, 1 << 20)
+    signature = get_signature(["foo", "bar", "baz"])
+    assert len(signature) == 10
+    assert any(value >= 1 << 16 for value in get_signature(["x"]) + signature)
+    for value in signature:
+        assert 0 <= value < 1 << 20
+
+    # Signatures are stored in the index, they must not change between
+    # versions or depend on the platform.
+    assert HashLaneMinHashSignatureBuilder(4, 0xFFFF)(["foo", "bar"]) == [17761, 501, 22747, 37430]
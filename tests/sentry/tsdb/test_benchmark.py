@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from sentry.testutils.helpers.benchmark import requires_benchmark
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, TSDBModel
+from sentry.tsdb.redis import RedisTSDB
+from sentry.utils.dates import to_datetime
+
+pytestmark = [requires_benchmark]
+
+GROUPS = list(range(1, 101))
+DAYS = 90
+
+
+@pytest.fixture
+def db():
+    with override_settings(
+        SENTRY_OPTIONS={"redis.clusters": {"tsdb": {"hosts": {i: {"db": i} for i in range(3)}}}}
+    ):
+        db = RedisTSDB(rollups=((ONE_HOUR, 24), (ONE_DAY, DAYS)), cluster="tsdb")
+
+    now = timezone.now()
+    db.incr_multi(
+        [
+            (TSDBModel.group, group_id, {"timestamp": now - timedelta(days=day), "count": day})
+            for group_id in GROUPS
+            for day in range(0, DAYS, 3)
+        ]
+    )
+    yield db
+
+    with db.cluster.all() as client:
+        client.flushdb()
+
+
+def get_range_hget(db, model, keys, start, end):
+    """
+    Reads counters with one ``HGET`` per key and timestamp, like ``get_range``
+    did before it was backed by ``get_range_matrix``.
+    """
+    rollup, series = db.get_optimal_rollup_series(start, end)
+    results = []
+    with db.cluster.map() as client:
+        for key in keys:
+            for timestamp in map(to_datetime, series):
+                hash_key, hash_field = db.make_counter_key(model, rollup, timestamp, key, None)
+                results.append((timestamp, key, client.hget(hash_key, hash_field)))
+    return results
+
+
+@pytest.mark.parametrize("method", ["hget", "get_range", "get_sums"])
+def test_benchmark_get_range(db, benchmark, method):
+    end = timezone.now()
+    start = end - timedelta(days=DAYS)
+
+    if method == "hget":
+        benchmark(get_range_hget, db, TSDBModel.group, GROUPS, start, end)
+    else:
+        benchmark(getattr(db, method), TSDBModel.group, GROUPS, start, end)
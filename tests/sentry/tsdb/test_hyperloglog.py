@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from sentry.tsdb import hyperloglog
+
+HEADER = b"HYLL%s\x00\x00\x00" + b"\x00" * 8
+
+
+def make_registers(n, seed=0):
+    """
+    The registers of a HyperLogLog after adding ``n`` distinct values.
+    """
+    rng = random.Random(seed)
+    registers = [0] * hyperloglog.REGISTERS
+    for _ in range(n):
+        value = rng.getrandbits(64)
+        index = value & (hyperloglog.REGISTERS - 1)
+        value = value >> hyperloglog.PRECISION | 1 << hyperloglog.Q
+        count = 1
+        while not value & 1:
+            value >>= 1
+            count += 1
+        registers[index] = max(registers[index], count)
+    return registers
+
+
+def encode_dense(registers):
+    packed = sum(register << (6 * i) for i, register in enumerate(registers))
+    return HEADER % b"\x00" + packed.to_bytes(hyperloglog.REGISTERS * 6 // 8, "little")
+
+
+def encode_sparse(registers):
+    opcodes = bytearray()
+    i = 0
+    while i < len(registers):
+        j = i
+        if registers[i] == 0:
+            while j < len(registers) and registers[j] == 0:
+                j += 1
+            run = j - i
+            if run <= 64:
+                opcodes.append(run - 1)
+            else:
+                opcodes += bytes([0x40 | (run - 1) >> 8, (run - 1) & 0xFF])
+        else:
+            while j < len(registers) and registers[j] == registers[i] and j - i < 4:
+                j += 1
+            opcodes.append(0x80 | (registers[i] - 1) << 2 | (j - i - 1))
+        i = j
+    return HEADER % b"\x01" + bytes(opcodes)
+
+
+@pytest.mark.parametrize("n", [0, 1, 10, 1000, 50000])
+def test_count(n):
+    registers = make_registers(n)
+    dense = encode_dense(registers)
+    assert hyperloglog.merge([dense]) == bytes(registers)
+
+    result = hyperloglog.count([dense])
+    assert abs(result - n) <= n * 0.02
+    if max(registers) <= 32:
+        assert hyperloglog.count([encode_sparse(registers)]) == result
+
+
+def test_merge():
+    a = make_registers(2000, seed=1)
+    b = make_registers(2000, seed=2)
+    union = bytes(map(max, a, b))
+
+    assert hyperloglog.merge([encode_dense(a), encode_dense(b)]) == union
+    assert hyperloglog.merge([encode_sparse(a), None, encode_dense(b)]) == union
+    assert hyperloglog.merge([encode_sparse(a), encode_sparse(b)]) == union
+    assert hyperloglog.merge([]) == bytes(hyperloglog.REGISTERS)
+    assert hyperloglog.count([None]) == 0
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        b"",
+        b"HYLL",
+        b"XXXX" + b"\x00" * 20,
+        HEADER % b"\x02",
+        HEADER % b"\x00" + b"\x00" * 10,
+        HEADER % b"\x01" + b"\x00",
+        HEADER % b"\x01" + b"\x7f\xff\x7f\xff",
+    ],
+)
+def test_invalid(value):
+    with pytest.raises(ValueError):
+        hyperloglog.count([value])
@@ -1,5 +1,6 @@
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
+from unittest import mock
 
 import pytest
 from django.test import override_settings
@@ -187,6 +188,73 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
         assert results == {1: 0, 2: 0}
 
+    def test_incr_combine(self):
+        with override_settings(
+            SENTRY_OPTIONS={
+                "redis.clusters": {"tsdb": {"hosts": {i - 6: {"db": i} for i in range(6, 9)}}}
+            }
+        ):
+            db = RedisTSDB(
+                rollups=((ONE_HOUR, 24), (ONE_DAY, 30)),
+                cluster="tsdb",
+                incr_combine_window=60,
+                incr_combine_max_keys=12,
+            )
+
+        now = datetime.utcnow().replace(tzinfo=timezone.utc)
+        start = now - timedelta(hours=1)
+
+        db.incr(TSDBModel.project, 1, now)
+        db.incr_multi([(TSDBModel.project, 1), (TSDBModel.project, 2)], now, environment_id=1)
+        db.incr(TSDBModel.project, 1, now, count=2, environment_id=1)
+
+        # Nothing is written until the increments are flushed.
+        assert db.get_sums(TSDBModel.project, [1, 2], start, now) == {1: 0, 2: 0}
+
+        with mock.patch("sentry.tsdb.redis.metrics.timing") as timing:
+            db.flush()
+        # 7 increments per rollup were combined into 4 fields.
+        timing.assert_called_once_with("tsdb.incr_combine.ratio", 14 / 8)
+
+        assert db.get_sums(TSDBModel.project, [1, 2], start, now) == {1: 4, 2: 1}
+        assert db.get_sums(TSDBModel.project, [1, 2], start, now, environment_id=1) == {
+            1: 3,
+            2: 1,
+        }
+
+        # Writes are also triggered by the number of combined fields.
+        db.incr_multi([(TSDBModel.project, i) for i in range(3, 9)], now)
+        assert db.get_sums(TSDBModel.project, [3], start, now) == {3: 1}
+
+    def test_get_range_matrix(self):
+        now = datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.incr(TSDBModel.group, 1, dts[0])
+        self.db.incr(TSDBModel.group, 1, dts[2], count=2)
+        self.db.incr(TSDBModel.group, "foo", dts[3], count=3)
+        self.db.incr(TSDBModel.group, 65, dts[3], count=4)
+
+        matrix = self.db.get_range_matrix(TSDBModel.group, [1, "foo", 2, 65, 1], dts[0], dts[-1])
+        assert matrix.keys == [1, "foo", 2, 65]
+        assert matrix.series == [timestamp(dt) for dt in dts]
+        assert list(matrix.row(1)) == [1, 0, 2, 0]
+        assert list(matrix.row("foo")) == [0, 0, 0, 3]
+        assert list(matrix.row(2)) == [0, 0, 0, 0]
+        assert list(matrix.row(65)) == [0, 0, 0, 4]
+        assert matrix.sums() == {1: 3, "foo": 3, 2: 0, 65: 4}
+        assert matrix.to_dict() == self.db.get_range(
+            TSDBModel.group, [1, "foo", 2, 65], dts[0], dts[-1]
+        )
+
+        matrix = self.db.get_range_matrix(TSDBModel.group, [], dts[0], dts[-1])
+        assert matrix.sums() == {}
+        assert matrix.to_dict() == {}
+
     def test_count_distinct(self):
         now = datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
@@ -325,6 +393,33 @@ class RedisTSDBTest(TestCase):
         )
         assert results == {1: 0, 2: 0}
 
+    def test_count_distinct_local_merge(self):
+        self.db.distinct_counts_local_merge = True
+        self.test_count_distinct()
+
+    def test_count_distinct_local_merge_dense(self):
+        now = datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+        model = TSDBModel.users_affected_by_group
+
+        # Enough values for Redis to switch to the dense encoding.
+        self.db.record(model, 1, [f"user-{i}" for i in range(20000)], dts[0])
+        self.db.record(model, 1, [f"user-{i}" for i in range(10000, 25000)], dts[1])
+        self.db.record(model, 2, [f"user-{i}" for i in range(0, 30000, 7)], dts[2])
+        self.db.record(model, 3, ("foo", "bar"), dts[3])
+
+        def query():
+            return (
+                self.db.get_distinct_counts_totals(model, [1, 2, 3, 4], dts[0], dts[-1]),
+                self.db.get_distinct_counts_union(model, [1, 2, 3, 4], dts[0], dts[-1]),
+            )
+
+        expected = query()
+        self.db.distinct_counts_local_merge = True
+        assert query() == expected
+        assert expected[0][3] == 2
+        assert expected[0][4] == 0
+
     def test_frequency_tables(self):
         now = datetime.utcnow().replace(tzinfo=timezone.utc)
         model = TSDBModel.frequent_issues_by_project
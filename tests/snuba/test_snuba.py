@@ -1,16 +1,18 @@
 import copy
+import threading
 import time
 import uuid
 from datetime import datetime, timedelta
 from unittest import mock
 
 import pytest
+from django.core.cache import cache
 from django.utils import timezone
 from snuba_sdk.column import InvalidColumnError
 
 from sentry.testutils.cases import SnubaTestCase, TestCase
 from sentry.testutils.helpers.datetime import before_now, iso_format
-from sentry.utils import snuba
+from sentry.utils import json, snuba
 
 
 class SnubaTest(TestCase, SnubaTestCase):
@@ -201,3 +203,75 @@ class BulkRawQueryTest(TestCase, SnubaTestCase):
             {(event_2.group.id, event_2.event_id)},
         ]
         assert _bulk_snuba_query.call_count == 0
+
+    def _cache_test_params(self):
+        one_min_ago = iso_format(before_now(minutes=1))
+        event = self.store_event(
+            data={"fingerprint": ["group-1"], "message": "hello", "timestamp": one_min_ago},
+            project_id=self.project.id,
+        )
+        params = snuba.SnubaQueryParams(
+            start=timezone.now() - timedelta(days=1),
+            end=timezone.now(),
+            selected_columns=["event_id", "group_id", "timestamp"],
+            filter_keys={"project_id": [self.project.id], "group_id": [event.group.id]},
+            tenant_ids={"referrer": "testing.test", "organization_id": 1},
+        )
+        return event, params
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query", side_effect=snuba._bulk_snuba_query)
+    def test_cache_single_flight(self, _bulk_snuba_query):
+        event, params = self._cache_test_params()
+        cache_key = snuba.get_cache_key(snuba._prepare_query_params(copy.deepcopy(params))[0])
+        lock = snuba._get_query_lock(cache_key)
+
+        with self.options({"snuba.query-cache.single-flight": True}):
+            # Another process is running the query and fails.
+            lock.acquire()
+            release = threading.Timer(0.2, lock.release)
+            release.start()
+            results = snuba.bulk_raw_query([copy.deepcopy(params)], use_cache=True)
+            release.join()
+            assert [item["event_id"] for item in results[0]["data"]] == [event.event_id]
+            assert _bulk_snuba_query.call_count == 1
+            assert not lock.locked()
+            _bulk_snuba_query.reset_mock()
+
+            # Another process is running the query and caches its result.
+            cache.delete(cache_key)
+            lock.acquire()
+
+            def finish():
+                cache.set(cache_key, json.dumps({"data": [{"event_id": "a" * 32}]}))
+                lock.release()
+
+            finish_timer = threading.Timer(0.2, finish)
+            finish_timer.start()
+            results = snuba.bulk_raw_query([copy.deepcopy(params)], use_cache=True)
+            finish_timer.join()
+            assert [item["event_id"] for item in results[0]["data"]] == ["a" * 32]
+            assert _bulk_snuba_query.call_count == 0
+
+    @mock.patch("sentry.utils.snuba._revalidate_thread_pool")
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query", side_effect=snuba._bulk_snuba_query)
+    def test_cache_stale_while_revalidate(self, _bulk_snuba_query, revalidate_thread_pool):
+        revalidate_thread_pool.submit.side_effect = lambda fn, *args: fn(*args)
+        event, params = self._cache_test_params()
+        cache_key = snuba.get_cache_key(snuba._prepare_query_params(copy.deepcopy(params))[0])
+
+        with self.options({"snuba.query-cache.stale-while-revalidate": 60}):
+            snuba.bulk_raw_query([copy.deepcopy(params)], use_cache=True)
+            assert _bulk_snuba_query.call_count == 1
+            _bulk_snuba_query.reset_mock()
+
+            snuba.bulk_raw_query([copy.deepcopy(params)], use_cache=True)
+            assert _bulk_snuba_query.call_count == 0
+            assert revalidate_thread_pool.submit.call_count == 0
+
+            # The result is stale, it is served from the cache and refreshed.
+            cache.delete(snuba._get_fresh_cache_key(cache_key))
+            results = snuba.bulk_raw_query([copy.deepcopy(params)], use_cache=True)
+            assert [item["event_id"] for item in results[0]["data"]] == [event.event_id]
+            assert revalidate_thread_pool.submit.call_count == 1
+            assert _bulk_snuba_query.call_count == 1
+            assert cache.get(snuba._get_fresh_cache_key(cache_key)) is not None